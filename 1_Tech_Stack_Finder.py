@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 from utils.tech_stack_finder import TechStackFinder
-from utils.data_processor import DataProcessor
+from utils.data_processor import DataProcessor, IMPORT_DIR, resolve_import_path
 
 st.set_page_config(
     page_title="Tech Stack Finder",
@@ -190,6 +190,9 @@ if 'tech_finder' not in st.session_state:
 if 'data_processor' not in st.session_state:
     st.session_state.data_processor = DataProcessor()
 
+# Make leads buffered by earlier runs visible to this page
+st.session_state.data_processor.flush()
+
 # Input section with enhanced styling
 st.markdown('<div class="search-container">', unsafe_allow_html=True)
 
@@ -242,18 +245,20 @@ if st.button("🔍 Find Companies", type="primary", disabled=not technology):
     if technology:
         with st.spinner(f"Searching for companies using {technology}..."):
             try:
-                # Find companies
-                results = st.session_state.tech_finder.find_by_technology(technology, limit)
+                # Find companies, showing each one as soon as a source returns it
+                found_message = st.empty()
+                results_table = st.empty()
+                results = []
+                for company in st.session_state.tech_finder.stream_by_technology(technology, limit):
+                    results.append(company)
+                    results_table.dataframe(pd.DataFrame(results), use_container_width=True)
                 
                 if results:
-                    st.success(f"Found {len(results)} companies using {technology}")
-                    
-                    # Display results
-                    df = pd.DataFrame(results)
-                    st.dataframe(df, use_container_width=True)
+                    found_message.success(f"Found {len(results)} companies using {technology}")
                     
                     # Add to leads database
                     st.session_state.data_processor.add_tech_stack_data(results)
+                    st.session_state.data_processor.flush()
                     
                     # Verification section
                     st.markdown("---")
@@ -263,24 +268,26 @@ if st.button("🔍 Find Companies", type="primary", disabled=not technology):
                     
                     with verify_col1:
                         st.info("**Verification Status**")
+                        verification_table = st.empty()
                         verification_results = []
                         
-                        # Verify a few companies
-                        for i, company in enumerate(results[:3]):  # Verify first 3
-                            with st.spinner(f"Verifying {company['company_name']}..."):
-                                is_verified = st.session_state.tech_finder.verify_technology(
-                                    company['domain'], 
-                                    technology
-                                )
+                        # Verify every result concurrently, showing each one as it finishes
+                        with st.spinner(f"Verifying {len(results)} companies..."):
+                            companies = {company['domain']: company for company in results}
+                            for domain, is_verified in st.session_state.tech_finder.verify_many(
+                                companies.keys(),
+                                technology
+                            ):
                                 verification_results.append({
-                                    'Company': company['company_name'],
-                                    'Domain': company['domain'],
-                                    'Verified': '✅' if is_verified else '❌'
+                                    'Company': companies[domain]['company_name'],
+                                    'Domain': domain,
+                                    'Verified': '⏱️' if is_verified is None else ('✅' if is_verified else '❌')
                                 })
+                                verification_table.dataframe(pd.DataFrame(verification_results), use_container_width=True)
                         
                         if verification_results:
-                            verification_df = pd.DataFrame(verification_results)
-                            st.dataframe(verification_df, use_container_width=True)
+                            verified_count = sum(1 for row in verification_results if row['Verified'] == '✅')
+                            st.caption(f"{verified_count} of {len(verification_results)} companies verified")
                     
                     with verify_col2:
                         st.info("**Next Steps**")
@@ -300,15 +307,52 @@ if st.button("🔍 Find Companies", type="primary", disabled=not technology):
                 st.error(f"Error searching for companies: {str(e)}")
                 st.info("Please try again with a different technology or check your internet connection.")
 
+# Bulk import of existing domain lists
+with st.expander("📥 Bulk Import Domains"):
+    st.write("Import a CSV, TSV, Parquet or plain-text list of domains straight into the leads database.")
+    
+    import_col1, import_col2 = st.columns([2, 1])
+    
+    with import_col1:
+        uploaded_file = st.file_uploader("Domain list", type=['csv', 'tsv', 'txt', 'parquet'])
+        import_name = st.text_input(
+            f"...or a file in {IMPORT_DIR} on the server",
+            help="Large files placed in the import directory are read in chunks instead of being uploaded"
+        ).strip()
+    
+    with import_col2:
+        domain_column = st.text_input(
+            "Domain column",
+            help="Leave empty to use a column named domain, website or url, or the first column"
+        )
+    
+    if st.button("📥 Import Domains", disabled=not (uploaded_file or import_name)):
+        import_progress = st.empty()
+        try:
+            # Server files are confined to the import directory
+            import_stats = st.session_state.data_processor.import_domains(
+                uploaded_file or resolve_import_path(import_name),
+                column=domain_column.strip() or None,
+                on_chunk=lambda totals: import_progress.info(
+                    f"Read {totals['rows']:,} rows, imported {totals['imported']:,} new domains..."
+                )
+            )
+            import_progress.success(
+                f"Imported {import_stats['imported']:,} new domains from {import_stats['rows']:,} rows "
+                f"({import_stats['duplicates']:,} already known, {import_stats['invalid']:,} invalid)"
+            )
+        except Exception as e:
+            import_progress.error(f"Import failed: {str(e)}")
+
 # Current leads preview
-if not st.session_state.leads_data.empty:
+if st.session_state.data_processor.count_leads() > 0:
     st.markdown("---")
     st.subheader("📊 Current Leads Database")
     
     # Filter current leads by technology
-    tech_leads = st.session_state.leads_data[
-        st.session_state.leads_data['tech_stack'].notna()
-    ] if 'tech_stack' in st.session_state.leads_data.columns else pd.DataFrame()
+    tech_leads = st.session_state.data_processor.get_leads(
+        'with_tech_stack', limit=st.session_state.data_processor.preview_limit
+    )
     
     if not tech_leads.empty:
         col1, col2 = st.columns([2, 1])
@@ -318,10 +362,9 @@ if not st.session_state.leads_data.empty:
         
         with col2:
             # Technology distribution
-            if 'tech_stack' in tech_leads.columns:
-                tech_counts = tech_leads['tech_stack'].value_counts()
-                st.bar_chart(tech_counts)
-                st.caption("Technology Distribution")
+            tech_counts = pd.Series(st.session_state.data_processor.value_counts('tech_stack'))
+            st.bar_chart(tech_counts)
+            st.caption("Technology Distribution")
     else:
         st.info("No technology-based leads found yet. Search for companies above!")
 
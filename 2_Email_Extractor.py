@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from utils.email_extractor import EmailExtractor
 from utils.data_processor import DataProcessor
+from utils.jobs import get_job_queue
 
 st.set_page_config(
     page_title="Email Extractor",
@@ -170,6 +171,85 @@ if 'email_extractor' not in st.session_state:
 if 'data_processor' not in st.session_state:
     st.session_state.data_processor = DataProcessor()
 
+if 'job_queue' not in st.session_state:
+    st.session_state.job_queue = get_job_queue()
+
+# Make leads buffered by earlier runs visible to this page
+st.session_state.data_processor.flush()
+
+def show_email_job(job_id: str, polling: bool):
+    """Show the progress and results of a background extraction job"""
+    job = st.session_state.job_queue.status(job_id)
+    if job is None:
+        return
+    
+    # Refresh the whole page once the job stops so counts and tables catch up
+    if polling and not job['active']:
+        st.rerun()
+    
+    processed = job['finished'] + job['failed']
+    st.progress(min(1.0, processed / max(1, job['total'])))
+    
+    if job['active']:
+        st.text(f"Extracting emails... {processed}/{job['total']} domains finished")
+        if st.button("⏹️ Stop job", key=f"stop_{job_id}"):
+            st.session_state.job_queue.cancel(job_id)
+    elif job['status'] in ('completed', 'completed_with_failures'):
+        st.text(
+            f"✅ Email extraction completed! {job['done']} processed, "
+            f"{job['skipped']} skipped as fresh, {job['failed']} failed"
+        )
+        if job['status'] == 'completed_with_failures':
+            st.text("Resume the job above to retry the failed domains")
+    else:
+        st.text(f"⏸️ Job stopped after {processed}/{job['total']} domains; resume it above")
+    
+    # Worker threads cannot write to the page, so failures are read from the job's checkpoints
+    if job['failed']:
+        with st.expander(f"❌ {job['failed']} failed domains"):
+            failed = st.session_state.job_queue.runner.store.failed_items(job_id)
+            st.dataframe(pd.DataFrame(failed, columns=['domain', 'error']), use_container_width=True)
+    
+    extracted_results = [
+        {
+            'company_name': r.get('company_name') or 'Unknown',
+            'domain': r['domain'],
+            'email': r.get('email', 'Not found'),
+            'score': r.get('email_score', 0),
+            'type': r.get('email_type', 'unknown'),
+            'status': r.get('validation_status', 'unknown')
+        }
+        for r in st.session_state.job_queue.results(job_id)
+    ]
+    
+    # Show results
+    if extracted_results:
+        results_df = pd.DataFrame(extracted_results)
+        
+        st.subheader("📊 Extraction Results")
+        
+        # Summary metrics
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            total_processed = len(extracted_results)
+            st.metric("Processed", total_processed)
+        
+        with col2:
+            emails_found = len([r for r in extracted_results if r['email'] != 'Not found'])
+            st.metric("Emails Found", emails_found)
+        
+        with col3:
+            high_quality = len([r for r in extracted_results if r['score'] >= 80])
+            st.metric("High Quality", high_quality)
+        
+        with col4:
+            valid_emails = len([r for r in extracted_results if r['status'] == 'valid'])
+            st.metric("Valid Emails", valid_emails)
+        
+        # Detailed results
+        st.dataframe(results_df, use_container_width=True)
+
 # Method selection
 st.subheader("Extraction Method")
 method = st.radio(
@@ -180,104 +260,101 @@ method = st.radio(
 
 if method == "Extract from existing leads":
     # Show current leads without emails
-    if st.session_state.leads_data.empty:
+    if st.session_state.data_processor.count_leads() == 0:
         st.warning("No leads found. Please use Tech Stack Finder first to generate leads.")
         if st.button("🔍 Go to Tech Stack Finder"):
             st.switch_page("pages/1_Tech_Stack_Finder.py")
     else:
         # Filter leads that don't have emails yet
-        leads_without_emails = st.session_state.leads_data[
-            st.session_state.leads_data['email'].isna() | 
-            (st.session_state.leads_data['email'] == '')
-        ].copy() if 'email' in st.session_state.leads_data.columns else st.session_state.leads_data.copy()
+        missing_count = st.session_state.data_processor.count_leads('without_email')
         
-        if leads_without_emails.empty:
+        if missing_count == 0:
             st.success("All leads already have emails extracted!")
-            st.dataframe(st.session_state.leads_data, use_container_width=True)
+            st.dataframe(
+                st.session_state.data_processor.get_leads(limit=st.session_state.data_processor.preview_limit),
+                use_container_width=True
+            )
         else:
-            st.info(f"Found {len(leads_without_emails)} leads without emails")
-            st.dataframe(leads_without_emails[['company_name', 'domain']], use_container_width=True)
+            st.info(f"Found {missing_count} leads without emails")
+            leads_without_emails = st.session_state.data_processor.get_leads(
+                'without_email', columns=['company_name', 'domain'],
+                limit=st.session_state.data_processor.preview_limit
+            )
+            st.dataframe(leads_without_emails, use_container_width=True)
             
             # Batch extraction
-            col1, col2 = st.columns([1, 1])
+            col1, col2, col3 = st.columns([1, 1, 1])
             
             with col1:
                 extract_count = st.number_input(
                     "Number of leads to process",
                     min_value=1,
-                    max_value=len(leads_without_emails),
-                    value=min(5, len(leads_without_emails)),
+                    max_value=missing_count,
+                    value=min(5, missing_count),
                     help="Processing many leads at once may take time"
                 )
             
             with col2:
-                st.metric("Leads without emails", len(leads_without_emails))
+                max_workers = st.number_input(
+                    "Parallel workers",
+                    min_value=1,
+                    max_value=32,
+                    value=8,
+                    help=(
+                        "Domains processed at the same time; each website gets at most "
+                        f"{st.session_state.email_extractor.fetcher.per_host_limit} requests at a time"
+                    )
+                )
             
-            if st.button("📧 Extract Emails", type="primary"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                results_container = st.container()
-                
-                extracted_results = []
-                
-                for i, (_, lead) in enumerate(leads_without_emails.head(extract_count).iterrows()):
-                    domain = lead['domain']
-                    company_name = lead.get('company_name', 'Unknown')
-                    
-                    status_text.text(f"Extracting emails for {company_name} ({domain})...")
-                    progress_bar.progress((i + 1) / extract_count)
-                    
-                    try:
-                        email_data = st.session_state.email_extractor.extract_emails_from_domain(domain)
-                        
-                        # Update the lead in database
-                        success = st.session_state.data_processor.add_email_data(domain, email_data)
-                        
-                        # Track results
-                        result = {
-                            'company_name': company_name,
-                            'domain': domain,
-                            'email': email_data.get('email', 'Not found'),
-                            'score': email_data.get('email_score', 0),
-                            'type': email_data.get('email_type', 'unknown'),
-                            'status': email_data.get('validation_status', 'unknown')
-                        }
-                        extracted_results.append(result)
-                        
-                    except Exception as e:
-                        st.error(f"Error processing {domain}: {str(e)}")
-                
-                status_text.text("✅ Email extraction completed!")
-                progress_bar.progress(1.0)
+            with col3:
+                st.metric("Leads without emails", missing_count)
+            
+            freshness_days = st.number_input(
+                "Skip domains extracted within the last (days)",
+                min_value=0,
+                max_value=365,
+                value=7,
+                help="Domains finished by an earlier job in this window are not fetched again"
+            )
+            
+            # Jobs run on background workers, so reruns and closed tabs do not stop them
+            for job in st.session_state.job_queue.runner.store.list_jobs('email', unfinished_only=True):
+                job_active = st.session_state.job_queue.is_active(job['id'])
+                if job_active and job['id'] == st.session_state.get('email_job'):
+                    continue
                 
-                # Show results
-                if extracted_results:
-                    results_df = pd.DataFrame(extracted_results)
-                    
-                    with results_container:
-                        st.subheader("📊 Extraction Results")
-                        
-                        # Summary metrics
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            total_processed = len(extracted_results)
-                            st.metric("Processed", total_processed)
-                        
-                        with col2:
-                            emails_found = len([r for r in extracted_results if r['email'] != 'Not found'])
-                            st.metric("Emails Found", emails_found)
-                        
-                        with col3:
-                            high_quality = len([r for r in extracted_results if r['score'] >= 80])
-                            st.metric("High Quality", high_quality)
-                        
-                        with col4:
-                            valid_emails = len([r for r in extracted_results if r['status'] == 'valid'])
-                            st.metric("Valid Emails", valid_emails)
-                        
-                        # Detailed results
-                        st.dataframe(results_df, use_container_width=True)
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    if job_active:
+                        state = "running"
+                    elif job['status'] == 'completed_with_failures':
+                        state = f"{job['failed']} failed"
+                    else:
+                        state = "paused"
+                    st.info(f"Extraction job {job['id']} ({state}): {job['finished']}/{job['total']} domains done")
+                with col2:
+                    if not job_active and st.button("▶️ Resume", key=f"resume_{job['id']}"):
+                        st.session_state.job_queue.resume(
+                            job['id'], max_workers=max_workers, freshness=freshness_days * 86400
+                        )
+                        st.session_state.email_job = job['id']
+                        st.rerun()
+            
+            if st.button("📧 Extract Emails", type="primary"):
+                batch = st.session_state.data_processor.get_leads(
+                    'without_email', columns=['company_name', 'domain'], limit=extract_count
+                )
+                st.session_state.email_job = st.session_state.job_queue.submit(
+                    'email', zip(batch['domain'], batch['company_name']),
+                    max_workers=max_workers, freshness=freshness_days * 86400
+                )
+        
+        # Poll this session's job while it runs; the page itself stays responsive
+        if st.session_state.get('email_job'):
+            job_active = st.session_state.job_queue.is_active(st.session_state.email_job)
+            st.fragment(show_email_job, run_every=2 if job_active else None)(
+                st.session_state.email_job, job_active
+            )
 
 else:  # Extract from specific domain
     st.subheader("Extract from Specific Domain")
@@ -297,6 +374,10 @@ else:  # Extract from specific domain
                 with st.spinner(f"Extracting emails from {domain_input}..."):
                     try:
                         email_data = st.session_state.email_extractor.extract_emails_from_domain(domain_input)
+                        if email_data.get('timed_out'):
+                            st.warning(f"{domain_input} was slow to respond; showing what was found in time")
+                        if email_data.get('error'):
+                            st.error(f"Error extracting emails from {domain_input}: {email_data['error']}")
                         
                         # Display results
                         col1, col2 = st.columns([1, 1])
@@ -351,6 +432,9 @@ else:  # Extract from specific domain
                                     'email_type': email_data['email_type']
                                 }]
                                 st.session_state.data_processor.add_tech_stack_data(lead_data)
+                                st.session_state.data_processor.save_email_candidates(
+                                    domain_input, email_data.get('candidates', [])
+                                )
                                 st.success("Added to leads database!")
                                 st.rerun()
                         
@@ -386,6 +470,14 @@ with st.expander("📊 Email Scoring System"):
     - **MX Record Check**: Verifies domain can receive emails
     - **Domain Verification**: Ensures domain is active
     """)
+    
+    # Stored emails follow the current weights after a re-rank; nothing is downloaded again
+    if st.button("🔄 Re-rank Stored Emails"):
+        with st.spinner("Re-ranking stored emails..."):
+            reranked = st.session_state.data_processor.rerank_emails(
+                st.session_state.email_extractor.email_types
+            )
+        st.success(f"Re-ranked the emails of {reranked:,} leads")
 
 # Bulk email validation tool
 st.markdown("---")
@@ -413,29 +505,27 @@ if st.button("🔍 Validate Emails") and email_list_input:
                 st.info(f"Validation complete: {valid_count}/{len(emails)} emails are valid")
 
 # Current leads with emails
-if not st.session_state.leads_data.empty:
-    leads_with_emails = st.session_state.leads_data[
-        st.session_state.leads_data['email'].notna() & 
-        (st.session_state.leads_data['email'] != '')
-    ].copy() if 'email' in st.session_state.leads_data.columns else pd.DataFrame()
+if st.session_state.data_processor.count_leads('with_email') > 0:
+    # Best emails first; only the rows shown are read from the database
+    leads_with_emails = st.session_state.data_processor.get_leads(
+        'with_email', order_by='email_score', descending=True,
+        limit=st.session_state.data_processor.preview_limit
+    )
     
     if not leads_with_emails.empty:
         st.markdown("---")
         st.subheader("📋 Leads with Emails")
         
-        # Sort by email score
-        if 'email_score' in leads_with_emails.columns:
-            leads_with_emails = leads_with_emails.sort_values('email_score', ascending=False)
-        
         st.dataframe(leads_with_emails, use_container_width=True)
         
-        # Email quality distribution
-        if 'email_score' in leads_with_emails.columns:
+        # Email quality distribution over every lead, counted per score in the database
+        score_totals = pd.Series(st.session_state.data_processor.value_counts('email_score', 'with_email'))
+        if not score_totals.empty:
             st.subheader("📊 Email Quality Distribution")
             score_ranges = pd.cut(
-                leads_with_emails['email_score'], 
+                score_totals.index.astype(float), 
                 bins=[0, 50, 80, 100], 
                 labels=['Low (0-50)', 'Medium (51-80)', 'High (81-100)']
             )
-            score_counts = score_ranges.value_counts()
+            score_counts = score_totals.groupby(score_ranges, observed=False).sum()
             st.bar_chart(score_counts)
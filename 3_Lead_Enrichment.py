@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from utils.lead_enrichment import LeadEnrichment
 from utils.data_processor import DataProcessor
+from utils.jobs import get_job_queue
 
 st.set_page_config(
     page_title="Lead Enrichment",
@@ -181,6 +182,86 @@ if 'lead_enrichment' not in st.session_state:
 if 'data_processor' not in st.session_state:
     st.session_state.data_processor = DataProcessor()
 
+if 'job_queue' not in st.session_state:
+    st.session_state.job_queue = get_job_queue()
+
+# Make leads buffered by earlier runs visible to this page
+st.session_state.data_processor.flush()
+
+def show_enrichment_job(job_id: str, polling: bool):
+    """Show the progress and results of a background enrichment job"""
+    job = st.session_state.job_queue.status(job_id)
+    if job is None:
+        return
+    
+    # Refresh the whole page once the job stops so counts and tables catch up
+    if polling and not job['active']:
+        st.rerun()
+    
+    processed = job['finished'] + job['failed']
+    st.progress(min(1.0, processed / max(1, job['total'])))
+    
+    if job['active']:
+        st.text(f"Enriching leads... {processed}/{job['total']} leads finished")
+        if st.button("⏹️ Stop job", key=f"stop_{job_id}"):
+            st.session_state.job_queue.cancel(job_id)
+    elif job['status'] in ('completed', 'completed_with_failures'):
+        st.text(
+            f"✅ Lead enrichment completed! {job['done']} enriched, "
+            f"{job['skipped']} skipped as fresh, {job['failed']} failed"
+        )
+        if job['status'] == 'completed_with_failures':
+            st.text("Resume the job above to retry the failed leads")
+    else:
+        st.text(f"⏸️ Job stopped after {processed}/{job['total']} leads; resume it above")
+    
+    # Worker threads cannot write to the page, so failures are read from the job's checkpoints
+    if job['failed']:
+        with st.expander(f"❌ {job['failed']} failed leads"):
+            failed = st.session_state.job_queue.runner.store.failed_items(job_id)
+            st.dataframe(pd.DataFrame(failed, columns=['domain', 'error']), use_container_width=True)
+    
+    enrichment_results = [
+        {
+            'company_name': r.get('company_name') or 'Unknown',
+            'domain': r['domain'],
+            'company_size': r.get('company_size', 'Unknown'),
+            'industry': r.get('industry', 'Unknown'),
+            'location': r.get('location', 'Unknown'),
+            'funding_status': r.get('funding_status', 'Unknown'),
+            'linkedin_url': r.get('linkedin_url', 'Not found')
+        }
+        for r in st.session_state.job_queue.results(job_id)
+    ]
+    
+    # Show results
+    if enrichment_results:
+        results_df = pd.DataFrame(enrichment_results)
+        
+        st.subheader("📊 Enrichment Results")
+        
+        # Summary metrics
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            total_enriched = len(enrichment_results)
+            st.metric("Enriched", total_enriched)
+        
+        with col2:
+            companies_with_size = len([r for r in enrichment_results if r['company_size'] != 'Unknown'])
+            st.metric("Company Size Found", companies_with_size)
+        
+        with col3:
+            companies_with_linkedin = len([r for r in enrichment_results if r['linkedin_url'] != 'Not found'])
+            st.metric("LinkedIn Found", companies_with_linkedin)
+        
+        with col4:
+            companies_with_location = len([r for r in enrichment_results if r['location'] != 'Unknown'])
+            st.metric("Location Found", companies_with_location)
+        
+        # Detailed results
+        st.dataframe(results_df, use_container_width=True)
+
 # Method selection
 st.subheader("Enrichment Method")
 method = st.radio(
@@ -191,7 +272,7 @@ method = st.radio(
 
 if method == "Enrich existing leads":
     # Show current leads
-    if st.session_state.leads_data.empty:
+    if st.session_state.data_processor.count_leads() == 0:
         st.warning("No leads found. Please use Tech Stack Finder and Email Extractor first.")
         col1, col2 = st.columns(2)
         with col1:
@@ -201,36 +282,27 @@ if method == "Enrich existing leads":
             if st.button("📧 Go to Email Extractor"):
                 st.switch_page("pages/2_Email_Extractor.py")
     else:
-        # Show leads that can be enriched
-        leads_to_enrich = st.session_state.leads_data[
-            st.session_state.leads_data['domain'].notna()
-        ].copy()
-        
-        # Check which leads need enrichment
-        enrichment_fields = ['company_size', 'funding_status', 'linkedin_url', 'industry', 'location']
-        needs_enrichment = pd.DataFrame()
-        
-        for field in enrichment_fields:
-            if field not in leads_to_enrich.columns:
-                leads_to_enrich[field] = None
-        
         # Find leads that are missing enrichment data
-        needs_enrichment = leads_to_enrich[
-            leads_to_enrich[enrichment_fields].isna().any(axis=1) |
-            (leads_to_enrich[enrichment_fields] == '').any(axis=1) |
-            (leads_to_enrich[enrichment_fields] == 'Unknown').any(axis=1)
-        ].copy()
+        enrich_total = st.session_state.data_processor.count_leads('needs_enrichment')
         
-        if needs_enrichment.empty:
+        if enrich_total == 0:
             st.success("All leads are already enriched!")
-            st.dataframe(leads_to_enrich, use_container_width=True)
+            st.dataframe(
+                st.session_state.data_processor.get_leads(limit=st.session_state.data_processor.preview_limit),
+                use_container_width=True
+            )
         else:
-            st.info(f"Found {len(needs_enrichment)} leads that can be enriched")
+            st.info(f"Found {enrich_total} leads that can be enriched")
             
             # Show preview of leads to enrich
             preview_cols = ['company_name', 'domain', 'email']
-            available_cols = [col for col in preview_cols if col in needs_enrichment.columns]
-            st.dataframe(needs_enrichment[available_cols], use_container_width=True)
+            st.dataframe(
+                st.session_state.data_processor.get_leads(
+                    'needs_enrichment', columns=preview_cols,
+                    limit=st.session_state.data_processor.preview_limit
+                ),
+                use_container_width=True
+            )
             
             # Enrichment controls
             col1, col2, col3 = st.columns([1, 1, 1])
@@ -239,13 +311,13 @@ if method == "Enrich existing leads":
                 enrich_count = st.number_input(
                     "Number of leads to enrich",
                     min_value=1,
-                    max_value=len(needs_enrichment),
-                    value=min(3, len(needs_enrichment)),
+                    max_value=enrich_total,
+                    value=min(3, enrich_total),
                     help="Enrichment takes time, start with a few leads"
                 )
             
             with col2:
-                st.metric("Leads to enrich", len(needs_enrichment))
+                st.metric("Leads to enrich", enrich_total)
             
             with col3:
                 enrichment_priority = st.selectbox(
@@ -255,79 +327,57 @@ if method == "Enrich existing leads":
                 )
             
             # Sort based on priority
-            if enrichment_priority == "High email scores first" and 'email_score' in needs_enrichment.columns:
-                needs_enrichment = needs_enrichment.sort_values('email_score', ascending=False)
-            elif enrichment_priority == "Alphabetical" and 'company_name' in needs_enrichment.columns:
-                needs_enrichment = needs_enrichment.sort_values('company_name')
+            priority_order = {
+                "High email scores first": ('email_score', True),
+                "Alphabetical": ('company_name', False)
+            }
+            order_by, descending = priority_order.get(enrichment_priority, (None, False))
             
-            if st.button("📊 Enrich Leads", type="primary"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                results_container = st.container()
-                
-                enrichment_results = []
-                
-                for i, (_, lead) in enumerate(needs_enrichment.head(enrich_count).iterrows()):
-                    domain = lead['domain']
-                    company_name = lead.get('company_name', 'Unknown')
-                    
-                    status_text.text(f"Enriching {company_name} ({domain})...")
-                    progress_bar.progress((i + 1) / enrich_count)
-                    
-                    try:
-                        enrichment_data = st.session_state.lead_enrichment.enrich_company(
-                            domain, company_name
-                        )
-                        
-                        # Update the lead in database
-                        success = st.session_state.data_processor.add_enrichment_data(domain, enrichment_data)
-                        
-                        # Track results
-                        result = {
-                            'company_name': company_name,
-                            'domain': domain,
-                            'company_size': enrichment_data.get('company_size', 'Unknown'),
-                            'industry': enrichment_data.get('industry', 'Unknown'),
-                            'location': enrichment_data.get('location', 'Unknown'),
-                            'funding_status': enrichment_data.get('funding_status', 'Unknown'),
-                            'linkedin_url': enrichment_data.get('linkedin_url', 'Not found')
-                        }
-                        enrichment_results.append(result)
-                        
-                    except Exception as e:
-                        st.error(f"Error enriching {domain}: {str(e)}")
-                
-                status_text.text("✅ Lead enrichment completed!")
-                progress_bar.progress(1.0)
+            freshness_days = st.number_input(
+                "Skip leads enriched within the last (days)",
+                min_value=0,
+                max_value=365,
+                value=7,
+                help="Leads finished by an earlier job in this window are not fetched again"
+            )
+            
+            # Jobs run on background workers, so reruns and closed tabs do not stop them
+            for job in st.session_state.job_queue.runner.store.list_jobs('enrichment', unfinished_only=True):
+                job_active = st.session_state.job_queue.is_active(job['id'])
+                if job_active and job['id'] == st.session_state.get('enrichment_job'):
+                    continue
                 
-                # Show results
-                if enrichment_results:
-                    results_df = pd.DataFrame(enrichment_results)
-                    
-                    with results_container:
-                        st.subheader("📊 Enrichment Results")
-                        
-                        # Summary metrics
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            total_enriched = len(enrichment_results)
-                            st.metric("Enriched", total_enriched)
-                        
-                        with col2:
-                            companies_with_size = len([r for r in enrichment_results if r['company_size'] != 'Unknown'])
-                            st.metric("Company Size Found", companies_with_size)
-                        
-                        with col3:
-                            companies_with_linkedin = len([r for r in enrichment_results if r['linkedin_url'] != 'Not found'])
-                            st.metric("LinkedIn Found", companies_with_linkedin)
-                        
-                        with col4:
-                            companies_with_location = len([r for r in enrichment_results if r['location'] != 'Unknown'])
-                            st.metric("Location Found", companies_with_location)
-                        
-                        # Detailed results
-                        st.dataframe(results_df, use_container_width=True)
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    if job_active:
+                        state = "running"
+                    elif job['status'] == 'completed_with_failures':
+                        state = f"{job['failed']} failed"
+                    else:
+                        state = "paused"
+                    st.info(f"Enrichment job {job['id']} ({state}): {job['finished']}/{job['total']} leads done")
+                with col2:
+                    if not job_active and st.button("▶️ Resume", key=f"resume_{job['id']}"):
+                        st.session_state.job_queue.resume(job['id'], freshness=freshness_days * 86400)
+                        st.session_state.enrichment_job = job['id']
+                        st.rerun()
+            
+            if st.button("📊 Enrich Leads", type="primary"):
+                needs_enrichment = st.session_state.data_processor.get_leads(
+                    'needs_enrichment', columns=['domain', 'company_name'],
+                    order_by=order_by, descending=descending, limit=enrich_count
+                )
+                st.session_state.enrichment_job = st.session_state.job_queue.submit(
+                    'enrichment', zip(needs_enrichment['domain'], needs_enrichment['company_name']),
+                    freshness=freshness_days * 86400
+                )
+        
+        # Poll this session's job while it runs; the page itself stays responsive
+        if st.session_state.get('enrichment_job'):
+            job_active = st.session_state.job_queue.is_active(st.session_state.enrichment_job)
+            st.fragment(show_enrichment_job, run_every=2 if job_active else None)(
+                st.session_state.enrichment_job, job_active
+            )
 
 else:  # Enrich specific company
     st.subheader("Enrich Specific Company")
@@ -355,6 +405,10 @@ else:  # Enrich specific company
                     enrichment_data = st.session_state.lead_enrichment.enrich_company(
                         domain_input, company_name_input
                     )
+                    if enrichment_data.get('timed_out'):
+                        st.warning(f"{domain_input} was slow to respond; showing what was found in time")
+                    if enrichment_data.get('error'):
+                        st.error(f"Error enriching company {company_name_input or domain_input}: {enrichment_data['error']}")
                     
                     # Display results in organized sections
                     col1, col2 = st.columns([1, 1])
@@ -482,68 +536,41 @@ with st.expander("🔍 Enrichment Sources & Methodology"):
     """)
 
 # Current enriched leads overview
-if not st.session_state.leads_data.empty:
-    enriched_leads = st.session_state.leads_data.copy()
+if st.session_state.data_processor.count_leads() > 0:
+    data_processor = st.session_state.data_processor
     
-    # Check for enrichment data
-    enrichment_cols = ['company_size', 'industry', 'location', 'funding_status', 'linkedin_url']
-    has_enrichment = any(col in enriched_leads.columns for col in enrichment_cols)
+    st.markdown("---")
+    st.subheader("📊 Current Enriched Leads")
     
-    if has_enrichment:
-        st.markdown("---")
-        st.subheader("📊 Current Enriched Leads")
-        
-        # Show enrichment statistics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            if 'company_size' in enriched_leads.columns:
-                companies_with_size = len(enriched_leads[
-                    enriched_leads['company_size'].notna() & 
-                    (enriched_leads['company_size'] != 'Unknown')
-                ])
-                st.metric("With Company Size", companies_with_size)
-        
-        with col2:
-            if 'industry' in enriched_leads.columns:
-                companies_with_industry = len(enriched_leads[
-                    enriched_leads['industry'].notna() & 
-                    (enriched_leads['industry'] != 'Unknown')
-                ])
-                st.metric("With Industry", companies_with_industry)
-        
-        with col3:
-            if 'location' in enriched_leads.columns:
-                companies_with_location = len(enriched_leads[
-                    enriched_leads['location'].notna() & 
-                    (enriched_leads['location'] != 'Unknown')
-                ])
-                st.metric("With Location", companies_with_location)
-        
-        with col4:
-            if 'linkedin_url' in enriched_leads.columns:
-                companies_with_linkedin = len(enriched_leads[
-                    enriched_leads['linkedin_url'].notna() & 
-                    (enriched_leads['linkedin_url'] != 'Not found')
-                ])
-                st.metric("With LinkedIn", companies_with_linkedin)
-        
-        # Data table
-        st.dataframe(enriched_leads, use_container_width=True)
-        
-        # Industry and size distribution charts
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if 'industry' in enriched_leads.columns:
-                industry_counts = enriched_leads['industry'].value_counts().head(10)
-                if not industry_counts.empty:
-                    st.subheader("🏭 Industry Distribution")
-                    st.bar_chart(industry_counts)
-        
-        with col2:
-            if 'company_size' in enriched_leads.columns:
-                size_counts = enriched_leads['company_size'].value_counts()
-                if not size_counts.empty:
-                    st.subheader("📏 Company Size Distribution")
-                    st.bar_chart(size_counts)
+    # Show enrichment statistics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("With Company Size", data_processor.count_known('company_size'))
+    
+    with col2:
+        st.metric("With Industry", data_processor.count_known('industry'))
+    
+    with col3:
+        st.metric("With Location", data_processor.count_known('location'))
+    
+    with col4:
+        st.metric("With LinkedIn", data_processor.count_known('linkedin_url', ('Not found',)))
+    
+    # Data table
+    st.dataframe(data_processor.get_leads(limit=data_processor.preview_limit), use_container_width=True)
+    
+    # Industry and size distribution charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        industry_counts = pd.Series(data_processor.value_counts('industry', limit=10))
+        if not industry_counts.empty:
+            st.subheader("🏭 Industry Distribution")
+            st.bar_chart(industry_counts)
+    
+    with col2:
+        size_counts = pd.Series(data_processor.value_counts('company_size'))
+        if not size_counts.empty:
+            st.subheader("📏 Company Size Distribution")
+            st.bar_chart(size_counts)
@@ -1,7 +1,7 @@
 import streamlit as st
-import pandas as pd
+import tempfile
 from datetime import datetime
-import io
+from typing import IO, Callable
 from utils.data_processor import DataProcessor
 
 st.set_page_config(
@@ -207,12 +207,28 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+def offer_download(prepare_label: str, key: str, label: str, file_name: str, mime: str,
+                   write: Callable[[IO], int], binary: bool = False, **kwargs):
+    """Build an export file only when asked for, streaming it to disk, then offer it for download"""
+    if not st.button(prepare_label, key=f"prepare_{key}"):
+        return
+    
+    mode = {'mode': 'w+b'} if binary else {'mode': 'w+', 'encoding': 'utf-8', 'newline': ''}
+    with st.spinner("Preparing export..."), tempfile.TemporaryFile(**mode) as target:
+        write(target)
+        target.seek(0)
+        st.download_button(label=label, data=target.read(), file_name=file_name, mime=mime,
+                           key=f"download_{key}", type="primary", **kwargs)
+
 # Initialize components
 if 'data_processor' not in st.session_state:
     st.session_state.data_processor = DataProcessor()
 
+# Make leads buffered by earlier runs visible to this page
+st.session_state.data_processor.flush()
+
 # Check if we have data to export
-if st.session_state.leads_data.empty:
+if st.session_state.data_processor.count_leads() == 0:
     st.warning("No leads data available for export.")
     st.info("Please use the other modules to generate leads first:")
     
@@ -254,14 +270,17 @@ else:
     # Data preview
     st.markdown("---")
     st.subheader("📋 Data Preview")
-    st.dataframe(st.session_state.leads_data, use_container_width=True)
+    st.dataframe(
+        st.session_state.data_processor.get_leads(limit=st.session_state.data_processor.preview_limit),
+        use_container_width=True
+    )
     
     # Export options
     st.markdown("---")
     st.subheader("📤 Export Options")
     
     # Column selection
-    available_columns = list(st.session_state.leads_data.columns)
+    available_columns = list(st.session_state.data_processor.leads_columns)
     
     col1, col2 = st.columns([1, 1])
     
@@ -301,80 +320,58 @@ else:
         )
     
     # Apply filters
-    export_data = st.session_state.leads_data.copy()
-    
-    if filter_empty_emails and 'email' in export_data.columns:
-        export_data = export_data[
-            export_data['email'].notna() & 
-            (export_data['email'] != '') & 
-            (export_data['email'] != 'Not found')
-        ]
+    export_filter = 'exportable_email' if filter_empty_emails else 'all'
     
-    if min_email_score > 0 and 'email_score' in export_data.columns:
-        export_data = export_data[export_data['email_score'] >= min_email_score]
-    
-    # Select only chosen columns
-    if selected_columns:
-        available_selected = [col for col in selected_columns if col in export_data.columns]
-        export_data = export_data[available_selected]
+    # Sizes come from COUNT queries; rows are only read for the preview and the files
+    summary = st.session_state.data_processor.export_summary(export_filter, min_email_score)
+    export_total = summary['total']
     
     # Show filtered data preview
-    if len(export_data) != len(st.session_state.leads_data):
-        st.info(f"After filtering: {len(export_data)} leads will be exported (from {len(st.session_state.leads_data)} total)")
-        st.dataframe(export_data.head(10), use_container_width=True)
+    if export_total != stats['total_leads']:
+        st.info(f"After filtering: {export_total} leads will be exported (from {stats['total_leads']} total)")
+        st.dataframe(
+            st.session_state.data_processor.get_leads(
+                export_filter, columns=selected_columns, min_email_score=min_email_score, limit=10
+            ),
+            use_container_width=True
+        )
     
     # Export buttons
     st.markdown("---")
     st.subheader("💾 Download Options")
     
-    if not export_data.empty:
+    if export_total > 0:
         col1, col2, col3 = st.columns(3)
         
         with col1:
             # CSV Export
-            csv_data = export_data.to_csv(index=False)
-            st.download_button(
-                label="📊 Download as CSV",
-                data=csv_data,
-                file_name=f"{filename}.csv",
-                mime="text/csv",
-                type="primary",
+            offer_download(
+                "📊 Prepare CSV", "csv", "📊 Download as CSV", f"{filename}.csv", "text/csv",
+                lambda target: st.session_state.data_processor.write_csv(
+                    target, export_filter, selected_columns, min_email_score
+                ),
                 help="Standard CSV format, compatible with Excel and most CRM systems"
             )
         
         with col2:
-            # Excel Export
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                export_data.to_excel(writer, sheet_name='Leads', index=False)
-                
-                # Add a summary sheet
-                summary_data = pd.DataFrame([
-                    ['Total Leads', len(export_data)],
-                    ['Export Date', datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-                    ['Columns Exported', len(selected_columns)],
-                    ['High Quality Emails', len(export_data[export_data['email_score'] >= 80]) if 'email_score' in export_data.columns else 'N/A']
-                ], columns=['Metric', 'Value'])
-                summary_data.to_excel(writer, sheet_name='Summary', index=False)
-            
-            excel_buffer.seek(0)
-            
-            st.download_button(
-                label="📈 Download as Excel",
-                data=excel_buffer.getvalue(),
-                file_name=f"{filename}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            # Excel Export, with a summary sheet
+            offer_download(
+                "📈 Prepare Excel", "excel", "📈 Download as Excel", f"{filename}.xlsx",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                lambda target: st.session_state.data_processor.write_excel(
+                    target, export_filter, selected_columns, min_email_score
+                ),
+                binary=True,
                 help="Excel format with multiple sheets including summary"
             )
         
         with col3:
             # JSON Export
-            json_data = export_data.to_json(orient='records', indent=2)
-            st.download_button(
-                label="🔗 Download as JSON",
-                data=json_data,
-                file_name=f"{filename}.json",
-                mime="application/json",
+            offer_download(
+                "🔗 Prepare JSON", "json", "🔗 Download as JSON", f"{filename}.json", "application/json",
+                lambda target: st.session_state.data_processor.write_json(
+                    target, export_filter, selected_columns, min_email_score
+                ),
                 help="JSON format for API integration and custom processing"
             )
         
@@ -386,30 +383,22 @@ else:
         
         with col1:
             st.write("**Data Quality Metrics:**")
-            if 'email' in export_data.columns:
-                emails_found = len(export_data[
-                    export_data['email'].notna() & 
-                    (export_data['email'] != '') & 
-                    (export_data['email'] != 'Not found')
-                ])
-                st.write(f"- Leads with emails: {emails_found}/{len(export_data)} ({emails_found/len(export_data)*100:.1f}%)")
+            if 'email' in selected_columns:
+                emails_found = summary['with_email']
+                st.write(f"- Leads with emails: {emails_found}/{export_total} ({emails_found/export_total*100:.1f}%)")
             
-            if 'email_score' in export_data.columns:
-                high_quality = len(export_data[export_data['email_score'] >= 80])
-                st.write(f"- High quality emails: {high_quality}/{len(export_data)} ({high_quality/len(export_data)*100:.1f}%)")
+            if 'email_score' in selected_columns:
+                high_quality = summary['high_quality']
+                st.write(f"- High quality emails: {high_quality}/{export_total} ({high_quality/export_total*100:.1f}%)")
             
-            if 'company_size' in export_data.columns:
-                enriched_size = len(export_data[
-                    export_data['company_size'].notna() & 
-                    (export_data['company_size'] != 'Unknown')
-                ])
-                st.write(f"- Company size data: {enriched_size}/{len(export_data)} ({enriched_size/len(export_data)*100:.1f}%)")
+            if 'company_size' in selected_columns:
+                enriched_size = summary['with_company_size']
+                st.write(f"- Company size data: {enriched_size}/{export_total} ({enriched_size/export_total*100:.1f}%)")
         
         with col2:
             st.write("**Top Industries:**")
-            if 'industry' in export_data.columns and not export_data['industry'].isna().all():
-                top_industries = export_data['industry'].value_counts().head(5)
-                for industry, count in top_industries.items():
+            if 'industry' in selected_columns and summary['top_industries']:
+                for industry, count in summary['top_industries'].items():
                     if industry and industry != 'Unknown':
                         st.write(f"- {industry}: {count}")
             else:
@@ -460,44 +449,34 @@ else:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if st.button("📧 Email Marketing List"):
-                email_marketing_data = export_data[['company_name', 'email', 'email_score']].copy()
-                email_marketing_data = email_marketing_data[
-                    email_marketing_data['email'].notna() & 
-                    (email_marketing_data['email'] != '') & 
-                    (email_marketing_data['email'] != 'Not found')
-                ]
-                csv_marketing = email_marketing_data.to_csv(index=False)
-                st.download_button(
-                    "Download Email List",
-                    csv_marketing,
-                    f"{filename}_email_marketing.csv",
-                    "text/csv"
+            # Only leads with a usable email, whatever the filter above
+            offer_download(
+                "📧 Email Marketing List", "email_marketing", "Download Email List",
+                f"{filename}_email_marketing.csv", "text/csv",
+                lambda target: st.session_state.data_processor.write_csv(
+                    target, 'exportable_email', ['company_name', 'email', 'email_score'], min_email_score
                 )
+            )
         
         with col2:
-            if st.button("🎯 Sales Prospects"):
-                sales_columns = ['company_name', 'domain', 'email', 'email_score', 'company_size', 'industry', 'linkedin_url']
-                available_sales_cols = [col for col in sales_columns if col in export_data.columns]
-                sales_data = export_data[available_sales_cols].copy()
-                csv_sales = sales_data.to_csv(index=False)
-                st.download_button(
-                    "Download Sales List",
-                    csv_sales,
-                    f"{filename}_sales_prospects.csv",
-                    "text/csv"
+            sales_columns = ['company_name', 'domain', 'email', 'email_score', 'company_size', 'industry', 'linkedin_url']
+            available_sales_cols = [col for col in sales_columns if col in selected_columns]
+            offer_download(
+                "🎯 Sales Prospects", "sales_prospects", "Download Sales List",
+                f"{filename}_sales_prospects.csv", "text/csv",
+                lambda target: st.session_state.data_processor.write_csv(
+                    target, export_filter, available_sales_cols, min_email_score
                 )
+            )
         
         with col3:
-            if st.button("📊 Research Data"):
-                research_data = export_data.copy()
-                csv_research = research_data.to_csv(index=False)
-                st.download_button(
-                    "Download Research Data",
-                    csv_research,
-                    f"{filename}_research_data.csv",
-                    "text/csv"
+            offer_download(
+                "📊 Research Data", "research_data", "Download Research Data",
+                f"{filename}_research_data.csv", "text/csv",
+                lambda target: st.session_state.data_processor.write_csv(
+                    target, export_filter, selected_columns, min_email_score
                 )
+            )
     
     else:
         st.warning("No data available for export after applying filters.")
@@ -510,13 +489,19 @@ st.subheader("🗄️ Data Management")
 col1, col2 = st.columns(2)
 
 with col1:
-    if st.button("🗑️ Clear All Data", type="secondary"):
-        if st.button("⚠️ Confirm Clear All Data"):
-            st.session_state.data_processor.clear_data()
-            st.success("All data cleared!")
-            st.rerun()
+    # The lead database is shared by every session and background job
+    confirm_clear = st.checkbox(
+        "Delete all leads for every user",
+        key="confirm_clear_export",
+        help="Clearing removes every stored lead, not just the ones from this session"
+    )
+    if st.button("🗑️ Clear All Data", type="secondary", disabled=not confirm_clear):
+        st.session_state.data_processor.clear_data()
+        del st.session_state['confirm_clear_export']
+        st.rerun()
 
 with col2:
-    if not st.session_state.leads_data.empty:
-        st.write(f"**Current data size:** {len(st.session_state.leads_data)} leads")
-        st.write(f"**Memory usage:** {st.session_state.leads_data.memory_usage(deep=True).sum() / 1024:.1f} KB")
+    lead_count = st.session_state.data_processor.count_leads()
+    if lead_count > 0:
+        st.write(f"**Current data size:** {lead_count} leads")
+        st.write(f"**Database size:** {st.session_state.data_processor.store.size_on_disk() / 1024:.1f} KB")
@@ -1,14 +1,15 @@
 import streamlit as st
-import pandas as pd
+import tempfile
 from utils.data_processor import DataProcessor
 
 # Initialize session state
-if 'leads_data' not in st.session_state:
-    st.session_state.leads_data = pd.DataFrame()
-
 if 'data_processor' not in st.session_state:
     st.session_state.data_processor = DataProcessor()
 
+# Make leads buffered by earlier runs visible to this page
+st.session_state.data_processor.flush()
+stats = st.session_state.data_processor.get_stats()
+
 # Page configuration
 st.set_page_config(
     page_title="B2B Lead Generation Platform",
@@ -489,13 +490,10 @@ with col1:
         <h3 class="gradient-text">Total Leads</h3>
         <div style="font-size: 2.5rem; font-weight: 700; color: #2d3748;">{}</div>
     </div>
-    """.format(len(st.session_state.leads_data)), unsafe_allow_html=True)
+    """.format(stats['total_leads']), unsafe_allow_html=True)
 
 with col2:
-    if not st.session_state.leads_data.empty and 'email_score' in st.session_state.leads_data.columns:
-        high_quality = len(st.session_state.leads_data[st.session_state.leads_data['email_score'] >= 80])
-    else:
-        high_quality = 0
+    high_quality = stats['high_quality_emails']
     
     st.markdown("""
     <div class="metric-card">
@@ -506,10 +504,7 @@ with col2:
     """.format(high_quality), unsafe_allow_html=True)
 
 with col3:
-    if not st.session_state.leads_data.empty and 'company_name' in st.session_state.leads_data.columns:
-        unique_companies = st.session_state.leads_data['company_name'].nunique()
-    else:
-        unique_companies = 0
+    unique_companies = stats['unique_companies']
     
     st.markdown("""
     <div class="metric-card">
@@ -520,13 +515,7 @@ with col3:
     """.format(unique_companies), unsafe_allow_html=True)
 
 with col4:
-    if not st.session_state.leads_data.empty and 'funding_status' in st.session_state.leads_data.columns:
-        funded_companies = len(st.session_state.leads_data[
-            st.session_state.leads_data['funding_status'].notna() & 
-            (st.session_state.leads_data['funding_status'] != 'Unknown')
-        ])
-    else:
-        funded_companies = 0
+    funded_companies = stats['funded_companies']
     
     st.markdown("""
     <div class="metric-card">
@@ -594,7 +583,7 @@ with col2:
     """, unsafe_allow_html=True)
 
 # Current Data Preview with glass panel effect
-if not st.session_state.leads_data.empty:
+if stats['total_leads'] > 0:
     st.markdown("""
     <div class="glass-panel">
         <h2 class="gradient-text" style="text-align: center; margin-bottom: 1.5rem;">Current Leads Database</h2>
@@ -602,32 +591,52 @@ if not st.session_state.leads_data.empty:
     """, unsafe_allow_html=True)
     
     st.markdown('<div class="data-table">', unsafe_allow_html=True)
-    st.dataframe(st.session_state.leads_data, use_container_width=True)
+    # Only the first rows are read from the database for display
+    preview_limit = st.session_state.data_processor.preview_limit
+    sort_by_score = st.session_state.get('sort_by_score', False)
+    st.dataframe(
+        st.session_state.data_processor.get_leads(
+            order_by='email_score' if sort_by_score else None,
+            descending=sort_by_score,
+            limit=preview_limit
+        ),
+        use_container_width=True
+    )
+    if stats['total_leads'] > preview_limit:
+        st.caption(f"Showing the first {preview_limit} of {stats['total_leads']} leads")
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Quick actions with enhanced buttons
     col1, col2, col3 = st.columns(3)
     with col1:
-        if st.button("🗑️ Clear All Data", type="secondary"):
-            st.session_state.leads_data = pd.DataFrame()
+        # The lead database is shared by every session and background job
+        confirm_clear = st.checkbox(
+            "Delete all leads for every user",
+            key="confirm_clear",
+            help="Clearing removes every stored lead, not just the ones from this session"
+        )
+        if st.button("🗑️ Clear All Data", type="secondary", disabled=not confirm_clear):
+            st.session_state.data_processor.clear_data()
+            del st.session_state['confirm_clear']
             st.rerun()
     
     with col2:
         if st.button("📈 Sort by Score", type="secondary"):
-            if 'email_score' in st.session_state.leads_data.columns:
-                st.session_state.leads_data = st.session_state.leads_data.sort_values(
-                    'email_score', ascending=False
-                )
-                st.rerun()
+            st.session_state.sort_by_score = True
+            st.rerun()
     
     with col3:
-        csv_data = st.session_state.leads_data.to_csv(index=False)
-        st.download_button(
-            label="📊 Download CSV",
-            data=csv_data,
-            file_name="leads_data.csv",
-            mime="text/csv"
-        )
+        # The file is only built when asked for, streamed from the database to disk
+        if st.button("📊 Prepare CSV", type="secondary"):
+            with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as target:
+                st.session_state.data_processor.write_csv(target)
+                target.seek(0)
+                st.download_button(
+                    label="📊 Download CSV",
+                    data=target.read(),
+                    file_name="leads_data.csv",
+                    mime="text/csv"
+                )
 else:
     st.markdown("""
     <div class="glass-panel" style="text-align: center;">
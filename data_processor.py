@@ -1,97 +1,328 @@
+import io
+import os
 import pandas as pd
-import streamlit as st
-from typing import Dict, List, Any
+from pathlib import Path
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, List, Any, Iterator, Optional, TextIO, Tuple, Union
+from utils.lead_store import LeadStore, LEAD_COLUMNS, get_lead_store
+from utils.email_scoring import rate_emails
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+ENRICHMENT_FIELDS = ['company_size', 'funding_status', 'linkedin_url', 'industry', 'location']
+
+# Columns tried, in order, when an import file doesn't name its domain column
+DOMAIN_COLUMNS = ['domain', 'website', 'url', 'homepage', 'site']
+
+# Server-side import files are only read from here; override with LEAD_IMPORT_DIR
+IMPORT_DIR = os.environ.get('LEAD_IMPORT_DIR', 'data/imports')
+
+_VALID_DOMAIN = r'(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9-]{2,63}'
+
+def normalize_domains(values: pd.Series) -> pd.Series:
+    """Reduce raw domains or URLs to bare lowercase ASCII host names, NA where invalid"""
+    return _to_ascii_domains(_clean_hosts(values))
+
+def resolve_import_path(name: str, import_dir: Union[str, Path, None] = None) -> Path:
+    """Resolve a file name given by a user to a file inside the import directory, or raise ValueError"""
+    base = Path(import_dir or IMPORT_DIR).resolve()
+    path = (base / name).resolve()
+    if not path.is_relative_to(base):
+        raise ValueError(f"Import files must be inside {base}")
+    if not path.is_file():
+        raise ValueError(f"No import file named {name} in {base}")
+    return path
+
+def company_names_from_domains(domains: pd.Series) -> pd.Series:
+    """Derive company names from domains, e.g. my-shop.com -> My Shop"""
+    names = domains.str.replace('www.', '', regex=False).str.split('.').str[0]
+    return names.str.replace(r'[-_]', ' ', regex=True).str.title()
+
+def _clean_hosts(values: pd.Series) -> pd.Series:
+    """Strip schemes, credentials, ports, paths and www. from each value, keeping Unicode hosts"""
+    return (
+        values.astype('string').str.strip().str.lower()
+        .str.replace(r'^[a-z][a-z0-9+.-]*://', '', regex=True)
+        .str.replace(r'^[^/@]*@', '', regex=True)
+        .str.replace(r'[/?#:\s].*$', '', regex=True)
+        .str.replace(r'^www\.', '', regex=True)
+        .str.strip('.')
+    )
+
+def _to_ascii_domains(hosts: pd.Series) -> pd.Series:
+    """IDNA-encode internationalized hosts and blank out anything that isn't a domain"""
+    hosts = hosts.copy()
+    unicode_hosts = hosts.str.contains(r'[^\x00-\x7f]', regex=True, na=False)
+    if unicode_hosts.any():
+        hosts[unicode_hosts] = hosts[unicode_hosts].map(_idna)
+    return hosts.where(hosts.str.fullmatch(_VALID_DOMAIN, na=False))
+
+def _idna(host: str) -> Optional[str]:
+    try:
+        return host.encode('idna').decode('ascii')
+    except UnicodeError:
+        return None
+
+def _domain_column(columns: List[str], column: Optional[str]) -> str:
+    """Find the domain column of an import file, case-insensitively"""
+    by_name = {str(name).strip().lower(): name for name in columns}
+    for candidate in ([column] if column else DOMAIN_COLUMNS):
+        if candidate.strip().lower() in by_name:
+            return by_name[candidate.strip().lower()]
+    if column:
+        raise ValueError(f"Column '{column}' not found; available columns: {', '.join(map(str, columns))}")
+    return columns[0]
+
+def read_domain_chunks(source: Union[str, Path, BinaryIO], file_type: Optional[str] = None,
+                       column: Optional[str] = None, chunksize: int = 50000) -> Iterator[pd.Series]:
+    """Stream the domain column of a CSV, TSV, Parquet or one-per-line text file in chunks"""
+    if file_type is None:
+        file_type = Path(getattr(source, 'name', str(source))).suffix.lstrip('.') or 'txt'
+    file_type = file_type.lower()
+
+    if file_type == 'parquet':
+        if pq is None:
+            raise ImportError("Parquet import requires the pyarrow package")
+        parquet = pq.ParquetFile(source)
+        name = _domain_column(parquet.schema_arrow.names, column)
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=[name]):
+            yield batch.column(0).to_pandas()
+
+    elif file_type in ('csv', 'tsv'):
+        name = None
+        for chunk in pd.read_csv(source, dtype=str, chunksize=chunksize, sep='\t' if file_type == 'tsv' else ','):
+            name = name or _domain_column(list(chunk.columns), column)
+            yield chunk[name]
+
+    else:
+        # One domain per line; anything after the first tab or comma is ignored
+        for chunk in pd.read_csv(source, header=None, usecols=[0], names=['domain'], dtype=str,
+                                 chunksize=chunksize, sep='\t', comment='#', quoting=3):
+            yield chunk['domain'].str.split(',', n=1).str[0]
 
 class DataProcessor:
     """Handles data processing and storage for the lead generation platform"""
-    
-    def __init__(self):
-        self.leads_columns = [
-            'company_name', 'domain', 'tech_stack', 'email', 'email_score', 
-            'email_type', 'company_size', 'funding_status', 'linkedin_url',
-            'industry', 'location', 'source'
-        ]
-    
+
+    # Named filters the pages use to query slices of the lead store
+    filters = {
+        'all': '',
+        'with_tech_stack': "tech_stack IS NOT NULL AND tech_stack != ''",
+        'with_email': "email IS NOT NULL AND email != ''",
+        'without_email': "email IS NULL OR email = ''",
+        'exportable_email': "email IS NOT NULL AND email != '' AND email != 'Not found'",
+        'needs_enrichment': ' OR '.join(
+            f"{field} IS NULL OR {field} = '' OR {field} = 'Unknown'" for field in ENRICHMENT_FIELDS
+        ),
+    }
+
+    def __init__(self, compact_threshold: int = 1000, store: Optional[LeadStore] = None,
+                 preview_limit: int = 1000):
+        self.leads_columns = list(LEAD_COLUMNS)
+
+        # Leads live on disk; pages only read the slices they display
+        self.store = store or get_lead_store()
+        self.preview_limit = preview_limit
+
+        # New leads are buffered by domain and written to the store in chunks
+        self.compact_threshold = compact_threshold
+        self._pending = {}
+
     def add_tech_stack_data(self, data: List[Dict[str, Any]]):
         """Add tech stack data to the leads database"""
         if not data:
             return
-        
-        df = pd.DataFrame(data)
-        df['source'] = 'Tech Stack Finder'
-        
-        # Ensure all required columns exist
-        for col in self.leads_columns:
-            if col not in df.columns:
-                df[col] = None
-        
-        # Reorder columns
-        df = df[self.leads_columns]
-        
-        # Add to session state
-        if st.session_state.leads_data.empty:
-            st.session_state.leads_data = df
-        else:
-            st.session_state.leads_data = pd.concat([st.session_state.leads_data, df], ignore_index=True)
-        
-        # Remove duplicates based on domain
-        st.session_state.leads_data = st.session_state.leads_data.drop_duplicates(
-            subset=['domain'], keep='last'
-        ).reset_index(drop=True)
-    
+
+        # Keep the last row for each domain, with every lead column present
+        for item in data:
+            row = {col: item.get(col) for col in self.leads_columns}
+            row['source'] = 'Tech Stack Finder'
+            if row['domain']:
+                self._pending[row['domain']] = row
+
+        if len(self._pending) >= self.compact_threshold:
+            self.flush()
+
+    def flush(self):
+        """Write buffered leads to the store in a single batch"""
+        if not self._pending:
+            return
+
+        self.store.upsert(self._pending.values())
+        self._pending = {}
+
+    def import_domains(self, source: Union[str, Path, BinaryIO], file_type: Optional[str] = None,
+                       column: Optional[str] = None, chunksize: int = 50000,
+                       source_label: str = 'Bulk Import',
+                       on_chunk: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+        """Import a domain list chunk by chunk, skipping invalid domains and ones already stored"""
+        self.flush()
+
+        totals = {'rows': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0}
+        for raw in read_domain_chunks(source, file_type, column, chunksize):
+            hosts = _clean_hosts(raw)
+            domains = _to_ascii_domains(hosts)
+            valid = domains.notna()
+
+            # Names come from the Unicode form so internationalized domains read naturally
+            chunk = pd.DataFrame({
+                'domain': domains[valid],
+                'company_name': company_names_from_domains(hosts[valid])
+            }).drop_duplicates('domain')
+
+            existing = self.store.existing_domains(chunk['domain'])
+            new = chunk[~chunk['domain'].isin(existing)].assign(source=source_label)
+            self.store.upsert(new.to_dict('records'))
+
+            totals['rows'] += len(raw)
+            totals['invalid'] += int((~valid).sum())
+            totals['duplicates'] += int(valid.sum()) - len(new)
+            totals['imported'] += len(new)
+            if on_chunk:
+                on_chunk(dict(totals))
+
+        return totals
+
     def add_email_data(self, domain: str, email_data: Dict[str, Any]):
         """Add email data to existing leads"""
-        if st.session_state.leads_data.empty:
-            return False
-        
-        # Find the lead by domain
-        mask = st.session_state.leads_data['domain'] == domain
-        if not mask.any():
-            return False
-        
-        # Update email information
-        for key, value in email_data.items():
-            if key in self.leads_columns:
-                st.session_state.leads_data.loc[mask, key] = value
-        
-        return True
-    
+        updated = self.bulk_update({domain: email_data}) > 0
+        if updated and 'candidates' in email_data:
+            self.save_email_candidates(domain, email_data['candidates'])
+        return updated
+
+    def save_email_candidates(self, domain: str, candidates: List[Dict[str, Any]]):
+        """Keep every email found for a domain so its best email can be re-picked later"""
+        self.flush()
+        self.store.replace_candidates({domain: candidates})
+
     def add_enrichment_data(self, domain: str, enrichment_data: Dict[str, Any]):
         """Add enrichment data to existing leads"""
-        if st.session_state.leads_data.empty:
-            return False
-        
-        # Find the lead by domain
-        mask = st.session_state.leads_data['domain'] == domain
-        if not mask.any():
-            return False
-        
-        # Update enrichment information
-        for key, value in enrichment_data.items():
-            if key in self.leads_columns:
-                st.session_state.leads_data.loc[mask, key] = value
-        
-        return True
-    
+        return self.bulk_update({domain: enrichment_data}) > 0
+
+    def bulk_update(self, domain_to_fields: Dict[str, Dict[str, Any]]) -> int:
+        """Apply a batch of per-domain field updates in one store transaction"""
+        self.flush()
+
+        updates = {
+            domain: {key: value for key, value in fields.items() if key in self.leads_columns}
+            for domain, fields in domain_to_fields.items()
+        }
+        return self.store.update(updates)
+
+    def rescore_emails(self, email_types: Optional[Dict[str, int]] = None, chunksize: int = 100000) -> int:
+        """Re-score and re-classify every stored email, e.g. after the scoring weights change"""
+        updated = 0
+        columns = ['domain', 'email', 'email_score', 'email_type']
+        for chunk in self.iter_leads('exportable_email', columns, chunksize=chunksize):
+            ratings = rate_emails(chunk['email'], email_types)
+
+            # Only rows whose score or type actually moves are written back
+            changed = (
+                (chunk['email_score'].to_numpy() != ratings['score'].to_numpy()) |
+                (chunk['email_type'].to_numpy() != ratings['email_type'].to_numpy())
+            )
+            if changed.any():
+                updated += self.store.update_columns(chunk['domain'].to_numpy()[changed].tolist(), {
+                    'email_score': ratings['score'].to_numpy()[changed].tolist(),
+                    'email_type': ratings['email_type'].to_numpy()[changed].tolist()
+                })
+
+        return updated
+
+    def rerank_emails(self, email_types: Optional[Dict[str, int]] = None, chunksize: int = 10000) -> int:
+        """Re-pick and re-score every lead's email from its stored candidates, without network access"""
+        self.flush()
+
+        updated = 0
+        for candidates in self.store.iter_candidates(chunksize):
+            ratings = rate_emails(candidates['email'], email_types)
+            ranked = candidates.assign(
+                score=ratings['score'].to_numpy(),
+                email_type=ratings['email_type'].to_numpy(),
+                mx_valid=candidates['mx_valid'].astype(bool)
+            )
+
+            # Same order as the extractor: MX validity, then score, then alphabetical
+            best = ranked.sort_values(
+                ['domain', 'mx_valid', 'score', 'email'], ascending=[True, False, False, True]
+            ).drop_duplicates('domain')
+
+            updated += self.store.update_columns(best['domain'].tolist(), {
+                'email': best['email'].tolist(),
+                'email_score': best['score'].astype(int).tolist(),
+                'email_type': best['email_type'].tolist()
+            })
+
+        # Leads scraped before candidates were kept still get their single email re-scored
+        return updated + self.rescore_emails(email_types)
+
+    def get_leads(self, filter_name: str = 'all', columns: Optional[List[str]] = None,
+                  order_by: Optional[str] = None, descending: bool = False,
+                  limit: Optional[int] = None, min_email_score: Optional[int] = None) -> pd.DataFrame:
+        """Read a slice of leads matching one of the named filters"""
+        self.flush()
+
+        where, params = self._where(filter_name, min_email_score)
+        return self.store.query(where, params, columns, order_by, descending, limit)
+
+    def iter_leads(self, filter_name: str = 'all', columns: Optional[List[str]] = None,
+                   min_email_score: Optional[int] = None, chunksize: int = 10000) -> Iterator[pd.DataFrame]:
+        """Stream leads matching a named filter in DataFrame chunks"""
+        self.flush()
+
+        where, params = self._where(filter_name, min_email_score)
+        return self.store.iter_chunks(where, params, columns, chunksize)
+
+    def count_leads(self, filter_name: str = 'all', min_email_score: Optional[int] = None) -> int:
+        """Count leads matching one of the named filters"""
+        self.flush()
+
+        where, params = self._where(filter_name, min_email_score)
+        return self.store.count(where, params)
+
+    def count_known(self, column: str, unknown_values: Tuple[str, ...] = ('Unknown',)) -> int:
+        """Count leads whose column holds a real value"""
+        if column not in self.leads_columns:
+            return 0
+
+        self.flush()
+        placeholders = ', '.join('?' for _ in unknown_values)
+        return self.store.count(f"{column} IS NOT NULL AND {column} NOT IN ({placeholders})", unknown_values)
+
+    def value_counts(self, column: str, filter_name: str = 'all', limit: Optional[int] = None) -> Dict[Any, int]:
+        """Count leads per value of a column"""
+        self.flush()
+
+        where, params = self._where(filter_name, None)
+        return self.store.value_counts(column, where, params, limit)
+
     def get_leads_by_criteria(self, criteria: Dict[str, Any]) -> pd.DataFrame:
         """Filter leads based on criteria"""
-        if st.session_state.leads_data.empty:
-            return pd.DataFrame()
-        
-        df = st.session_state.leads_data.copy()
-        
+        self.flush()
+
+        conditions, params = [], []
         for key, value in criteria.items():
-            if key in df.columns and value is not None:
+            if key in self.leads_columns and value is not None:
                 if isinstance(value, str):
-                    df = df[df[key].str.contains(value, case=False, na=False)]
+                    conditions.append(f'{key} LIKE ?')
+                    params.append(f'%{value}%')
+                elif isinstance(value, (list, tuple, set)):
+                    conditions.append(f"{key} IN ({', '.join('?' for _ in value)})")
+                    params.extend(value)
                 else:
-                    df = df[df[key] == value]
-        
-        return df
-    
+                    conditions.append(f'{key} = ?')
+                    params.append(value)
+
+        return self.store.query(' AND '.join(conditions), params)
+
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the current leads data"""
-        if st.session_state.leads_data.empty:
+        self.flush()
+
+        total_leads = self.store.count()
+        if total_leads == 0:
             return {
                 'total_leads': 0,
                 'high_quality_emails': 0,
@@ -100,30 +331,110 @@ class DataProcessor:
                 'top_technologies': [],
                 'top_industries': []
             }
-        
-        df = st.session_state.leads_data
-        
+
         stats = {
-            'total_leads': len(df),
-            'high_quality_emails': len(df[df['email_score'] >= 80]) if 'email_score' in df.columns else 0,
-            'unique_companies': df['company_name'].nunique() if 'company_name' in df.columns else 0,
-            'funded_companies': len(df[
-                df['funding_status'].notna() & 
-                (df['funding_status'] != 'Unknown')
-            ]) if 'funding_status' in df.columns else 0,
-            'top_technologies': df['tech_stack'].value_counts().head(5).to_dict() if 'tech_stack' in df.columns else {},
-            'top_industries': df['industry'].value_counts().head(5).to_dict() if 'industry' in df.columns else {}
+            'total_leads': total_leads,
+            'high_quality_emails': self.store.count('email_score >= 80'),
+            'unique_companies': self.store.count_distinct('company_name'),
+            'funded_companies': self.count_known('funding_status'),
+            'top_technologies': self.store.value_counts('tech_stack', limit=5),
+            'top_industries': self.store.value_counts('industry', limit=5)
         }
-        
+
         return stats
-    
-    def export_to_csv(self) -> str:
-        """Export leads data to CSV format"""
-        if st.session_state.leads_data.empty:
-            return ""
-        
-        return st.session_state.leads_data.to_csv(index=False)
-    
+
+    def export_summary(self, filter_name: str = 'all', min_email_score: Optional[int] = None) -> Dict[str, Any]:
+        """Count what an export would contain without reading its rows"""
+        self.flush()
+
+        where, params = self._where(filter_name, min_email_score)
+
+        def count(condition: str = '') -> int:
+            return self.store.count(' AND '.join(f'({part})' for part in (where, condition) if part), params)
+
+        return {
+            'total': count(),
+            'with_email': count(self.filters['exportable_email']),
+            'high_quality': count('email_score >= 80'),
+            'with_company_size': count("company_size IS NOT NULL AND company_size != 'Unknown'"),
+            'top_industries': self.store.value_counts('industry', where, params, limit=5),
+        }
+
+    def write_csv(self, target: TextIO, filter_name: str = 'all', columns: Optional[List[str]] = None,
+                  min_email_score: Optional[int] = None, chunksize: int = 10000) -> int:
+        """Stream leads into a text file as CSV one chunk at a time, returning the number of rows"""
+        columns = [col for col in (columns or self.leads_columns) if col in self.leads_columns]
+        target.write(','.join(columns) + '\n')
+
+        rows = 0
+        for chunk in self.iter_leads(filter_name, columns, min_email_score, chunksize):
+            chunk.to_csv(target, index=False, header=False)
+            rows += len(chunk)
+        return rows
+
+    def write_json(self, target: TextIO, filter_name: str = 'all', columns: Optional[List[str]] = None,
+                   min_email_score: Optional[int] = None, chunksize: int = 10000) -> int:
+        """Stream leads into a text file as a JSON array of records, returning the number of rows"""
+        target.write('[')
+        rows = 0
+        for chunk in self.iter_leads(filter_name, columns, min_email_score, chunksize):
+            target.write((',' if rows else '') + chunk.to_json(orient='records')[1:-1])
+            rows += len(chunk)
+        target.write(']')
+        return rows
+
+    def write_excel(self, target: Union[str, BinaryIO], filter_name: str = 'all', columns: Optional[List[str]] = None,
+                    min_email_score: Optional[int] = None, chunksize: int = 10000) -> int:
+        """Stream leads into an Excel workbook with a summary sheet, returning the number of rows"""
+        from openpyxl import Workbook
+
+        columns = [col for col in (columns or self.leads_columns) if col in self.leads_columns]
+
+        # A write-only workbook flushes rows to disk instead of keeping every cell
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Leads')
+        sheet.append(columns)
+
+        rows = 0
+        for chunk in self.iter_leads(filter_name, columns, min_email_score, chunksize):
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+                sheet.append(list(row))
+            rows += len(chunk)
+
+        summary = self.export_summary(filter_name, min_email_score)
+        summary_sheet = workbook.create_sheet('Summary')
+        for row in (
+            ['Metric', 'Value'],
+            ['Total Leads', rows],
+            ['Export Date', datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+            ['Columns Exported', len(columns)],
+            ['High Quality Emails', summary['high_quality'] if 'email_score' in columns else 'N/A'],
+        ):
+            summary_sheet.append(row)
+
+        workbook.save(target)
+        return rows
+
+    def export_to_csv(self, filter_name: str = 'all', columns: Optional[List[str]] = None,
+                      min_email_score: Optional[int] = None) -> str:
+        """Export leads data to CSV format; use write_csv for large exports"""
+        buffer = io.StringIO()
+        self.write_csv(buffer, filter_name, columns, min_email_score)
+        return buffer.getvalue()
+
     def clear_data(self):
-        """Clear all leads data"""
-        st.session_state.leads_data = pd.DataFrame()
+        """Delete every stored lead, including those shared with other sessions and jobs"""
+        self._pending = {}
+        self.store.clear()
+
+    def _where(self, filter_name: str, min_email_score: Optional[int]) -> Tuple[str, list]:
+        """Build the SQL condition for a named filter"""
+        conditions, params = [], []
+
+        if self.filters.get(filter_name):
+            conditions.append(f'({self.filters[filter_name]})')
+        if min_email_score:
+            conditions.append('email_score >= ?')
+            params.append(min_email_score)
+
+        return ' AND '.join(conditions), params
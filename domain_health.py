@@ -0,0 +1,177 @@
+import os
+import socket
+import sqlite3
+import ssl
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from utils.page_cache import normalize_url
+
+# How long each kind of failure keeps a host (or, for not_found, a path) off limits
+FAILURE_TTL = {
+    'dns': 24 * 3600,
+    'dns_retry': 5 * 60,
+    'tls': 24 * 3600,
+    'refused': 3600,
+    'timeout': 15 * 60,
+    'not_found': 7 * 24 * 3600,
+}
+
+# Failures that say more about our network than the host; kept in memory only
+TRANSIENT_FAILURES = {'dns_retry'}
+
+# Resolver answers that a name does not exist, as requests, urllib3 and httpx pass them through
+_NXDOMAIN_HINTS = ('name or service not known', 'nodename nor servname', 'no address associated')
+
+# Resolver answers that only say it could not answer right now
+_DNS_RETRY_HINTS = ('temporary failure in name resolution', 'getaddrinfo failed', 'failed to resolve')
+
+# EAI_NONAME and EAI_NODATA, plus Windows' WSAHOST_NOT_FOUND
+_NXDOMAIN_ERRNOS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME), 11001}
+
+def classify_failure(error: BaseException) -> Optional[str]:
+    """Name the network failure behind an exception, or None when it says nothing about the host"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        name = type(error).__name__.lower()
+        message = str(error).lower()
+
+        # A slow response is a problem of the page, not a dead host
+        if name in ('readtimeout', 'writetimeout', 'pooltimeout'):
+            return None
+
+        # Only a definite "no such name" is worth remembering for a day; EAI_AGAIN is an outage
+        if isinstance(error, socket.gaierror):
+            return 'dns' if error.errno in _NXDOMAIN_ERRNOS else 'dns_retry'
+        if any(hint in message for hint in _NXDOMAIN_HINTS):
+            return 'dns'
+        if any(hint in message for hint in _DNS_RETRY_HINTS):
+            return 'dns_retry'
+
+        if isinstance(error, ssl.SSLError) or 'ssl' in name or '[ssl' in message or 'certificate verify' in message:
+            return 'tls'
+        if isinstance(error, ConnectionRefusedError) or 'connection refused' in message:
+            return 'refused'
+        if isinstance(error, TimeoutError) or 'timeout' in name or 'timed out' in message:
+            return 'timeout'
+
+        # requests and httpx wrap the socket error rather than raising it
+        error = error.__cause__ or error.__context__
+    return None
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+class DomainHealth:
+    """Negative cache of unreachable hosts and missing pages, shared by every fetch
+
+    A host that does not resolve, refuses connections, fails its TLS
+    handshake or times out while connecting is skipped until its failure
+    expires. A path that answers 404 or 410 misses_to_block times in a row
+    is skipped the same way. Both survive restarts in a SQLite file, except
+    resolver hiccups, which are only held off briefly in memory.
+    """
+
+    def __init__(self, path: str = 'data/domain_health.db', ttl: Optional[Dict[str, float]] = None,
+                 misses_to_block: int = 2):
+        self.ttl = dict(FAILURE_TTL)
+        self.ttl.update(ttl or {})
+        self.misses_to_block = misses_to_block
+
+        # host -> (reason, failed_at) and url -> (misses, last_missed_at)
+        self._hosts: Dict[str, Tuple[str, float]] = {}
+        self._paths: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute('CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, reason TEXT, failed_at REAL)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS paths (url TEXT PRIMARY KEY, misses INTEGER, missed_at REAL)')
+        self._db.commit()
+
+        # Failures from earlier runs that have not expired yet
+        now = time.time()
+        for host, reason, failed_at in self._db.execute('SELECT host, reason, failed_at FROM hosts'):
+            if now - failed_at < self.ttl.get(reason, 0):
+                self._hosts[host] = (reason, failed_at)
+        for url, misses, missed_at in self._db.execute('SELECT url, misses, missed_at FROM paths'):
+            if now - missed_at < self.ttl['not_found']:
+                self._paths[url] = (misses, missed_at)
+
+    def blocked(self, url: str) -> Optional[str]:
+        """Why a URL should not be fetched right now, or None when it may be"""
+        now = time.time()
+        with self._lock:
+            entry = self._hosts.get(_host(url))
+            if entry and now - entry[1] < self.ttl.get(entry[0], 0):
+                return entry[0]
+
+            entry = self._paths.get(normalize_url(url))
+            if entry and entry[0] >= self.misses_to_block and now - entry[1] < self.ttl['not_found']:
+                return 'not_found'
+
+        return None
+
+    def record_failure(self, url: str, error: BaseException) -> Optional[str]:
+        """Remember a host as unreachable if the error shows it is, returning the reason"""
+        reason = classify_failure(error)
+        host = _host(url)
+        if reason and host:
+            now = time.time()
+            with self._lock:
+                self._hosts[host] = (reason, now)
+                if reason in TRANSIENT_FAILURES:
+                    return reason
+                self._db.execute(
+                    'INSERT OR REPLACE INTO hosts (host, reason, failed_at) VALUES (?, ?, ?)', (host, reason, now)
+                )
+                self._db.commit()
+        return reason
+
+    def record_response(self, url: str, status: int):
+        """Count a missing page, or forget earlier failures once a URL answers"""
+        key = normalize_url(url)
+        host = _host(url)
+        now = time.time()
+
+        with self._lock:
+            if status in (404, 410):
+                misses, missed_at = self._paths.get(key, (0, now))
+                if now - missed_at >= self.ttl['not_found']:
+                    misses = 0
+                self._paths[key] = (misses + 1, now)
+                self._db.execute(
+                    'INSERT OR REPLACE INTO paths (url, misses, missed_at) VALUES (?, ?, ?)', (key, misses + 1, now)
+                )
+                self._db.commit()
+
+            elif status < 400 and (key in self._paths or host in self._hosts):
+                self._paths.pop(key, None)
+                self._hosts.pop(host, None)
+                self._db.execute('DELETE FROM paths WHERE url = ?', (key,))
+                self._db.execute('DELETE FROM hosts WHERE host = ?', (host,))
+                self._db.commit()
+
+    def clear(self):
+        """Forget every failure"""
+        with self._lock:
+            self._hosts.clear()
+            self._paths.clear()
+            self._db.execute('DELETE FROM hosts')
+            self._db.execute('DELETE FROM paths')
+            self._db.commit()
+
+_default_health = None
+_default_health_lock = threading.Lock()
+
+def get_domain_health() -> DomainHealth:
+    """Get the process-wide domain health cache"""
+    global _default_health
+    with _default_health_lock:
+        if _default_health is None:
+            _default_health = DomainHealth()
+        return _default_health
@@ -1,47 +1,64 @@
-import re
+import logging
 import requests
-import dns.resolver
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Tuple
-import time
-import streamlit as st
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
 from email_validator import validate_email, EmailNotValidError
-import trafilatura
+from utils.page_cache import PageCache, get_page_cache
+from utils.http_fetcher import HttpFetcher, get_http_fetcher
+from utils.mx_resolver import MXResolver, get_mx_resolver
+from utils.email_scanner import EmailScanner
+from utils.email_scoring import EMAIL_TYPES, classify_emails, rate_emails, score_emails
+from utils.page_discovery import PageDiscovery, get_page_discovery
+from utils.timeouts import TimeBudget
+
+# Extraction runs on background job workers, which have no page to report to
+logger = logging.getLogger(__name__)
 
 class EmailExtractor:
     """Extract and score professional emails from websites"""
     
-    def __init__(self):
+    def __init__(self, page_cache: Optional[PageCache] = None, fetcher: Optional[HttpFetcher] = None,
+                 mx_resolver: Optional[MXResolver] = None, email_scanner: Optional[EmailScanner] = None,
+                 page_discovery: Optional[PageDiscovery] = None, time_budget: float = 30.0):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
-        # Email scoring weights
-        self.email_types = {
-            'ceo': 100,
-            'founder': 95,
-            'president': 90,
-            'director': 85,
-            'manager': 80,
-            'head': 85,
-            'chief': 90,
-            'vp': 85,
-            'vice': 85,
-            'sales': 75,
-            'business': 70,
-            'marketing': 70,
-            'contact': 60,
-            'hello': 55,
-            'hi': 55,
-            'info': 30,
-            'support': 25,
-            'noreply': 10,
-            'no-reply': 10
-        }
+        # Pages already downloaded by any service class are read from here
+        self.page_cache = page_cache or get_page_cache()
+        
+        # Shared keep-alive connection pool; it also caps concurrent requests per host
+        self.fetcher = fetcher or get_http_fetcher()
+        
+        # MX lookups are cached per domain across every email and session
+        self.mx_resolver = mx_resolver or get_mx_resolver()
+        
+        # Compiled once; also decodes common address obfuscations
+        self.email_scanner = email_scanner or EmailScanner()
+        
+        # Contact, about and team pages found once per domain and shared with enrichment
+        self.page_discovery = page_discovery or get_page_discovery()
+        
+        # Seconds of requests one domain may take before its partial result is returned
+        self.time_budget = time_budget
+        
+        # Email scoring weights, applied to whole columns at once
+        self.email_types = dict(EMAIL_TYPES)
     
     def extract_emails_from_domain(self, domain: str) -> Dict[str, Any]:
         """Extract emails from a domain and return the best one with score"""
+        # Once the budget is spent no more pages are requested and what was found is scored
+        with TimeBudget(self.time_budget) as budget:
+            result = self._extract_from_domain(domain)
+        
+        if budget.expired:
+            result['timed_out'] = True
+        return result
+    
+    def _extract_from_domain(self, domain: str) -> Dict[str, Any]:
+        """Find, validate and score every email of a domain"""
         try:
             # Get emails from multiple sources
             emails = []
@@ -58,29 +75,44 @@ class EmailExtractor:
             social_emails = self._check_social_and_about_pages(domain)
             emails.extend(social_emails)
             
+            # Remember where each email was first seen
+            sources = {}
+            for source, found in (('website', website_emails), ('pattern', pattern_emails), ('page', social_emails)):
+                for email in found:
+                    sources.setdefault(email, source)
+            
             if not emails:
                 return {
                     'email': None,
                     'email_score': 0,
                     'email_type': 'not_found',
                     'validation_status': 'not_found',
-                    'mx_valid': False
+                    'mx_valid': False,
+                    'candidates': []
                 }
             
+            # Remove duplicates and bad formats, then resolve each domain once
+            valid_emails = [email for email in set(emails) if self._is_valid_email_format(email)]
+            mx_results = self.mx_resolver.resolve_mx_many(email.split('@')[1] for email in valid_emails)
+            
             # Score and validate emails
+            ratings = rate_emails(pd.Series(valid_emails, dtype=object), self.email_types)
             scored_emails = []
-            for email in set(emails):  # Remove duplicates
-                if self._is_valid_email_format(email):
-                    score = self._score_email(email)
-                    mx_valid = self._check_mx_record(email)
-                    email_type = self._classify_email_type(email)
-                    
-                    scored_emails.append({
-                        'email': email,
-                        'score': score,
-                        'mx_valid': mx_valid,
-                        'email_type': email_type
-                    })
+            for email, score, email_type in zip(valid_emails, ratings['score'], ratings['email_type']):
+                mx_valid = mx_results.get(email.split('@')[1].lower(), False)
+                
+                scored_emails.append({
+                    'email': email,
+                    'score': int(score),
+                    'mx_valid': mx_valid,
+                    'email_type': email_type
+                })
+            
+            # Every candidate is kept with its features so it can be re-ranked offline
+            candidates = [
+                {'email': email['email'], 'source': sources.get(email['email']), 'mx_valid': email['mx_valid']}
+                for email in scored_emails
+            ]
             
             if not scored_emails:
                 return {
@@ -88,10 +120,12 @@ class EmailExtractor:
                     'email_score': 0,
                     'email_type': 'invalid',
                     'validation_status': 'invalid_format',
-                    'mx_valid': False
+                    'mx_valid': False,
+                    'candidates': candidates
                 }
             
-            # Sort by score and MX validity
+            # Sort by score and MX validity, ties broken alphabetically as re-ranking does
+            scored_emails.sort(key=lambda x: x['email'])
             scored_emails.sort(key=lambda x: (x['mx_valid'], x['score']), reverse=True)
             best_email = scored_emails[0]
             
@@ -100,60 +134,80 @@ class EmailExtractor:
                 'email_score': best_email['score'],
                 'email_type': best_email['email_type'],
                 'validation_status': 'valid' if best_email['mx_valid'] else 'mx_invalid',
-                'mx_valid': best_email['mx_valid']
+                'mx_valid': best_email['mx_valid'],
+                'candidates': candidates
             }
             
         except Exception as e:
-            st.error(f"Error extracting emails from {domain}: {str(e)}")
+            logger.warning("Error extracting emails from %s: %s", domain, e)
             return {
                 'email': None,
                 'email_score': 0,
                 'email_type': 'error',
                 'validation_status': 'error',
-                'mx_valid': False
+                'mx_valid': False,
+                'candidates': [],
+                'error': str(e)
+            }
+    
+    def extract_emails_batch(self, domains: Iterable[str], max_workers: int = 8,
+                             per_host_concurrency: Optional[int] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Extract emails for many domains concurrently, yielding (domain, result) as each one finishes
+
+        per_host_concurrency sets the shared fetcher's limit of open requests
+        per website; None keeps its current limit.
+        """
+        unique_domains = list(dict.fromkeys(domain for domain in domains if domain))
+        if not unique_domains:
+            return
+        
+        if per_host_concurrency is not None:
+            self.fetcher.set_per_host_limit(per_host_concurrency)
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            futures = {
+                executor.submit(self.extract_emails_from_domain, domain): domain
+                for domain in unique_domains
             }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Domains not started yet are dropped when the caller stops reading
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fetch_url(self, url: str) -> Optional[str]:
+        """Get a page through the shared cache, downloading it on a miss"""
+        return self.page_cache.fetch(url, self.fetcher.fetch_text)
     
     def _scrape_website_emails(self, domain: str) -> List[str]:
         """Scrape emails directly from website content"""
         emails = []
         
         try:
-            # Try different URL variations
-            urls_to_try = [
-                f"https://{domain}",
-                f"https://www.{domain}",
-                f"https://{domain}/contact",
-                f"https://{domain}/about",
-                f"https://{domain}/team"
-            ]
+            # The homepage that answered, then the site's own contact pages
+            homepage = self.page_discovery.homepage(domain)
+            if not homepage:
+                return emails
+            urls_to_try = [homepage] + self.page_discovery.pages(domain, ['contact'], limit=3)
             
             for url in urls_to_try:
                 try:
-                    # Use trafilatura for better content extraction
-                    downloaded = trafilatura.fetch_url(url)
+                    # One scan of the raw HTML covers the visible text and hidden emails
+                    downloaded = self._fetch_url(url)
                     if downloaded:
-                        # Extract text content
-                        text_content = trafilatura.extract(downloaded)
-                        if text_content:
-                            found_emails = self._extract_emails_from_text(text_content)
-                            emails.extend(found_emails)
-                        
-                        # Also check HTML directly for hidden emails
                         html_emails = self._extract_emails_from_text(downloaded)
                         emails.extend(html_emails)
                     
                 except Exception:
                     continue
                 
-                # Don't overwhelm the server
-                time.sleep(1)
-                
                 # Stop if we found enough emails
                 if len(emails) >= 10:
                     break
             
         except Exception as e:
-            st.warning(f"Website scraping failed for {domain}: {str(e)}")
+            logger.warning("Website scraping failed for %s: %s", domain, e)
         
         return emails
     
@@ -181,28 +235,22 @@ class EmailExtractor:
             # Search for LinkedIn company page
             linkedin_url = f"https://www.linkedin.com/company/{domain.split('.')[0]}"
             try:
-                response = self.session.get(linkedin_url, timeout=10)
-                if response.status_code == 200:
-                    found_emails = self._extract_emails_from_text(response.text)
+                page = self.fetcher.fetch(linkedin_url)
+                if page and page['status'] == 200:
+                    found_emails = self._extract_emails_from_text(page['text'])
                     emails.extend(found_emails)
             except:
                 pass
             
-            # Check if there's a contact form or page
-            contact_pages = [
-                f"https://{domain}/contact-us",
-                f"https://{domain}/contact.html",
-                f"https://{domain}/get-in-touch"
-            ]
+            # Check the about and team pages the site links to
+            about_pages = self.page_discovery.pages(domain, ['about', 'team'], limit=2)
             
-            for contact_url in contact_pages:
+            for about_url in about_pages:
                 try:
-                    downloaded = trafilatura.fetch_url(contact_url)
+                    downloaded = self._fetch_url(about_url)
                     if downloaded:
-                        text_content = trafilatura.extract(downloaded)
-                        if text_content:
-                            found_emails = self._extract_emails_from_text(text_content)
-                            emails.extend(found_emails)
+                        found_emails = self._extract_emails_from_text(downloaded)
+                        emails.extend(found_emails)
                 except:
                     continue
             
@@ -212,76 +260,39 @@ class EmailExtractor:
         return emails
     
     def _extract_emails_from_text(self, text: str) -> List[str]:
-        """Extract email addresses from text using regex"""
-        if not text:
-            return []
-        
-        # Email regex pattern
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        
-        # Filter out common false positives
-        filtered_emails = []
-        for email in emails:
-            email_lower = email.lower()
-            if not any(skip in email_lower for skip in [
-                'example.com', 'test.com', 'domain.com', 'email.com',
-                'yourcompany.com', 'yourdomain.com', 'company.com'
-            ]):
-                filtered_emails.append(email)
-        
-        return filtered_emails
+        """Extract email addresses, including obfuscated ones, from text or HTML"""
+        return self.email_scanner.scan(text)
     
     def _is_valid_email_format(self, email: str) -> bool:
         """Validate email format"""
         try:
-            validate_email(email)
+            # Deliverability is checked separately through the cached MX resolver
+            validate_email(email, check_deliverability=False)
             return True
         except EmailNotValidError:
             return False
     
     def _score_email(self, email: str) -> int:
         """Score an email based on its type and quality"""
-        email_lower = email.lower()
-        base_score = 50
-        
-        # Check for high-value keywords
-        for keyword, score in self.email_types.items():
-            if keyword in email_lower:
-                return score
-        
-        # Personal name patterns (higher score)
-        if re.match(r'^[a-z]+\.[a-z]+@', email_lower):
-            return 80
-        
-        # First name only
-        if re.match(r'^[a-z]+@', email_lower) and len(email_lower.split('@')[0]) > 2:
-            return 70
-        
-        return base_score
+        return int(self.score_emails(pd.Series([email])).iloc[0])
     
     def _classify_email_type(self, email: str) -> str:
         """Classify the type of email"""
-        email_lower = email.lower()
-        
-        for email_type, score in self.email_types.items():
-            if email_type in email_lower:
-                return email_type
-        
-        # Check for personal name patterns
-        if re.match(r'^[a-z]+\.[a-z]+@', email_lower):
-            return 'personal_name'
-        elif re.match(r'^[a-z]+@', email_lower):
-            return 'first_name'
-        else:
-            return 'generic'
+        return self.classify_emails(pd.Series([email])).iloc[0]
+    
+    def score_emails(self, emails: pd.Series) -> pd.Series:
+        """Score a whole column of emails in one pass"""
+        return score_emails(emails, self.email_types)
+    
+    def classify_emails(self, emails: pd.Series) -> pd.Series:
+        """Classify a whole column of emails in one pass"""
+        return classify_emails(emails, self.email_types)
     
     def _check_mx_record(self, email: str) -> bool:
         """Check if the email domain has valid MX records"""
         try:
             domain = email.split('@')[1]
-            dns.resolver.resolve(domain, 'MX')
-            return True
+            return self.mx_resolver.has_mx(domain)
         except:
             return False
     
@@ -289,20 +300,28 @@ class EmailExtractor:
         """Validate and score a list of emails"""
         results = []
         
+        # Look up each unique domain once, concurrently
+        valid_formats = {email: self._is_valid_email_format(email) for email in emails}
+        mx_results = self.mx_resolver.resolve_mx_many(
+            email.split('@')[1] for email, is_valid in valid_formats.items() if is_valid
+        )
+        
+        # Score and classify every valid email in one pass
+        valid_emails = pd.Series([email for email in emails if valid_formats[email]], dtype=object)
+        ratings = rate_emails(valid_emails, self.email_types)
+        
+        for email, score, email_type in zip(valid_emails, ratings['score'], ratings['email_type']):
+            mx_valid = mx_results.get(email.split('@')[1].lower(), False)
+            results.append({
+                'email': email,
+                'score': int(score),
+                'email_type': email_type,
+                'mx_valid': mx_valid,
+                'validation_status': 'valid' if mx_valid else 'mx_invalid'
+            })
+        
         for email in emails:
-            if self._is_valid_email_format(email):
-                score = self._score_email(email)
-                mx_valid = self._check_mx_record(email)
-                email_type = self._classify_email_type(email)
-                
-                results.append({
-                    'email': email,
-                    'score': score,
-                    'email_type': email_type,
-                    'mx_valid': mx_valid,
-                    'validation_status': 'valid' if mx_valid else 'mx_invalid'
-                })
-            else:
+            if not valid_formats[email]:
                 results.append({
                     'email': email,
                     'score': 0,
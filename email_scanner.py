@@ -0,0 +1,154 @@
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+from urllib.parse import unquote
+
+# Placeholder domains that show up in templates and documentation
+BLOCKED_DOMAINS = frozenset([
+    'example.com', 'test.com', 'domain.com', 'email.com',
+    'yourcompany.com', 'yourdomain.com', 'company.com'
+])
+
+EMAIL = r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}'
+
+# Obfuscated separators: HTML entities and bracketed words such as [at] / (dot)
+_AT = r'&#0*64;|&#x0*40;|[\[\(\{]\s*at\s*[\]\)\}]'
+_DOT = r'(?:\.|&#0*46;|&#x0*2e;|\s*[\[\(\{]\s*dot\s*[\]\)\}]\s*)'
+
+# Addresses are found from their separator outwards, so ordinary words never
+# start a match attempt and the '@' search itself is a plain substring scan
+_PATTERNS = {
+    'at_sign': (r'@', 0),
+    'plain_local': (r'([A-Za-z0-9._%+-]+)$', 0),
+    'plain_domain': (r'([A-Za-z0-9.-]+\.[A-Za-z]{2,})\b', 0),
+    'full_email': (rf'{EMAIL}', 0),
+    'at': (_AT, re.I),
+    'local': (r'([A-Za-z0-9._%+-]+)\s*$', 0),
+    'domain': (rf'\s*([A-Za-z0-9-]+(?:{_DOT}[A-Za-z0-9-]+)*{_DOT}[A-Za-z]{{2,}})\b', re.I),
+    'separator': (rf'{_DOT}', re.I),
+    'mailto': (r'mailto:([^"\'\s<>?&]+)', re.I),
+    'cfemail': (r'(?:data-cfemail="|email-protection#)([0-9a-fA-F]{4,})', 0),
+}
+
+# Cheap substring checks that decide whether an obfuscation pass is needed at all
+_OBFUSCATION_MARKERS = (
+    '&#64;', '&#064;', '&#x40;', '&#X40;',
+    'at]', 'at)', 'at}', 'at ]', 'at )', 'AT]', 'AT)', 'AT}', 'AT ]', 'AT )'
+)
+
+class _CompiledPatterns:
+    """One compiled set of scanner patterns for either str or bytes input"""
+
+    def __init__(self, as_bytes: bool):
+        for name, (pattern, flags) in _PATTERNS.items():
+            setattr(self, name, re.compile(pattern.encode() if as_bytes else pattern, flags))
+
+        encode = (lambda s: s.encode()) if as_bytes else (lambda s: s)
+        self.obfuscation_markers = tuple(encode(marker) for marker in _OBFUSCATION_MARKERS)
+        self.mailto_marker = encode('%40')
+        self.cf_markers = (encode('cfemail'), encode('email-protection#'))
+
+_STR_PATTERNS = _CompiledPatterns(as_bytes=False)
+_BYTES_PATTERNS = _CompiledPatterns(as_bytes=True)
+
+def decode_cfemail(encoded: str) -> Optional[str]:
+    """Decode an address hidden by Cloudflare email protection"""
+    try:
+        key = int(encoded[:2], 16)
+        return ''.join(chr(int(encoded[i:i + 2], 16) ^ key) for i in range(2, len(encoded), 2))
+    except ValueError:
+        return None
+
+class EmailScanner:
+    """Find email addresses in page text or raw downloaded bytes in a single pass
+
+    The plain-address scan runs on every page; the passes for entity and
+    [at]-style obfuscation, URL-encoded mailto links and Cloudflare email
+    protection only run when a cheap substring check says they can match.
+    """
+
+    def __init__(self, blocked_domains: Optional[Iterable[str]] = None):
+        self.blocked_domains = frozenset(
+            domain.lower() for domain in (BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+        )
+
+    def scan(self, data: Union[str, bytes]) -> List[str]:
+        """Return the unique addresses found in the data, in order of appearance"""
+        if not data:
+            return []
+
+        is_bytes = isinstance(data, (bytes, bytearray))
+        patterns = _BYTES_PATTERNS if is_bytes else _STR_PATTERNS
+        as_text = (lambda value: value.decode('ascii', errors='ignore')) if is_bytes else (lambda value: value)
+
+        candidates = []
+        for at in patterns.at_sign.finditer(data):
+            local = patterns.plain_local.search(data, max(0, at.start() - 64), at.start())
+            domain = patterns.plain_domain.match(data, at.end())
+            if local and domain:
+                candidates.append(f"{as_text(local.group(1))}@{as_text(domain.group(1))}")
+
+        # Method 1: entity and [at]/[dot] obfuscation
+        if any(marker in data for marker in patterns.obfuscation_markers):
+            for at in patterns.at.finditer(data):
+                local = patterns.local.search(data, max(0, at.start() - 64), at.start())
+                domain = patterns.domain.match(data, at.end())
+                if local and domain:
+                    domain = patterns.separator.sub(b'.' if is_bytes else '.', domain.group(1))
+                    candidates.append(f"{as_text(local.group(1))}@{as_text(domain)}")
+
+        # Method 2: URL-encoded mailto links
+        if patterns.mailto_marker in data:
+            for target in patterns.mailto.findall(data):
+                candidates.append(unquote(as_text(target)))
+
+        # Method 3: Cloudflare email protection
+        if any(marker in data for marker in patterns.cf_markers):
+            for encoded in patterns.cfemail.findall(data):
+                decoded = decode_cfemail(as_text(encoded))
+                if decoded:
+                    candidates.append(decoded)
+
+        emails = []
+        for email in dict.fromkeys(candidates):
+            if _STR_PATTERNS.full_email.fullmatch(email) and not self._is_blocked(email):
+                emails.append(email)
+        return emails
+
+    def _is_blocked(self, email: str) -> bool:
+        """Check the domain part and each of its parent domains against the blocklist"""
+        domain = email.rsplit('@', 1)[1].lower()
+        while True:
+            if domain in self.blocked_domains:
+                return True
+            if '.' not in domain:
+                return False
+            domain = domain.split('.', 1)[1]
+
+def benchmark(paths: Iterable[Union[str, Path]], repeat: int = 5) -> float:
+    """Scan a corpus of saved HTML pages as bytes and return the throughput in MB/s"""
+    pages = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob('*.htm*')) if path.is_dir() else [path]
+        pages.extend(file.read_bytes() for file in files)
+
+    total_bytes = sum(len(page) for page in pages)
+    if not total_bytes:
+        raise ValueError("No HTML pages found to benchmark")
+
+    scanner = EmailScanner()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            scanner.scan(page)
+    elapsed = time.perf_counter() - start
+
+    return total_bytes * repeat / elapsed / 1e6
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("usage: python email_scanner.py <html file or directory>...")
+    print(f"{benchmark(sys.argv[1:]):.1f} MB/s")
@@ -0,0 +1,95 @@
+import re
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+# Email scoring weights; when several keywords appear, the first one listed wins
+EMAIL_TYPES = {
+    'ceo': 100,
+    'founder': 95,
+    'president': 90,
+    'director': 85,
+    'manager': 80,
+    'head': 85,
+    'chief': 90,
+    'vp': 85,
+    'vice': 85,
+    'sales': 75,
+    'business': 70,
+    'marketing': 70,
+    'contact': 60,
+    'hello': 55,
+    'hi': 55,
+    'info': 30,
+    'support': 25,
+    'noreply': 10,
+    'no-reply': 10
+}
+
+BASE_SCORE = 50
+PERSONAL_NAME_SCORE = 80
+FIRST_NAME_SCORE = 70
+
+_PERSONAL_NAME = r'[a-z]+\.[a-z]+@'
+_FIRST_NAME = r'[a-z]+@'
+_LONG_FIRST_NAME = r'[a-z]{3,}@'
+
+def match_keywords(emails: pd.Series, email_types: Optional[Dict[str, int]] = None) -> pd.Series:
+    """Return the highest-priority keyword found anywhere in each email, NA where none is
+
+    One alternation regex finds the emails containing any keyword; the
+    per-keyword checks that settle priority then only run on those.
+    """
+    email_types = email_types or EMAIL_TYPES
+    lower = emails.astype('string').str.lower()
+    keywords = pd.Series(pd.NA, index=emails.index, dtype='string')
+    if not email_types or lower.empty:
+        return keywords
+
+    any_keyword = lower.str.contains('|'.join(map(re.escape, email_types)), regex=True, na=False)
+    candidates = lower[any_keyword]
+    if candidates.empty:
+        return keywords
+
+    hits = [candidates.str.contains(keyword, regex=False, na=False).to_numpy(dtype=bool) for keyword in email_types]
+    keywords[any_keyword] = np.select(hits, list(email_types), default=None)
+    return keywords
+
+def score_emails(emails: pd.Series, email_types: Optional[Dict[str, int]] = None) -> pd.Series:
+    """Score a whole column of emails based on their type and quality"""
+    return rate_emails(emails, email_types)['score']
+
+def classify_emails(emails: pd.Series, email_types: Optional[Dict[str, int]] = None) -> pd.Series:
+    """Classify a whole column of emails by keyword, or as personal_name, first_name or generic"""
+    return rate_emails(emails, email_types)['email_type']
+
+def rate_emails(emails: pd.Series, email_types: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """Score and classify a whole column of emails, sharing one keyword pass between both"""
+    email_types = email_types or EMAIL_TYPES
+    lower = emails.astype('string').str.lower()
+    keywords = match_keywords(lower, email_types)
+
+    # Keyword weights looked up by category code; NA keywords get code -1
+    codes = pd.Categorical(keywords, categories=list(email_types)).codes
+    keyword_scores = np.append(np.array(list(email_types.values()), dtype=int), 0)[codes]
+
+    has_keyword = codes >= 0
+    personal_name = lower.str.match(_PERSONAL_NAME, na=False).to_numpy(dtype=bool)
+    first_name = lower.str.match(_FIRST_NAME, na=False).to_numpy(dtype=bool)
+    long_first_name = lower.str.match(_LONG_FIRST_NAME, na=False).to_numpy(dtype=bool)
+
+    scores = np.select(
+        [has_keyword, personal_name, long_first_name],
+        [
+            keyword_scores,
+            PERSONAL_NAME_SCORE,
+            FIRST_NAME_SCORE
+        ],
+        default=BASE_SCORE
+    )
+    types = np.select(
+        [has_keyword, personal_name, first_name],
+        [keywords.fillna('').to_numpy(dtype=object), 'personal_name', 'first_name'],
+        default='generic'
+    )
+    return pd.DataFrame({'score': scores, 'email_type': types}, index=emails.index)
@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode
+import requests
+from utils.rate_limiter import parse_retry_after
+
+# The search API stops paging after the first thousand results
+_MAX_RESULTS = 1000
+
+class GitHubSearch:
+    """Paginated GitHub repository search with an on-disk ETag cache
+
+    Responses younger than fresh_for are served from disk without a
+    request; older ones are revalidated with If-None-Match, and a 304
+    costs no search quota. When the rate limit runs out the client serves
+    stale cached pages, or else waits for the reset if it is no more than
+    max_wait away.
+    """
+
+    def __init__(self, api_url: str = 'https://api.github.com', cache_path: str = 'data/github_cache.db',
+                 token: Optional[str] = None, session: Optional[requests.Session] = None,
+                 timeout: float = 10.0, per_page: int = 50, max_pages: int = 10,
+                 fresh_for: float = 3600, max_wait: float = 60):
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.per_page = per_page
+        self.max_pages = max_pages
+        self.fresh_for = fresh_for
+        self.max_wait = max_wait
+
+        self.session = session or requests.Session()
+        self.session.headers.update({'Accept': 'application/vnd.github+json'})
+        token = token or os.environ.get('GITHUB_TOKEN')
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+        # Set from the rate-limit headers of the last response that exhausted the quota
+        self._blocked_until = 0.0
+
+        if cache_path != ':memory:' and os.path.dirname(cache_path):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False, timeout=30)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, etag TEXT, fetched_at REAL, body BLOB)'
+        )
+        self._db.commit()
+
+    def search_repositories(self, query: str, sort: str = 'stars', order: str = 'desc') -> Iterator[Dict[str, Any]]:
+        """Yield matching repositories page by page until the results or max_pages run out"""
+        per_page = min(self.per_page, 100)
+        max_pages = min(self.max_pages, _MAX_RESULTS // per_page)
+
+        for page in range(1, max_pages + 1):
+            data = self.get('/search/repositories', {
+                'q': query,
+                'sort': sort,
+                'order': order,
+                'per_page': per_page,
+                'page': page
+            })
+            items = data.get('items', [])
+            yield from items
+
+            if len(items) < per_page or page * per_page >= data.get('total_count', 0):
+                return
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET an API path as JSON, through the cache"""
+        url = f"{self.api_url}{path}"
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+
+        cached = self._cached(url)
+        if cached and time.time() - cached[1] < self.fresh_for:
+            return cached[2]
+
+        headers = {'If-None-Match': cached[0]} if cached and cached[0] else {}
+
+        while True:
+            wait = self._blocked_until - time.time()
+            if wait > 0:
+                if cached:
+                    # A stale page now beats waiting for the quota to come back
+                    return cached[2]
+                if wait > self.max_wait:
+                    raise RuntimeError(f"GitHub rate limit exhausted for another {wait:.0f}s")
+                time.sleep(wait)
+
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            self._note_rate_limit(response)
+
+            if response.status_code == 304 and cached:
+                self._store(url, cached[0], cached[2])
+                return cached[2]
+
+            if response.status_code == 200:
+                data = response.json()
+                self._store(url, response.headers.get('ETag'), data)
+                return data
+
+            if response.status_code in (403, 429) and self._blocked_until > time.time():
+                continue
+
+            response.raise_for_status()
+            raise RuntimeError(f"GitHub returned HTTP {response.status_code}")
+
+    def clear(self):
+        """Forget every cached response"""
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._db.commit()
+
+    def _note_rate_limit(self, response: requests.Response):
+        """Remember when requests may resume if this response says the quota is spent"""
+        headers = response.headers
+        exhausted = headers.get('X-RateLimit-Remaining') == '0'
+        if response.status_code not in (403, 429) and not exhausted:
+            return
+
+        delay = parse_retry_after(headers.get('Retry-After'))
+        if delay is None and exhausted:
+            try:
+                delay = max(0.0, float(headers.get('X-RateLimit-Reset', '')) - time.time())
+            except ValueError:
+                delay = None
+
+        # A 403 without rate-limit headers is an ordinary refusal
+        if delay is not None:
+            self._blocked_until = max(self._blocked_until, time.time() + delay)
+
+    def _cached(self, url: str) -> Optional[Tuple[Optional[str], float, Dict[str, Any]]]:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT etag, fetched_at, body FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return row[0], row[1], json.loads(zlib.decompress(row[2]).decode('utf-8'))
+
+    def _store(self, url: str, etag: Optional[str], data: Dict[str, Any]):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses (url, etag, fetched_at, body) VALUES (?, ?, ?, ?)',
+                (url, etag, time.time(), zlib.compress(json.dumps(data).encode('utf-8')))
+            )
+            self._db.commit()
+
+_default_search = None
+_default_search_lock = threading.Lock()
+
+def get_github_search() -> GitHubSearch:
+    """Get the process-wide GitHub search client, authenticated by GITHUB_TOKEN when set"""
+    global _default_search
+    with _default_search_lock:
+        if _default_search is None:
+            _default_search = GitHubSearch()
+        return _default_search
@@ -0,0 +1,273 @@
+import asyncio
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Iterable, Optional, Tuple
+from utils.rate_limiter import HostRateLimiter, get_rate_limiter, host_key, parse_retry_after
+from utils.domain_health import DomainHealth, get_domain_health
+from utils.timeouts import AdaptiveTimeouts, current_budget, get_adaptive_timeouts
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+def is_timeout(error: BaseException) -> bool:
+    """Whether an exception, or one it wraps, is a connect or read timeout"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower():
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def decode_body(content: bytes, content_type: str) -> str:
+    """Decode a response body, defaulting to UTF-8 when the server gives no charset"""
+    encoding = 'utf-8'
+    for part in content_type.split(';'):
+        part = part.strip()
+        if part.lower().startswith('charset='):
+            encoding = part.split('=', 1)[1].strip('"\' ') or 'utf-8'
+
+    try:
+        return content.decode(encoding, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+class HttpFetcher:
+    """Base class for HTTP backends shared by the service classes
+
+    fetch() returns a page dict with the final url, status, lowercase
+    headers and decoded text, or None when the request fails outright.
+    """
+
+    def __init__(self, per_host_limit: int = 4, timeout: float = 10.0,
+                 headers: Optional[Dict[str, str]] = None,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 health: Optional[DomainHealth] = None,
+                 timeouts: Optional[AdaptiveTimeouts] = None):
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+        # Dead hosts and missing pages are skipped without a request
+        self.health = health or get_domain_health()
+
+        # Connect and read timeouts follow each host's response times, up to timeout
+        self.timeouts = timeouts or get_adaptive_timeouts()
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
+    def fetch(self, url: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Download a URL while holding one of its host's connection slots
+
+        timeout caps the host's adaptive timeouts, as does the time left in
+        the calling stage's TimeBudget; once that is spent nothing is sent.
+        """
+        if self.health.blocked(url):
+            return None
+
+        with self._host_slot(url):
+            budget = current_budget()
+            wait = self.rate_limiter.reserve(url, budget.remaining() if budget is not None else None)
+            if wait is None:
+                return None
+            if wait > 0:
+                time.sleep(wait)
+
+            limits = self._timeouts(url, timeout)
+            if limits is None:
+                return None
+            start = time.monotonic()
+            try:
+                page = self._fetch(url, limits[:2])
+            except Exception as error:
+                self._record_failure(url, error, limits)
+                return None
+
+        self.timeouts.observe(url, time.monotonic() - start)
+        self.health.record_response(url, page['status'])
+        self._respect_retry_after(url, page)
+        return page
+
+    def fetch_text(self, url: str) -> Optional[str]:
+        """Download a URL and return its body only for a successful response"""
+        page = self.fetch(url)
+        if page and page['status'] == 200 and page['text']:
+            return page['text']
+        return None
+
+    async def afetch(self, url: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Download a URL without blocking the event loop"""
+        return await asyncio.to_thread(self.fetch, url, timeout)
+
+    async def afetch_many(self, urls: Iterable[str], timeout: Optional[float] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Download many URLs concurrently, keyed by the requested URL"""
+        urls = list(dict.fromkeys(urls))
+        pages = await asyncio.gather(*(self.afetch(url, timeout) for url in urls))
+        return dict(zip(urls, pages))
+
+    def set_per_host_limit(self, limit: int):
+        """Change how many requests may be open to one host at a time
+
+        Requests already holding a slot finish under the old limit.
+        """
+        limit = max(1, limit)
+        with self._host_slots_lock:
+            if limit != self.per_host_limit:
+                self.per_host_limit = limit
+                self._host_slots = {}
+
+    def close(self):
+        """Release pooled connections"""
+
+    def _respect_retry_after(self, url: str, page: Dict[str, Any]):
+        """Pause the host when the server asks us to slow down"""
+        if page['status'] in (429, 503):
+            delay = parse_retry_after(page['headers'].get('retry-after'))
+            self.rate_limiter.defer(url, delay if delay is not None else 30)
+
+    def _timeouts(self, url: str, timeout: Optional[float] = None) -> Optional[Tuple[float, float, bool]]:
+        """(connect, read, cut short) for a request, or None when the stage has no time left"""
+        connect, read = self.timeouts.timeouts(url)
+        cap = timeout or self.timeout
+        budget = current_budget()
+        if budget is not None:
+            cap = min(cap, budget.remaining())
+            if cap <= 0:
+                return None
+        return min(connect, cap), min(read, cap), cap < read
+
+    def _record_failure(self, url: str, error: BaseException, limits: Tuple[float, float, bool]):
+        """Learn from a failed request, unless it only timed out because its time was cut short"""
+        if is_timeout(error):
+            if limits[2]:
+                return
+            self.timeouts.observe_timeout(url, limits[1])
+        self.health.record_failure(url, error)
+
+    def _fetch(self, url: str, timeout: Tuple[float, float]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Get the semaphore capping open connections to the host of a URL, with or without www."""
+        host = host_key(url)
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(max(1, self.per_host_limit))
+            return self._host_slots[host]
+
+class RequestsFetcher(HttpFetcher):
+    """Fetcher backed by a pooled keep-alive requests.Session"""
+
+    def __init__(self, pool_size: int = 32, **kwargs):
+        super().__init__(**kwargs)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _fetch(self, url: str, timeout: Tuple[float, float]) -> Dict[str, Any]:
+        response = self.session.get(url, timeout=timeout)
+        headers = {key.lower(): value for key, value in response.headers.items()}
+        return {
+            'url': response.url,
+            'status': response.status_code,
+            'headers': headers,
+            'text': decode_body(response.content, headers.get('content-type', ''))
+        }
+
+    def close(self):
+        self.session.close()
+
+class HttpxFetcher(HttpFetcher):
+    """Fetcher backed by httpx, using HTTP/2 when the h2 package is installed"""
+
+    def __init__(self, pool_size: int = 32, http2: Optional[bool] = None, **kwargs):
+        if httpx is None:
+            raise ImportError("HttpxFetcher requires the httpx package")
+
+        super().__init__(**kwargs)
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.client = httpx.Client(
+            http2=self.http2, limits=self.limits, headers=self.headers, follow_redirects=True
+        )
+
+    def _fetch(self, url: str, timeout: Tuple[float, float]) -> Dict[str, Any]:
+        response = self.client.get(url, timeout=httpx.Timeout(timeout[1], connect=timeout[0]))
+        return self._to_page(response)
+
+    async def afetch_many(self, urls: Iterable[str], timeout: Optional[float] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        urls = list(dict.fromkeys(urls))
+        host_slots: Dict[str, asyncio.Semaphore] = {}
+
+        async with httpx.AsyncClient(http2=self.http2, limits=self.limits, headers=self.headers,
+                                     follow_redirects=True) as client:
+            async def fetch_one(url: str) -> Optional[Dict[str, Any]]:
+                if self.health.blocked(url):
+                    return None
+
+                host = host_key(url)
+                slot = host_slots.setdefault(host, asyncio.Semaphore(max(1, self.per_host_limit)))
+                async with slot:
+                    await asyncio.sleep(self.rate_limiter.reserve(url))
+                    limits = self._timeouts(url, timeout)
+                    if limits is None:
+                        return None
+                    start = time.monotonic()
+                    try:
+                        response = await client.get(url, timeout=httpx.Timeout(limits[1], connect=limits[0]))
+                    except Exception as error:
+                        self._record_failure(url, error, limits)
+                        return None
+
+                self.timeouts.observe(url, time.monotonic() - start)
+                page = self._to_page(response)
+                self.health.record_response(url, page['status'])
+                self._respect_retry_after(url, page)
+                return page
+
+            pages = await asyncio.gather(*(fetch_one(url) for url in urls))
+
+        return dict(zip(urls, pages))
+
+    def close(self):
+        self.client.close()
+
+    def _to_page(self, response) -> Dict[str, Any]:
+        headers = {key.lower(): value for key, value in response.headers.items()}
+        return {
+            'url': str(response.url),
+            'status': response.status_code,
+            'headers': headers,
+            'text': decode_body(response.content, headers.get('content-type', ''))
+        }
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+def get_http_fetcher() -> HttpFetcher:
+    """Get the process-wide fetcher, preferring httpx when it is installed"""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = HttpxFetcher() if httpx is not None else RequestsFetcher()
+        return _default_fetcher
@@ -0,0 +1,447 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+from utils.data_processor import DataProcessor
+from utils.email_extractor import EmailExtractor
+from utils.lead_enrichment import LeadEnrichment
+
+JOB_KINDS = ('email', 'enrichment')
+
+# SQLite caps the number of bound parameters per statement
+_PARAM_CHUNK = 500
+
+class JobStore:
+    """SQLite checkpoint of jobs and the progress of every domain in them"""
+
+    def __init__(self, path: str = 'data/jobs.db'):
+        self.path = path
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT, status TEXT, '
+            'total INTEGER, created_at REAL, updated_at REAL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS job_items (job_id TEXT, position INTEGER, domain TEXT, '
+            'company_name TEXT, status TEXT, error TEXT, finished_at REAL, PRIMARY KEY (job_id, domain))'
+        )
+        # Last successful run per domain, used to skip recently processed domains
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS domain_runs (kind TEXT, domain TEXT, finished_at REAL, '
+            'PRIMARY KEY (kind, domain))'
+        )
+        self._db.commit()
+
+    def create_job(self, kind: str, leads: Iterable[Tuple[str, Optional[str]]]) -> str:
+        """Record a new job over (domain, company_name) pairs and return its id"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        items = {}
+        for domain, company_name in leads:
+            if domain and domain not in items:
+                items[domain] = (job_id, len(items), domain, company_name, 'pending')
+
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO jobs (id, kind, status, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, 'pending', len(items), now, now)
+            )
+            self._db.executemany(
+                'INSERT INTO job_items (job_id, position, domain, company_name, status) VALUES (?, ?, ?, ?, ?)',
+                items.values()
+            )
+            self._db.commit()
+
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job with its per-status domain counts"""
+        jobs = self._jobs('WHERE j.id = ?', (job_id,))
+        return jobs[0] if jobs else None
+
+    def list_jobs(self, kind: Optional[str] = None, unfinished_only: bool = False) -> List[Dict[str, Any]]:
+        """List jobs, newest first"""
+        conditions, params = [], []
+        if kind:
+            conditions.append('j.kind = ?')
+            params.append(kind)
+        if unfinished_only:
+            # Jobs that finished with failed domains stay listed so they can be resumed
+            conditions.append("j.status != 'completed'")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._jobs(where, params)
+
+    def job_domains(self, job_id: str) -> Set[str]:
+        """Every domain of a job, whatever its progress"""
+        with self._lock:
+            rows = self._db.execute('SELECT domain FROM job_items WHERE job_id = ?', (job_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def pending_items(self, job_id: str) -> List[Tuple[str, Optional[str]]]:
+        """Domains of a job still to be processed, in their original order"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT domain, company_name FROM job_items WHERE job_id = ? AND status IN ('pending', 'failed') "
+                'ORDER BY position', (job_id,)
+            ).fetchall()
+
+    def failed_items(self, job_id: str) -> List[Tuple[str, Optional[str]]]:
+        """(domain, error) of every failed domain of a job, in their original order"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT domain, error FROM job_items WHERE job_id = ? AND status = 'failed' ORDER BY position",
+                (job_id,)
+            ).fetchall()
+
+    def mark_item(self, job_id: str, kind: str, domain: str, status: str, error: Optional[str] = None):
+        """Checkpoint the outcome of one domain"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'UPDATE job_items SET status = ?, error = ?, finished_at = ? WHERE job_id = ? AND domain = ?',
+                (status, error, now, job_id, domain)
+            )
+            if status == 'done':
+                self._db.execute(
+                    'INSERT INTO domain_runs (kind, domain, finished_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT(kind, domain) DO UPDATE SET finished_at = excluded.finished_at',
+                    (kind, domain, now)
+                )
+            self._db.execute('UPDATE jobs SET updated_at = ? WHERE id = ?', (now, job_id))
+            self._db.commit()
+
+    def set_status(self, job_id: str, status: str):
+        """Update the overall status of a job"""
+        with self._lock:
+            self._db.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?',
+                             (status, time.time(), job_id))
+            self._db.commit()
+
+    def fresh_domains(self, kind: str, domains: Iterable[str], max_age: float) -> Set[str]:
+        """Return which domains finished a job of this kind within the last max_age seconds"""
+        domains = list(domains)
+        cutoff = time.time() - max_age
+        found = set()
+        with self._lock:
+            for i in range(0, len(domains), _PARAM_CHUNK):
+                chunk = domains[i:i + _PARAM_CHUNK]
+                placeholders = ', '.join('?' for _ in chunk)
+                rows = self._db.execute(
+                    f'SELECT domain FROM domain_runs WHERE kind = ? AND finished_at >= ? AND domain IN ({placeholders})',
+                    [kind, cutoff] + chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def delete_job(self, job_id: str):
+        """Forget a job and its checkpoints"""
+        with self._lock:
+            self._db.execute('DELETE FROM job_items WHERE job_id = ?', (job_id,))
+            self._db.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+            self._db.commit()
+
+    def _jobs(self, where: str, params: Iterable[Any]) -> List[Dict[str, Any]]:
+        sql = (
+            'SELECT j.id, j.kind, j.status, j.total, j.created_at, j.updated_at, '
+            "SUM(i.status = 'done'), SUM(i.status = 'skipped'), SUM(i.status = 'failed') "
+            f'FROM jobs j LEFT JOIN job_items i ON i.job_id = j.id {where} '
+            'GROUP BY j.id ORDER BY j.created_at DESC'
+        )
+        with self._lock:
+            rows = self._db.execute(sql, list(params)).fetchall()
+
+        keys = ['id', 'kind', 'status', 'total', 'created_at', 'updated_at', 'done', 'skipped', 'failed']
+        jobs = [dict(zip(keys, row)) for row in rows]
+        for job in jobs:
+            for key in ('done', 'skipped', 'failed'):
+                job[key] = job[key] or 0
+            job['finished'] = job['done'] + job['skipped']
+        return jobs
+
+class JobRunner:
+    """Run checkpointed email and enrichment jobs that resume where they stopped"""
+
+    def __init__(self, data_processor: DataProcessor, store: Optional[JobStore] = None,
+                 email_extractor: Optional[EmailExtractor] = None,
+                 lead_enrichment: Optional[LeadEnrichment] = None,
+                 freshness: float = 7 * 86400, max_workers: int = 4):
+        self.data_processor = data_processor
+        self.store = store or get_job_store()
+        self.email_extractor = email_extractor
+        self.lead_enrichment = lead_enrichment
+
+        # Domains finished by any job of the same kind within this window are skipped
+        self.freshness = freshness
+        self.max_workers = max_workers
+
+    def create_job(self, kind: str, leads: Iterable[Tuple[str, Optional[str]]]) -> str:
+        """Checkpoint a new job without running it"""
+        return self.store.create_job(kind, leads)
+
+    def run(self, job_id: str, max_workers: Optional[int] = None,
+            freshness: Optional[float] = None) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Process a job's remaining domains, yielding (domain, result) as each finishes
+
+        Skipped and failed domains yield None; results that report an error
+        or ran out of time count as failed. Every outcome is checkpointed
+        before it is yielded, so an interrupted run resumes from there.
+        Closing the run early drops queued domains and waits for those in flight.
+        """
+        job = self.store.get_job(job_id)
+        if job is None:
+            raise ValueError(f"Unknown job: {job_id}")
+
+        kind = job['kind']
+        process = self._handler(kind)
+        items = self.store.pending_items(job_id)
+        freshness = self.freshness if freshness is None else freshness
+
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers or self.max_workers))
+        futures = {}
+
+        self.store.set_status(job_id, 'running')
+        try:
+            # Domains processed recently by another job are not fetched again
+            fresh = self.store.fresh_domains(kind, [domain for domain, _ in items], freshness) if freshness else set()
+            for domain in fresh:
+                self.store.mark_item(job_id, kind, domain, 'skipped')
+                yield domain, None
+
+            futures = {
+                executor.submit(process, domain, company_name): domain
+                for domain, company_name in items if domain not in fresh
+            }
+            for future in as_completed(list(futures)):
+                domain = futures.pop(future)
+                yield domain, self._checkpoint(job_id, kind, domain, future)
+        finally:
+            # An abandoned run stops queued domains; they stay pending for the next run
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Domains already in flight are waited for, so the run is not over while they could be resumed twice
+            for future, domain in futures.items():
+                if not future.cancelled():
+                    self._checkpoint(job_id, kind, domain, future)
+            # A run that reached every domain is over; failed ones are retried by resuming
+            job = self.store.get_job(job_id)
+            if job['finished'] + job['failed'] < job['total']:
+                self.store.set_status(job_id, 'interrupted')
+            else:
+                self.store.set_status(job_id, 'completed_with_failures' if job['failed'] else 'completed')
+
+    def _checkpoint(self, job_id: str, kind: str, domain: str, future: Future) -> Optional[Dict[str, Any]]:
+        """Record how one domain's processing ended, returning its result unless it failed"""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.store.mark_item(job_id, kind, domain, 'failed', str(e))
+            return None
+
+        # Partial results are kept, but the domain is retried rather than counted as fresh
+        error = self._result_error(kind, result)
+        if error is None or result.get('timed_out'):
+            self._save(kind, domain, result)
+        if error:
+            self.store.mark_item(job_id, kind, domain, 'failed', error)
+            return None
+
+        self.store.mark_item(job_id, kind, domain, 'done')
+        return result
+
+    def _handler(self, kind: str):
+        """Get the service call that processes one domain of a job"""
+        if kind == 'email':
+            if self.email_extractor is None:
+                self.email_extractor = EmailExtractor()
+            return lambda domain, company_name: self.email_extractor.extract_emails_from_domain(domain)
+
+        if self.lead_enrichment is None:
+            self.lead_enrichment = LeadEnrichment()
+        return self.lead_enrichment.enrich_company
+
+    def _result_error(self, kind: str, result: Dict[str, Any]) -> Optional[str]:
+        """Why a result the service returned instead of raising is not a finished domain"""
+        if result.get('timed_out'):
+            return 'timed out'
+        if kind == 'email' and result.get('email_type') == 'error':
+            return result.get('error') or 'email extraction failed'
+        if kind == 'enrichment' and str(result.get('funding_status')).lower() == 'error':
+            return result.get('error') or 'enrichment failed'
+        return None
+
+    def _save(self, kind: str, domain: str, result: Dict[str, Any]):
+        """Write a domain's result to the lead database"""
+        if kind == 'email':
+            self.data_processor.add_email_data(domain, result)
+        else:
+            self.data_processor.add_enrichment_data(domain, result)
+
+class JobQueue:
+    """Pool of background workers that run queued jobs independently of page reruns
+
+    Pages submit jobs and poll their status; workers keep going when the
+    browser tab reruns or disconnects. The number of workers bounds how many
+    jobs run at once across every session.
+    """
+
+    def __init__(self, runner: Optional[JobRunner] = None, workers: int = 2):
+        self.runner = runner or JobRunner(DataProcessor())
+        self.workers = max(1, workers)
+
+        self._queue: 'queue.Queue[str]' = queue.Queue()
+        self._options: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+        self._active: Set[str] = set()
+        # (kind, domains) of each job, so the same batch is not queued twice at once
+        self._keys: Dict[str, Tuple[str, FrozenSet[str]]] = {}
+        self._cancelled: Set[str] = set()
+        self._lock = threading.Lock()
+
+        self._threads = [
+            threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, kind: str, leads: Iterable[Tuple[str, Optional[str]]],
+               max_workers: Optional[int] = None, freshness: Optional[float] = None) -> str:
+        """Checkpoint a new job and queue it for the workers
+
+        The same domains submitted again while a job of that kind over them is
+        queued or running are not queued twice; that job's id is returned.
+        """
+        leads = [(domain, company_name) for domain, company_name in leads if domain]
+        key = (kind, frozenset(domain for domain, _ in leads))
+        with self._lock:
+            for job_id in self._active:
+                if self._keys.get(job_id) == key:
+                    return job_id
+
+            job_id = self.runner.create_job(kind, leads)
+            self._keys[job_id] = key
+            self._activate(job_id, max_workers, freshness)
+
+        self._enqueue(job_id)
+        return job_id
+
+    def resume(self, job_id: str, max_workers: Optional[int] = None, freshness: Optional[float] = None):
+        """Queue an existing job; only its unfinished domains are processed"""
+        with self._lock:
+            if job_id in self._active:
+                return
+            if job_id not in self._keys:
+                job = self.runner.store.get_job(job_id)
+                if job is None:
+                    raise ValueError(f"Unknown job: {job_id}")
+                self._keys[job_id] = (job['kind'], frozenset(self.runner.store.job_domains(job_id)))
+            self._activate(job_id, max_workers, freshness)
+
+        self._enqueue(job_id)
+
+    def cancel(self, job_id: str):
+        """Stop a job after the domains in flight; the rest stay pending"""
+        with self._lock:
+            if job_id in self._active:
+                self._cancelled.add(job_id)
+
+    def is_active(self, job_id: str) -> bool:
+        """Whether a job is queued or running in this process"""
+        with self._lock:
+            return job_id in self._active
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's checkpointed progress"""
+        job = self.runner.store.get_job(job_id)
+        if job is not None:
+            job['active'] = self.is_active(job_id)
+        return job
+
+    def results(self, job_id: str) -> List[Dict[str, Any]]:
+        """Results of the domains processed for a job since this process started"""
+        with self._lock:
+            return list(self._results.get(job_id, []))
+
+    def _activate(self, job_id: str, max_workers: Optional[int], freshness: Optional[float]):
+        """Mark a job as queued in this process; the caller holds the lock"""
+        self._active.add(job_id)
+        self._cancelled.discard(job_id)
+        self._options[job_id] = {'max_workers': max_workers, 'freshness': freshness}
+        self._results.setdefault(job_id, [])
+
+    def _enqueue(self, job_id: str):
+        self.runner.store.set_status(job_id, 'queued')
+        self._queue.put(job_id)
+
+    def _work(self):
+        """Worker loop: take the next job off the queue and run it to the end"""
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception:
+                # A broken job must not take its worker down with it
+                self.runner.store.set_status(job_id, 'interrupted')
+            finally:
+                # The run has waited for its in-flight domains, so resuming now cannot repeat them
+                with self._lock:
+                    self._active.discard(job_id)
+                    self._cancelled.discard(job_id)
+                self._queue.task_done()
+
+    def _run(self, job_id: str):
+        with self._lock:
+            if job_id in self._cancelled:
+                self.runner.store.set_status(job_id, 'interrupted')
+                return
+            options = self._options.get(job_id, {})
+
+        company_names = dict(self.runner.store.pending_items(job_id))
+        job_results = self.runner.run(job_id, **options)
+        try:
+            for domain, result in job_results:
+                with self._lock:
+                    if result is not None:
+                        self._results[job_id].append(
+                            {'domain': domain, 'company_name': company_names.get(domain), **result}
+                        )
+                    if job_id in self._cancelled:
+                        break
+        finally:
+            job_results.close()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_job_store() -> JobStore:
+    """Get the process-wide job checkpoint store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = JobStore()
+        return _default_store
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue, sized by the LEAD_JOB_WORKERS environment variable"""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(workers=int(os.environ.get('LEAD_JOB_WORKERS', '2')))
+        return _default_queue
@@ -1,23 +1,86 @@
+import logging
 import requests
-import re
-import time
-from bs4 import BeautifulSoup
-from typing import Dict, Any, Optional
-import streamlit as st
-import trafilatura
-from urllib.parse import urljoin, urlparse
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from utils.page_cache import PageCache, get_page_cache
+from utils.http_fetcher import HttpFetcher, get_http_fetcher
+from utils.page_analysis import PageAnalysis, PageAnalyzer, get_page_analyzer
+from utils.field_extractor import FieldExtractor, categorize_company_size
+from utils.page_discovery import PageDiscovery, get_page_discovery
+from utils.timeouts import TimeBudget, current_budget
+
+# Enrichment runs on background job workers, which have no page to report to
+logger = logging.getLogger(__name__)
+
+# Kinds of company page checked for size, location, description and founding
+# year, in the order tried before any domain has shown which ones pay off
+PAGE_PRIORITY = ['home', 'about', 'team']
+
+# Website fields gathered across pages until each is known with enough confidence
+TARGET_FIELDS = ('company_size', 'location', 'description', 'founding_year')
+
+# Trust in a page's own meta description versus its first long sentence
+META_DESCRIPTION_CONFIDENCE = 0.9
+TEXT_DESCRIPTION_CONFIDENCE = 0.5
 
 class LeadEnrichment:
     """Enrich leads with additional company data from public sources"""
     
-    def __init__(self):
+    def __init__(self, page_cache: Optional[PageCache] = None,
+                 fetcher: Optional[HttpFetcher] = None,
+                 page_analyzer: Optional[PageAnalyzer] = None,
+                 field_extractor: Optional[FieldExtractor] = None,
+                 page_priority: Optional[List[str]] = None, min_confidence: float = 0.8,
+                 min_payoff: float = 0.3, max_pages: int = 5,
+                 page_discovery: Optional[PageDiscovery] = None, time_budget: float = 30.0):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        
+        # Pages already downloaded by any service class are read from here
+        self.page_cache = page_cache or get_page_cache()
+        
+        # Shared keep-alive connection pool for every page download
+        self.fetcher = fetcher or get_http_fetcher()
+        
+        # Each downloaded page is parsed once and reused by every extractor
+        self.page_analyzer = page_analyzer or get_page_analyzer()
+        
+        # Compiled once; finds size, location and founding year in one scan per page
+        self.field_extractor = field_extractor or FieldExtractor()
+        
+        # The last text scanned on each thread, so the per-field helpers share one scan
+        self._last_fields = threading.local()
+        
+        # About and team pages found once per domain and shared with email extraction
+        self.page_discovery = page_discovery or get_page_discovery()
+        
+        # Seconds of requests one company may take before its partial result is returned
+        self.time_budget = time_budget
+        
+        # Website pages are tried in this order until fetches show which ones pay off
+        self.page_priority = list(page_priority or PAGE_PRIORITY)
+        self.min_confidence = min_confidence
+        self.min_payoff = min_payoff
+        self.max_pages = max_pages
+        
+        # page kind -> {'fetches': n, field: fetches that found it confidently}
+        self._page_stats = {}
+        self._page_stats_lock = threading.Lock()
     
     def enrich_company(self, domain: str, company_name: str = None) -> Dict[str, Any]:
         """Enrich company data from multiple sources"""
+        # Once the budget is spent no more pages are requested and what was found is kept
+        with TimeBudget(self.time_budget) as budget:
+            result = self._enrich_company(domain, company_name)
+        
+        if budget.expired:
+            result['timed_out'] = True
+        return result
+    
+    def _enrich_company(self, domain: str, company_name: str = None) -> Dict[str, Any]:
+        """Gather website, LinkedIn, funding and industry data for one company"""
         try:
             enrichment_data = {
                 'company_size': None,
@@ -53,13 +116,14 @@ class LeadEnrichment:
             return enrichment_data
             
         except Exception as e:
-            st.error(f"Error enriching company {company_name or domain}: {str(e)}")
+            logger.warning("Error enriching company %s: %s", company_name or domain, e)
             return {
                 'company_size': None,
                 'funding_status': 'Error',
                 'linkedin_url': None,
                 'industry': None,
-                'location': None
+                'location': None,
+                'error': str(e)
             }
     
     def _extract_company_name_from_domain(self, domain: str) -> str:
@@ -70,113 +134,139 @@ class LeadEnrichment:
     
     def _scrape_company_website(self, domain: str) -> Dict[str, Any]:
         """Scrape basic company information from their website"""
-        data = {}
+        # field -> {value: confidence}, merged across every page checked
+        evidence = {}
         
         try:
-            # Try different pages that might contain company info
-            pages_to_check = [
-                f"https://{domain}",
-                f"https://{domain}/about",
-                f"https://{domain}/about-us",
-                f"https://{domain}/company",
-                f"https://{domain}/team"
-            ]
-            
-            for url in pages_to_check:
+            remaining = self._website_pages(domain)
+            while remaining:
+                # Stop as soon as every field is known well enough
+                missing = [
+                    field for field in TARGET_FIELDS
+                    if max(evidence.get(field, {None: 0.0}).values()) < self.min_confidence
+                ]
+                if not missing:
+                    break
+                
+                # Pages skipped for lack of time say nothing about what they would have paid off
+                budget = current_budget()
+                if budget is not None and budget.expired:
+                    break
+                
+                choice = self._next_page(remaining, missing)
+                if choice is None:
+                    break
+                remaining.remove(choice)
+                kind, url = choice
+                
+                found = []
                 try:
-                    downloaded = trafilatura.fetch_url(url)
+                    downloaded = self.page_cache.fetch(url, self.fetcher.fetch_text)
                     if downloaded:
-                        text_content = trafilatura.extract(downloaded)
-                        if text_content:
-                            # Extract company size indicators
-                            size_info = self._extract_company_size(text_content)
-                            if size_info:
-                                data['company_size'] = size_info
-                            
-                            # Extract location
-                            location = self._extract_location(text_content)
-                            if location:
-                                data['location'] = location
-                            
-                            # Extract description
-                            description = self._extract_description(text_content)
-                            if description:
-                                data['description'] = description
-                            
-                            # Extract founding year
-                            founding_year = self._extract_founding_year(text_content)
-                            if founding_year:
-                                data['founding_year'] = founding_year
+                        page = self.page_analyzer.analyze(downloaded, url)
+                        found = self._page_evidence(page)
                     
                 except Exception:
-                    continue
-                
-                time.sleep(1)  # Be respectful
+                    pass
                 
-                # Stop if we got enough info
-                if len(data) >= 3:
-                    break
+                # Agreeing pages raise a value's confidence, as independent evidence would
+                for field, value, confidence in found:
+                    values = evidence.setdefault(field, {})
+                    values[value] = 1 - (1 - values.get(value, 0.0)) * (1 - confidence)
+                self._record_page(kind, found)
             
         except Exception as e:
-            st.warning(f"Website scraping failed for {domain}: {str(e)}")
+            logger.warning("Website scraping failed for %s: %s", domain, e)
         
-        return data
+        # The most confident value wins; ties go to the page checked first
+        return {field: max(values, key=values.get) for field, values in evidence.items()}
     
-    def _extract_company_size(self, text: str) -> Optional[str]:
-        """Extract company size from text"""
-        text_lower = text.lower()
+    def _page_evidence(self, page: PageAnalysis) -> List[Tuple[str, Any, float]]:
+        """Collect (field, value, confidence) for every target field found on one page"""
+        text_content = page.main_text
+        if not text_content:
+            return []
         
-        # Look for employee count patterns
-        employee_patterns = [
-            r'(\d+)[\s\-]+(?:employees?|people|team members?|staff)',
-            r'team of (\d+)',
-            r'(\d+)[\s\-]+person team',
-            r'over (\d+) (?:employees?|people)',
-            r'more than (\d+) (?:employees?|people)'
-        ]
+        found = []
         
-        for pattern in employee_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                count = int(match.group(1))
-                return self._categorize_company_size(count)
+        # Size, location and founding year come from a single scan
+        for field, candidate in self.field_extractor.resolve(text_content).items():
+            confidence = self.field_extractor.confidence(candidate)
+            if field == 'employee_count':
+                found.append(('company_size', categorize_company_size(candidate.value), confidence))
+            elif field == 'size_hint':
+                found.append(('company_size', candidate.value, confidence))
+            else:
+                found.append((field, candidate.value, confidence))
         
-        # Look for size indicators
-        if any(term in text_lower for term in ['startup', 'small team', 'boutique']):
-            return 'Small (1-50)'
-        elif any(term in text_lower for term in ['enterprise', 'fortune', 'global']):
-            return 'Large (500+)'
+        # Extract description, preferring the page's own summary
+        description = page.meta.get('description') or page.meta.get('og:description')
+        if description and len(description) >= 50:
+            found.append(('description', description, META_DESCRIPTION_CONFIDENCE))
+        else:
+            description = self._extract_description(text_content)
+            if description:
+                found.append(('description', description, TEXT_DESCRIPTION_CONFIDENCE))
         
-        return None
+        return found
+    
+    def _website_pages(self, domain: str) -> List[Tuple[str, str]]:
+        """The (kind, url) pages of a site worth checking, in configured priority then discovery order"""
+        homepage = self.page_discovery.homepage(domain)
+        if not homepage:
+            return []
+        
+        rank = {kind: index for index, kind in enumerate(self.page_priority)}
+        pages = [('home', homepage)] + [(page.topic, page.url) for page in self.page_discovery.discover(domain)]
+        pages = [page for page in pages if page[0] in rank]
+        
+        # sort() is stable, so pages of one kind stay best first
+        pages.sort(key=lambda page: rank[page[0]])
+        return pages[:self.max_pages]
+    
+    def _next_page(self, remaining: List[Tuple[str, str]], missing: List[str]) -> Optional[Tuple[str, str]]:
+        """Pick the page most likely to settle the missing fields, or None when no page is worth a fetch"""
+        with self._page_stats_lock:
+            stats = {kind: dict(self._page_stats.get(kind, {})) for kind, _ in remaining}
+        
+        # Smoothed so untried kinds of page look promising until fetches say otherwise
+        def payoff(kind: str, field: str) -> float:
+            return (stats[kind].get(field, 0) + 1) / (stats[kind].get('fetches', 0) + 1)
+        
+        # Expected number of missing fields a fetch of each page would settle
+        gains = [sum(payoff(kind, field) for field in missing) for kind, _ in remaining]
+        
+        # The first of equals wins, so ties follow the configured order
+        best = max(range(len(remaining)), key=gains.__getitem__)
+        return remaining[best] if gains[best] >= self.min_payoff else None
+    
+    def _record_page(self, kind: str, found: List[Tuple[str, Any, float]]):
+        """Remember which fields one fetch of a kind of website page found confidently"""
+        with self._page_stats_lock:
+            stats = self._page_stats.setdefault(kind, {})
+            stats['fetches'] = stats.get('fetches', 0) + 1
+            for field in {field for field, _, confidence in found if confidence >= self.min_confidence}:
+                stats[field] = stats.get(field, 0) + 1
+    
+    def _extract_fields(self, text: str) -> Dict[str, Any]:
+        """Size, location and founding year of a text, scanned once however many are asked for"""
+        last = getattr(self._last_fields, 'value', None)
+        if last is None or last[0] != text:
+            last = (text, self.field_extractor.extract(text))
+            self._last_fields.value = last
+        return last[1]
+    
+    def _extract_company_size(self, text: str) -> Optional[str]:
+        """Extract company size from text"""
+        return self._extract_fields(text)['company_size']
     
     def _categorize_company_size(self, employee_count: int) -> str:
         """Categorize company size based on employee count"""
-        if employee_count <= 50:
-            return 'Small (1-50)'
-        elif employee_count <= 200:
-            return 'Medium (51-200)'
-        elif employee_count <= 500:
-            return 'Large (201-500)'
-        else:
-            return 'Enterprise (500+)'
+        return categorize_company_size(employee_count)
     
     def _extract_location(self, text: str) -> Optional[str]:
         """Extract company location from text"""
-        # Common location patterns
-        location_patterns = [
-            r'(?:based in|located in|headquarters in|hq in)\s+([A-Za-z\s,]+)',
-            r'([A-Za-z]+,\s*[A-Za-z]{2})',  # City, State
-            r'([A-Za-z]+,\s*[A-Za-z]+)',    # City, Country
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                location = match.group(1).strip()
-                if len(location) > 2 and len(location) < 50:
-                    return location
-        
-        return None
+        return self._extract_fields(text)['location']
     
     def _extract_description(self, text: str) -> Optional[str]:
         """Extract company description from text"""
@@ -193,20 +283,7 @@ class LeadEnrichment:
     
     def _extract_founding_year(self, text: str) -> Optional[int]:
         """Extract founding year from text"""
-        # Look for founding year patterns
-        year_patterns = [
-            r'(?:founded|established|started|since)\s+(?:in\s+)?(\d{4})',
-            r'(\d{4})[\s\-]+(?:founded|established|started)',
-        ]
-        
-        for pattern in year_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                year = int(match.group(1))
-                if 1900 <= year <= 2025:  # Reasonable year range
-                    return year
-        
-        return None
+        return self._extract_fields(text)['founding_year']
     
     def _find_linkedin_profile(self, company_name: str, domain: str) -> Dict[str, Any]:
         """Find LinkedIn company profile"""
@@ -225,15 +302,15 @@ class LeadEnrichment:
             
             for url in potential_urls:
                 try:
-                    response = self.session.get(url, timeout=10)
-                    if response.status_code == 200 and 'company' in response.url:
-                        data['linkedin_url'] = response.url
+                    page = self.fetcher.fetch(url)
+                    if page and page['status'] == 200 and 'company' in page['url']:
+                        data['linkedin_url'] = page['url']
                         
                         # Try to extract additional info from LinkedIn
-                        soup = BeautifulSoup(response.content, 'html.parser')
+                        analysis = self.page_analyzer.analyze(page['text'], page['url'], page['headers'])
                         
                         # Look for company size on LinkedIn
-                        size_text = soup.get_text()
+                        size_text = analysis.text
                         size_info = self._extract_company_size(size_text)
                         if size_info:
                             data['company_size'] = size_info
@@ -242,11 +319,9 @@ class LeadEnrichment:
                         
                 except Exception:
                     continue
-                
-                time.sleep(2)  # Be respectful to LinkedIn
             
         except Exception as e:
-            st.warning(f"LinkedIn search failed for {company_name}: {str(e)}")
+            logger.warning("LinkedIn search failed for %s: %s", company_name, e)
         
         return data
     
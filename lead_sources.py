@@ -0,0 +1,259 @@
+import gzip
+import inspect
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from urllib.parse import urlparse
+import pandas as pd
+from utils.http_fetcher import HttpFetcher, get_http_fetcher
+from utils.page_analysis import PageAnalyzer, get_page_analyzer
+from utils.page_discovery import sitemap_urls
+
+# A lead source is any callable taking (technology, limit) and lazily yielding lead
+# dicts. Sources that also take a stop event check it between records, so a search
+# that has been abandoned stops reading instead of running on in its thread.
+LeadSource = Callable[..., Iterable[Dict[str, Any]]]
+
+# URL fragments that give a technology away in crawl indexes, beyond its name
+URL_PATTERNS = {
+    'shopify': ['myshopify.com', 'cdn.shopify.com', '/cdn/shop/'],
+    'wordpress': ['/wp-content/', '/wp-json/', '/wp-includes/'],
+    'nextjs': ['/_next/'],
+    'django': ['/static/admin/'],
+}
+
+def start_source(source: LeadSource, technology: str, limit: int,
+                 stop: Optional[threading.Event] = None) -> Iterable[Dict[str, Any]]:
+    """Call a lead source, handing it the stop event when it takes one"""
+    try:
+        parameters = inspect.signature(source).parameters.values()
+    except (TypeError, ValueError):
+        parameters = []
+    if any(parameter.name == 'stop' or parameter.kind == parameter.VAR_KEYWORD for parameter in parameters):
+        return source(technology, limit, stop=stop)
+    return source(technology, limit)
+
+def _stopped(stop: Optional[threading.Event]) -> bool:
+    return stop is not None and stop.is_set()
+
+def is_valid_website(url: str) -> bool:
+    """Check if a URL is a valid website"""
+    if not url:
+        return False
+
+    # Add protocol if missing
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    try:
+        parsed = urlparse(url)
+        return bool(
+            parsed.netloc and
+            '.' in parsed.netloc and
+            not parsed.netloc.startswith('localhost') and
+            not parsed.netloc.startswith('127.0.0.1')
+        )
+    except Exception:
+        return False
+
+def company_name_from_url(url: str) -> str:
+    """Extract company name from URL"""
+    try:
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        domain = urlparse(url).netloc
+        # Remove www. and common TLDs, capitalize
+        name = domain.replace('www.', '').split('.')[0]
+        return name.capitalize()
+    except Exception:
+        return "Unknown Company"
+
+def lead_from_url(url: str, technology: str, source: str,
+                  company_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Build a lead dict for a website, or None if the URL is not a usable website"""
+    if not is_valid_website(url):
+        return None
+
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    return {
+        'company_name': company_name or company_name_from_url(url),
+        'domain': urlparse(url).netloc.lower(),
+        'tech_stack': technology,
+        'source': source
+    }
+
+class CsvSeedSource:
+    """Leads from a local CSV seed list with a domain column
+
+    Rows are filtered on a tech_stack column when the file has one;
+    otherwise every row is offered for every technology.
+    """
+
+    def __init__(self, path: Union[str, Path], chunksize: int = 5000):
+        self.path = Path(path)
+        self.chunksize = chunksize
+
+    def __call__(self, technology: str, limit: int,
+                 stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        tech_lower = technology.lower()
+        domains = set()
+        for chunk in pd.read_csv(self.path, dtype=str, chunksize=self.chunksize):
+            if _stopped(stop):
+                return
+            chunk.columns = [column.strip().lower() for column in chunk.columns]
+            if 'domain' not in chunk.columns:
+                raise ValueError(f"{self.path.name} has no domain column")
+
+            if 'tech_stack' in chunk.columns:
+                chunk = chunk[chunk['tech_stack'].fillna('').str.lower().str.contains(tech_lower, regex=False)]
+
+            for row in chunk.itertuples(index=False):
+                row = row._asdict()
+                lead = lead_from_url(str(row['domain'] or '').strip(), technology,
+                                     f'Seed - {self.path.name}', row.get('company_name') or None)
+                if lead and lead['domain'] not in domains:
+                    domains.add(lead['domain'])
+                    yield lead
+                    if len(domains) >= limit:
+                        return
+
+class SitemapSource:
+    """Leads linked from the pages of a directory site, found through its sitemap"""
+
+    def __init__(self, sitemap_url: str, technologies: Optional[List[str]] = None,
+                 max_pages: int = 50, fetcher: Optional[HttpFetcher] = None,
+                 page_analyzer: Optional[PageAnalyzer] = None):
+        self.sitemap_url = sitemap_url
+        self.technologies = [tech.lower() for tech in technologies] if technologies else None
+        self.max_pages = max_pages
+        self.fetcher = fetcher or get_http_fetcher()
+        self.page_analyzer = page_analyzer or get_page_analyzer()
+
+    def __call__(self, technology: str, limit: int,
+                 stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        if self.technologies and technology.lower() not in self.technologies:
+            return
+
+        site = urlparse(self.sitemap_url).netloc
+        domains = set()
+        for page_url in self._page_urls():
+            if _stopped(stop):
+                return
+            page = self.fetcher.fetch(page_url)
+            if not page or page['status'] != 200:
+                continue
+
+            analysis = self.page_analyzer.analyze(page['text'], page['url'], page['headers'])
+            for href, _ in analysis.links:
+                if urlparse(href).netloc != site:
+                    lead = lead_from_url(href, technology, f'Sitemap - {site}')
+                    if lead and lead['domain'] not in domains:
+                        domains.add(lead['domain'])
+                        yield lead
+                        if len(domains) >= limit:
+                            return
+
+    def _page_urls(self) -> Iterator[str]:
+        """Walk the sitemap, following nested sitemap indexes, up to max_pages page URLs"""
+        return sitemap_urls(self.sitemap_url, self.fetcher.fetch_text, self.max_pages)
+
+class CommonCrawlSource:
+    """Leads from Common Crawl CDX index files on disk, matched on URL fragments
+
+    Each line is either "<surt> <timestamp> <json>" as in the published
+    indexes or a bare JSON record; gzipped files are read as they are.
+    """
+
+    def __init__(self, path: Union[str, Path], url_patterns: Optional[Dict[str, List[str]]] = None):
+        self.path = Path(path)
+        self.url_patterns = url_patterns or URL_PATTERNS
+
+    def __call__(self, technology: str, limit: int,
+                 stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        tech_lower = technology.lower()
+        patterns = self.url_patterns.get(tech_lower, []) + [tech_lower]
+        domains = set()
+
+        opener = gzip.open if self.path.suffix == '.gz' else open
+        with opener(self.path, 'rt', encoding='utf-8', errors='ignore') as lines:
+            for line in lines:
+                # Index files are large and may match nothing, so the stop event is checked per line
+                if _stopped(stop):
+                    return
+                record = self._parse(line)
+                url = record.get('url', '') if record else ''
+                if url and any(pattern in url.lower() for pattern in patterns):
+                    lead = lead_from_url(url, technology, 'Common Crawl')
+                    if lead and lead['domain'] not in domains:
+                        domains.add(lead['domain'])
+                        yield lead
+                        if len(domains) >= limit:
+                            return
+
+    def _parse(self, line: str) -> Optional[Dict[str, Any]]:
+        line = line.strip()
+        if not line:
+            return None
+        if not line.startswith('{'):
+            parts = line.split(' ', 2)
+            if len(parts) < 3:
+                return None
+            line = parts[2]
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+class LeadSourceRegistry:
+    """Named lead sources that TechStackFinder searches alongside its built-in ones"""
+
+    def __init__(self):
+        self._sources: Dict[str, LeadSource] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source: LeadSource):
+        """Add a source, replacing any source registered under the same name"""
+        with self._lock:
+            self._sources[name] = source
+
+    def unregister(self, name: str):
+        """Remove a source if it is registered"""
+        with self._lock:
+            self._sources.pop(name, None)
+
+    def sources(self) -> Dict[str, LeadSource]:
+        """Snapshot of the registered sources"""
+        with self._lock:
+            return dict(self._sources)
+
+    def load_directory(self, seeds_dir: Union[str, Path] = 'data/seeds',
+                       crawl_dir: Union[str, Path] = 'data/commoncrawl'):
+        """Register every CSV seed list and Common Crawl index file found on disk"""
+        for path in sorted(Path(seeds_dir).glob('*.csv')):
+            self.register(f'Seed - {path.name}', CsvSeedSource(path))
+        for path in sorted(Path(crawl_dir).glob('*')):
+            if path.is_file():
+                self.register(f'Common Crawl - {path.name}', CommonCrawlSource(path))
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+def get_lead_source_registry() -> LeadSourceRegistry:
+    """Get the process-wide lead source registry
+
+    Seed lists and crawl indexes are picked up from data/seeds and
+    data/commoncrawl; sitemap URLs come from the comma-separated
+    LEAD_SITEMAPS environment variable.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = LeadSourceRegistry()
+            _default_registry.load_directory()
+            for sitemap_url in [url.strip() for url in os.environ.get('LEAD_SITEMAPS', '').split(',') if url.strip()]:
+                _default_registry.register(f'Sitemap - {urlparse(sitemap_url).netloc}', SitemapSource(sitemap_url))
+        return _default_registry
@@ -0,0 +1,259 @@
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+LEAD_COLUMNS = [
+    'company_name', 'domain', 'tech_stack', 'email', 'email_score',
+    'email_type', 'company_size', 'funding_status', 'linkedin_url',
+    'industry', 'location', 'source'
+]
+
+INDEXED_COLUMNS = ['email_score', 'industry', 'tech_stack']
+
+# SQLite caps the number of bound parameters per statement
+_PARAM_CHUNK = 500
+
+class LeadStore:
+    """SQLite-backed lead database shared by every session and worker"""
+
+    def __init__(self, path: str = 'data/leads.db'):
+        self.path = path
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+
+        column_defs = ', '.join(
+            f"{col} {'INTEGER' if col == 'email_score' else 'TEXT'}"
+            for col in LEAD_COLUMNS if col != 'domain'
+        )
+        self._db.execute(
+            f'CREATE TABLE IF NOT EXISTS leads (domain TEXT PRIMARY KEY, {column_defs}, '
+            'created_at REAL, updated_at REAL)'
+        )
+        for col in INDEXED_COLUMNS:
+            self._db.execute(f'CREATE INDEX IF NOT EXISTS idx_leads_{col} ON leads ({col})')
+
+        # Every email found for a domain, so the best one can be re-picked without re-scraping
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS email_candidates (domain TEXT, email TEXT, source TEXT, '
+            'mx_valid INTEGER, found_at REAL, PRIMARY KEY (domain, email))'
+        )
+        self._db.commit()
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Insert leads; for domains that already exist, only columns given a value are replaced"""
+        now = time.time()
+        values = [
+            [row.get(col) for col in LEAD_COLUMNS] + [now, now]
+            for row in rows if row.get('domain')
+        ]
+        if not values:
+            return 0
+
+        columns = ', '.join(LEAD_COLUMNS)
+        placeholders = ', '.join('?' for _ in range(len(LEAD_COLUMNS) + 2))
+        # Re-finding a known domain must not wipe the email and enrichment found for it since
+        assignments = ', '.join(
+            f'{col} = COALESCE(excluded.{col}, leads.{col})' for col in LEAD_COLUMNS if col != 'domain'
+        )
+
+        with self._lock:
+            self._db.executemany(
+                f'INSERT INTO leads ({columns}, created_at, updated_at) VALUES ({placeholders}) '
+                f'ON CONFLICT(domain) DO UPDATE SET {assignments}, updated_at = excluded.updated_at',
+                values
+            )
+            self._db.commit()
+
+        return len(values)
+
+    def update(self, domain_to_fields: Dict[str, Dict[str, Any]]) -> int:
+        """Update fields of existing leads, batching rows that set the same columns"""
+        now = time.time()
+        batches: Dict[tuple, List[list]] = {}
+        for domain, fields in domain_to_fields.items():
+            keys = tuple(key for key in LEAD_COLUMNS if key in fields and key != 'domain')
+            if keys:
+                batches.setdefault(keys, []).append([fields[key] for key in keys] + [now, domain])
+
+        updated = 0
+        with self._lock:
+            for keys, values in batches.items():
+                assignments = ', '.join(f'{key} = ?' for key in keys)
+                cursor = self._db.executemany(
+                    f'UPDATE leads SET {assignments}, updated_at = ? WHERE domain = ?', values
+                )
+                updated += cursor.rowcount
+            self._db.commit()
+
+        return updated
+
+    def update_columns(self, domains: Sequence[str], columns: Dict[str, Sequence[Any]]) -> int:
+        """Update columns of existing leads from value sequences parallel to domains"""
+        keys = [key for key in LEAD_COLUMNS if key in columns and key != 'domain']
+        if not keys or not len(domains):
+            return 0
+
+        now = time.time()
+        assignments = ', '.join(f'{key} = ?' for key in keys)
+        values = zip(*(columns[key] for key in keys), [now] * len(domains), domains)
+        with self._lock:
+            cursor = self._db.executemany(
+                f'UPDATE leads SET {assignments}, updated_at = ? WHERE domain = ?', values
+            )
+            self._db.commit()
+
+        return cursor.rowcount
+
+    def existing_domains(self, domains: Iterable[str]) -> Set[str]:
+        """Return which of the given domains are already stored"""
+        domains = list(domains)
+        found = set()
+        with self._lock:
+            for i in range(0, len(domains), _PARAM_CHUNK):
+                chunk = domains[i:i + _PARAM_CHUNK]
+                placeholders = ', '.join('?' for _ in chunk)
+                rows = self._db.execute(
+                    f'SELECT domain FROM leads WHERE domain IN ({placeholders})', chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def query(self, where: str = '', params: Sequence[Any] = (), columns: Optional[List[str]] = None,
+              order_by: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, offset: int = 0) -> pd.DataFrame:
+        """Read a slice of leads as a DataFrame"""
+        columns = [col for col in (columns or LEAD_COLUMNS) if col in LEAD_COLUMNS]
+        sql = f"SELECT {', '.join(columns)} FROM leads"
+        if where:
+            sql += f' WHERE {where}'
+        if order_by in LEAD_COLUMNS:
+            sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += f' LIMIT {int(limit)} OFFSET {int(offset)}'
+
+        with self._lock:
+            return pd.read_sql_query(sql, self._db, params=list(params))
+
+    def iter_chunks(self, where: str = '', params: Sequence[Any] = (), columns: Optional[List[str]] = None,
+                    chunksize: int = 10000) -> Iterator[pd.DataFrame]:
+        """Yield matching leads in DataFrame chunks so exports never hold the whole table"""
+        columns = [col for col in (columns or LEAD_COLUMNS) if col in LEAD_COLUMNS]
+        read_columns = columns if 'domain' in columns else columns + ['domain']
+
+        # Page by primary key instead of OFFSET so every chunk is an index seek
+        last_domain = ''
+        while True:
+            conditions = f'({where}) AND domain > ?' if where else 'domain > ?'
+            chunk = self.query(conditions, list(params) + [last_domain], read_columns,
+                               order_by='domain', limit=chunksize)
+            if chunk.empty:
+                return
+            last_domain = chunk['domain'].iloc[-1]
+            yield chunk[columns]
+
+    def count(self, where: str = '', params: Sequence[Any] = ()) -> int:
+        """Count leads matching a filter"""
+        sql = 'SELECT COUNT(*) FROM leads' + (f' WHERE {where}' if where else '')
+        with self._lock:
+            return self._db.execute(sql, list(params)).fetchone()[0]
+
+    def count_distinct(self, column: str) -> int:
+        """Count distinct non-null values of a column"""
+        if column not in LEAD_COLUMNS:
+            return 0
+        with self._lock:
+            return self._db.execute(f'SELECT COUNT(DISTINCT {column}) FROM leads').fetchone()[0]
+
+    def value_counts(self, column: str, where: str = '', params: Sequence[Any] = (),
+                     limit: Optional[int] = None) -> Dict[Any, int]:
+        """Count leads per value of a column, most common first"""
+        if column not in LEAD_COLUMNS:
+            return {}
+
+        conditions = f'{column} IS NOT NULL' + (f' AND ({where})' if where else '')
+        sql = f'SELECT {column}, COUNT(*) AS n FROM leads WHERE {conditions} GROUP BY {column} ORDER BY n DESC'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+
+        with self._lock:
+            return dict(self._db.execute(sql, list(params)).fetchall())
+
+    def replace_candidates(self, domain_to_candidates: Dict[str, List[Dict[str, Any]]]) -> int:
+        """Replace the stored email candidates of each domain with its latest findings"""
+        now = time.time()
+        domains = list(domain_to_candidates)
+        values = [
+            (domain, candidate['email'], candidate.get('source'), int(bool(candidate.get('mx_valid'))), now)
+            for domain, candidates in domain_to_candidates.items()
+            for candidate in candidates if candidate.get('email')
+        ]
+
+        with self._lock:
+            for i in range(0, len(domains), _PARAM_CHUNK):
+                chunk = domains[i:i + _PARAM_CHUNK]
+                placeholders = ', '.join('?' for _ in chunk)
+                self._db.execute(f'DELETE FROM email_candidates WHERE domain IN ({placeholders})', chunk)
+            self._db.executemany(
+                'INSERT OR REPLACE INTO email_candidates (domain, email, source, mx_valid, found_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                values
+            )
+            self._db.commit()
+
+        return len(values)
+
+    def iter_candidates(self, chunksize: int = 10000) -> Iterator[pd.DataFrame]:
+        """Yield stored email candidates in chunks that never split a domain"""
+        last_domain = ''
+        while True:
+            with self._lock:
+                chunk = pd.read_sql_query(
+                    'SELECT domain, email, source, mx_valid FROM email_candidates WHERE domain IN '
+                    '(SELECT DISTINCT domain FROM email_candidates WHERE domain > ? ORDER BY domain LIMIT ?) '
+                    'ORDER BY domain',
+                    self._db, params=[last_domain, chunksize]
+                )
+            if chunk.empty:
+                return
+            last_domain = chunk['domain'].iloc[-1]
+            yield chunk
+
+    def count_candidates(self) -> int:
+        """Count stored email candidates"""
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM email_candidates').fetchone()[0]
+
+    def size_on_disk(self) -> int:
+        """Size of the database files in bytes"""
+        if self.path == ':memory:':
+            return 0
+        return sum(
+            os.path.getsize(self.path + suffix)
+            for suffix in ('', '-wal') if os.path.exists(self.path + suffix)
+        )
+
+    def clear(self):
+        """Delete every lead"""
+        with self._lock:
+            self._db.execute('DELETE FROM leads')
+            self._db.execute('DELETE FROM email_candidates')
+            self._db.commit()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_lead_store() -> LeadStore:
+    """Get the process-wide lead store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = LeadStore()
+        return _default_store
@@ -0,0 +1,90 @@
+import threading
+import time
+import dns.rdatatype
+import dns.resolver
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Tuple
+
+class MXResolver:
+    """Resolve MX records with a per-domain cache that honors record and negative TTLs"""
+
+    def __init__(self, negative_ttl: float = 300, error_ttl: float = 60,
+                 min_ttl: float = 60, max_ttl: float = 86400, lifetime: float = 5.0):
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.lifetime = lifetime
+
+        self._cache: Dict[str, Tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+
+    def has_mx(self, domain: str) -> bool:
+        """Check whether a domain has MX records, using the cache when possible"""
+        domain = domain.strip().lower().rstrip('.')
+        now = time.time()
+
+        with self._lock:
+            cached = self._cache.get(domain)
+            if cached and cached[1] > now:
+                return cached[0]
+
+        try:
+            answer = dns.resolver.resolve(domain, 'MX', lifetime=self.lifetime)
+            valid, ttl = True, answer.rrset.ttl
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+            valid, ttl = False, self._negative_ttl(e)
+        except Exception:
+            # Timeouts and server failures are only remembered briefly
+            valid, ttl = False, self.error_ttl
+
+        ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        with self._lock:
+            self._cache[domain] = (valid, time.time() + ttl)
+
+        return valid
+
+    def resolve_mx_many(self, domains: Iterable[str], max_workers: int = 16) -> Dict[str, bool]:
+        """Resolve MX records for many domains concurrently, one lookup per unique domain"""
+        unique_domains = list(dict.fromkeys(
+            domain.strip().lower().rstrip('.') for domain in domains if domain
+        ))
+        if not unique_domains:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_domains)))) as executor:
+            results = executor.map(self.has_mx, unique_domains)
+            return dict(zip(unique_domains, results))
+
+    def clear(self):
+        """Forget every cached answer"""
+        with self._lock:
+            self._cache.clear()
+
+    def _negative_ttl(self, error: Exception) -> float:
+        """Read the negative caching TTL from the SOA record of a failed lookup"""
+        try:
+            if isinstance(error, dns.resolver.NXDOMAIN):
+                responses = list(error.responses().values())
+            else:
+                responses = [error.response()]
+
+            for response in responses:
+                for rrset in response.authority:
+                    if rrset.rdtype == dns.rdatatype.SOA:
+                        return min(rrset.ttl, rrset[0].minimum)
+        except Exception:
+            pass
+
+        return self.negative_ttl
+
+_default_resolver = None
+_default_resolver_lock = threading.Lock()
+
+def get_mx_resolver() -> MXResolver:
+    """Get the process-wide MX resolver cache"""
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = MXResolver()
+        return _default_resolver
@@ -0,0 +1,189 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+import lxml.html
+import trafilatura
+from utils.page_cache import normalize_url
+
+# Elements whose text never shows up on the rendered page
+_HIDDEN_TAGS = frozenset(['script', 'style', 'noscript', 'template', 'svg'])
+
+_WHITESPACE = re.compile(r'\s+')
+
+class PageAnalysis:
+    """One HTML document parsed once with lxml and shared by every extractor
+
+    Each view (visible text, main article text, links, scripts, meta tags)
+    is computed on first use from the same parse tree and then kept.
+    """
+
+    def __init__(self, html: str, url: str = '', headers: Optional[Dict[str, str]] = None):
+        self.html = html or ''
+        self.url = url
+        self.headers = headers or {}
+
+        self._tree = None
+        self._parsed = False
+        self._views: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tree(self) -> Optional[lxml.html.HtmlElement]:
+        """The lxml parse tree, or None when the document cannot be parsed"""
+        with self._lock:
+            if not self._parsed:
+                try:
+                    self._tree = lxml.html.fromstring(self.html) if self.html.strip() else None
+                except Exception:
+                    self._tree = None
+                self._parsed = True
+            return self._tree
+
+    @property
+    def html_lower(self) -> str:
+        """Lowercased raw HTML for substring checks"""
+        return self.view('html_lower', lambda: self.html.lower())
+
+    @property
+    def text(self) -> str:
+        """All visible text, whitespace collapsed"""
+        return self.view('text', self._visible_text)
+
+    @property
+    def main_text(self) -> str:
+        """Main article text as extracted by trafilatura, falling back to the visible text"""
+        return self.view('main_text', lambda: self._trafilatura_text() or self.text)
+
+    @property
+    def title(self) -> str:
+        return self.view('title', lambda: self._first_text('//title'))
+
+    @property
+    def links(self) -> List[Tuple[str, str]]:
+        """(absolute href, anchor text) for every link on the page"""
+        return self.view('links', self._links)
+
+    @property
+    def scripts(self) -> List[str]:
+        """Absolute src URLs of external scripts"""
+        return self.view('scripts', lambda: [
+            urljoin(self.url, src) for src in self._xpath('//script/@src')
+        ])
+
+    @property
+    def inline_scripts(self) -> List[str]:
+        """Bodies of inline scripts"""
+        return self.view('inline_scripts', lambda: [
+            script.text for script in self._xpath('//script[not(@src)]') if script.text
+        ])
+
+    @property
+    def meta(self) -> Dict[str, str]:
+        """Meta tag contents keyed by lowercase name, property or http-equiv"""
+        return self.view('meta', self._meta)
+
+    def view(self, name: str, build):
+        """Compute a derived view once and remember it; other modules may add their own"""
+        if name not in self._views:
+            self._views[name] = build()
+        return self._views[name]
+
+    def _xpath(self, path: str) -> list:
+        tree = self.tree
+        return tree.xpath(path) if tree is not None else []
+
+    def _first_text(self, path: str) -> str:
+        nodes = self._xpath(path)
+        return _WHITESPACE.sub(' ', nodes[0].text_content()).strip() if nodes else ''
+
+    def _visible_text(self) -> str:
+        tree = self.tree
+        if tree is None:
+            return ''
+
+        parts = []
+        for element in tree.iter():
+            if not isinstance(element.tag, str):
+                # Comments and processing instructions only contribute their tail
+                if element.tail:
+                    parts.append(element.tail)
+                continue
+            if element.tag not in _HIDDEN_TAGS and element.text:
+                parts.append(element.text)
+            if element.tail:
+                parts.append(element.tail)
+
+        return _WHITESPACE.sub(' ', ' '.join(parts)).strip()
+
+    def _trafilatura_text(self) -> Optional[str]:
+        tree = self.tree
+        if tree is None:
+            return None
+        try:
+            # trafilatura works on a copy, so the shared tree is left untouched
+            return trafilatura.extract(tree)
+        except Exception:
+            return None
+
+    def _links(self) -> List[Tuple[str, str]]:
+        links = []
+        for anchor in self._xpath('//a[@href]'):
+            href = anchor.get('href', '').strip()
+            if href and not href.startswith(('#', 'javascript:')):
+                links.append((urljoin(self.url, href), _WHITESPACE.sub(' ', anchor.text_content()).strip()))
+        return links
+
+    def _meta(self) -> Dict[str, str]:
+        meta = {}
+        for tag in self._xpath('//meta[@content]'):
+            key = tag.get('name') or tag.get('property') or tag.get('http-equiv')
+            if key:
+                meta.setdefault(key.lower(), tag.get('content', '').strip())
+        return meta
+
+class PageAnalyzer:
+    """Small LRU of parsed pages so every service reuses one parse per download"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._pages: 'OrderedDict[str, PageAnalysis]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, html: str, url: str = '', headers: Optional[Dict[str, str]] = None) -> PageAnalysis:
+        """Get the shared analysis of a document, parsing it only the first time"""
+        key = normalize_url(url) if url else ''
+
+        with self._lock:
+            page = self._pages.get(key) if key else None
+            # The page cache hands out the same string object, so this is usually an identity check
+            if page is not None and page.html == html:
+                self._pages.move_to_end(key)
+                if headers and not page.headers:
+                    page.headers = headers
+                return page
+
+            page = PageAnalysis(html, url, headers)
+            if key:
+                self._pages[key] = page
+                while len(self._pages) > self.max_entries:
+                    self._pages.popitem(last=False)
+
+        return page
+
+    def clear(self):
+        """Forget every parsed page"""
+        with self._lock:
+            self._pages.clear()
+
+_default_analyzer = None
+_default_analyzer_lock = threading.Lock()
+
+def get_page_analyzer() -> PageAnalyzer:
+    """Get the process-wide page analyzer"""
+    global _default_analyzer
+    with _default_analyzer_lock:
+        if _default_analyzer is None:
+            _default_analyzer = PageAnalyzer()
+        return _default_analyzer
@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so equivalent addresses share one cache entry"""
+    url = url.strip()
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+
+    # Drop default ports
+    if parts.port and not ((scheme == 'https' and parts.port == 443) or (scheme == 'http' and parts.port == 80)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, host, path, parts.query, ''))
+
+class PageCache:
+    """Shared page-fetch cache with a TTL, an in-memory LRU and an optional SQLite store"""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 256, max_bytes: int = 50 * 1024 * 1024,
+                 disk_path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._memory: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        # One lock per URL being downloaded so concurrent callers share a single fetch
+        self._inflight: Dict[str, threading.Lock] = {}
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, fetched_at REAL, body BLOB)'
+            )
+            self._db.commit()
+
+    def get(self, url: str) -> Optional[str]:
+        """Return a cached page body if it is still fresh"""
+        key = normalize_url(url)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                fetched_at, body = entry
+                if now - fetched_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    return body
+                self._evict(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT fetched_at, body FROM pages WHERE url = ?', (key,)
+                ).fetchone()
+                if row and now - row[0] < self.ttl:
+                    body = zlib.decompress(row[1]).decode('utf-8')
+                    self._remember(key, row[0], body)
+                    return body
+
+        return None
+
+    def set(self, url: str, body: str):
+        """Store a page body in memory and, if configured, on disk"""
+        key = normalize_url(url)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, body)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO pages (url, fetched_at, body) VALUES (?, ?, ?)',
+                    (key, now, zlib.compress(body.encode('utf-8')))
+                )
+                self._db.commit()
+
+    def fetch(self, url: str, loader: Callable[[str], Optional[str]]) -> Optional[str]:
+        """Return a page from the cache, downloading it with loader on a miss"""
+        body = self.get(url)
+        if body is not None:
+            return body
+
+        key = normalize_url(url)
+        with self._lock:
+            inflight = self._inflight.setdefault(key, threading.Lock())
+
+        with inflight:
+            # Another thread may have downloaded it while we waited
+            body = self.get(url)
+            if body is None:
+                body = loader(url)
+                if body:
+                    self.set(url, body)
+
+        with self._lock:
+            self._inflight.pop(key, None)
+
+        return body
+
+    def clear(self):
+        """Remove every cached page"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._db is not None:
+                self._db.execute('DELETE FROM pages')
+                self._db.commit()
+
+    def _remember(self, key: str, fetched_at: float, body: str):
+        """Insert into the memory LRU and evict the oldest entries past the limits"""
+        self._evict(key)
+        self._memory[key] = (fetched_at, body)
+        self._memory_bytes += len(body)
+
+        while self._memory and (len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes):
+            oldest_key = next(iter(self._memory))
+            self._evict(oldest_key)
+
+    def _evict(self, key: str):
+        """Drop one entry from the memory LRU"""
+        entry = self._memory.pop(key, None)
+        if entry:
+            self._memory_bytes -= len(entry[1])
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_page_cache() -> PageCache:
+    """Get the process-wide page cache shared by all service classes"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PageCache()
+        return _default_cache
@@ -0,0 +1,228 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+import lxml.etree
+from utils.page_cache import PageCache, get_page_cache
+from utils.http_fetcher import HttpFetcher, get_http_fetcher
+from utils.page_analysis import PageAnalysis, PageAnalyzer, get_page_analyzer
+from utils.timeouts import current_budget
+
+# Keywords that mark a page's topic in its path or link text, by weight
+TOPIC_KEYWORDS = {
+    'contact': {'contact': 3, 'get-in-touch': 3, 'kontakt': 3, 'impressum': 2, 'imprint': 2, 'reach-us': 2, 'support': 1},
+    'about': {'about': 3, 'company': 2, 'who-we-are': 2, 'our-story': 2, 'mission': 1, 'story': 1},
+    'team': {'team': 3, 'leadership': 2, 'management': 2, 'founders': 2, 'people': 2, 'staff': 2},
+}
+
+# Tried when a reachable site links to nothing on a topic at all
+FALLBACK_PATHS = {'contact': '/contact', 'about': '/about'}
+
+# Links in these parts of the homepage are site navigation
+_NAV_LINKS = '//nav//a[@href] | //header//a[@href] | //footer//a[@href]'
+
+NAV_BONUS = 2
+SITEMAP_BONUS = 1
+
+# Pages deeper than this are articles rather than site sections
+MAX_DEPTH = 2
+
+class DiscoveredPage(NamedTuple):
+    """A page of a site worth fetching, with its topic and how well it matched"""
+    url: str
+    topic: str
+    score: float
+
+def sitemap_urls(sitemap_url: str, load: Callable[[str], Optional[str]],
+                 max_urls: int = 50, max_sitemaps: Optional[int] = None) -> Iterator[str]:
+    """Walk a sitemap, following nested sitemap indexes, up to max_urls page URLs"""
+    pending, seen, urls = [sitemap_url], set(), 0
+    while pending and urls < max_urls:
+        if max_sitemaps is not None and len(seen) >= max_sitemaps:
+            return
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+
+        text = load(sitemap_url)
+        if not text:
+            continue
+        try:
+            root = lxml.etree.fromstring(text.encode('utf-8'), parser=lxml.etree.XMLParser(recover=True))
+        except lxml.etree.XMLSyntaxError:
+            continue
+        if root is None:
+            continue
+
+        locations = [loc.text.strip() for loc in root.iter('{*}loc') if loc.text]
+        if lxml.etree.QName(root).localname == 'sitemapindex':
+            pending.extend(urljoin(sitemap_url, loc) for loc in locations)
+            continue
+
+        for loc in locations:
+            if urls >= max_urls:
+                break
+            urls += 1
+            yield urljoin(sitemap_url, loc)
+
+def page_topic(url: str, text: str = '') -> Optional[Tuple[str, float]]:
+    """Score a URL (and its link text) against every topic, returning the best (topic, score)"""
+    path = urlparse(url).path.lower().strip('/')
+    segments = [segment for segment in path.split('/') if segment]
+    if not segments or len(segments) > MAX_DEPTH:
+        return None
+
+    words = path.replace('_', '-').replace('.html', '').replace('.php', '')
+
+    # Only short labels like "Contact us" name a page; sentences merely mention topics
+    text = '-'.join(text.lower().split()) if len(text.split()) <= 3 else ''
+
+    best = None
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        weight = max((weight for keyword, weight in keywords.items() if keyword in words or keyword in text), default=0)
+        if weight and (best is None or weight > best[1]):
+            best = (topic, weight)
+
+    if best is None:
+        return None
+
+    # Prefer /contact over /en/company/contact-form-2024
+    return best[0], best[1] - 0.5 * (len(segments) - 1) - len(path) / 100
+
+class PageDiscovery:
+    """Find a site's contact, about and team pages instead of guessing their paths
+
+    The homepage's links are read first; robots.txt and the sitemap are
+    only read when the homepage leaves a topic uncovered. Results are
+    cached per domain and shared by every service class.
+    """
+
+    def __init__(self, page_cache: Optional[PageCache] = None, fetcher: Optional[HttpFetcher] = None,
+                 page_analyzer: Optional[PageAnalyzer] = None, ttl: float = 86400,
+                 max_sitemap_urls: int = 500, max_sitemaps: int = 3):
+        self.page_cache = page_cache or get_page_cache()
+        self.fetcher = fetcher or get_http_fetcher()
+        self.page_analyzer = page_analyzer or get_page_analyzer()
+        self.ttl = ttl
+        self.max_sitemap_urls = max_sitemap_urls
+        self.max_sitemaps = max_sitemaps
+
+        self._discovered: Dict[str, Tuple[float, Optional[str], List[DiscoveredPage]]] = {}
+        self._lock = threading.Lock()
+
+        # One lock per domain being discovered so concurrent callers share the work
+        self._inflight: Dict[str, threading.Lock] = {}
+
+    def homepage(self, domain: str) -> Optional[str]:
+        """The homepage URL that answered, or None when the site is unreachable"""
+        return self._lookup(domain)[0]
+
+    def discover(self, domain: str) -> List[DiscoveredPage]:
+        """Every page worth fetching on a domain, best first"""
+        return self._lookup(domain)[1]
+
+    def pages(self, domain: str, topics: Iterable[str], limit: int = 5) -> List[str]:
+        """URLs of the best pages on the given topics, best first"""
+        topics = set(topics)
+        return [page.url for page in self.discover(domain) if page.topic in topics][:limit]
+
+    def clear(self):
+        """Forget every discovered domain"""
+        with self._lock:
+            self._discovered.clear()
+
+    def _lookup(self, domain: str) -> Tuple[Optional[str], List[DiscoveredPage]]:
+        domain = domain.lower().strip()
+        with self._lock:
+            entry = self._discovered.get(domain)
+            if entry and time.time() - entry[0] < self.ttl:
+                return entry[1], entry[2]
+            inflight = self._inflight.setdefault(domain, threading.Lock())
+
+        with inflight:
+            with self._lock:
+                entry = self._discovered.get(domain)
+            if not entry or time.time() - entry[0] >= self.ttl:
+                homepage, pages = self._discover(domain)
+                entry = (time.time(), homepage, pages)
+
+                # A discovery cut short by its caller's time budget is not remembered
+                budget = current_budget()
+                if budget is None or not budget.expired:
+                    with self._lock:
+                        self._discovered[domain] = entry
+
+        with self._lock:
+            self._inflight.pop(domain, None)
+
+        return entry[1], entry[2]
+
+    def _fetch(self, url: str) -> Optional[str]:
+        return self.page_cache.fetch(url, self.fetcher.fetch_text)
+
+    def _discover(self, domain: str) -> Tuple[Optional[str], List[DiscoveredPage]]:
+        """Read the homepage, then robots.txt and the sitemap if topics are still missing"""
+        homepage, html = None, None
+        for url in (f"https://{domain}", f"https://www.{domain}"):
+            html = self._fetch(url)
+            if html:
+                homepage = url
+                break
+
+        if homepage is None:
+            return None, []
+
+        hosts = {domain, f"www.{domain}"}
+        scores: Dict[str, Tuple[str, float]] = {}
+
+        def consider(url: str, text: str = '', bonus: float = 0):
+            url = url.split('#')[0]
+            if urlparse(url).netloc.lower() not in hosts:
+                return
+            match = page_topic(url, text)
+            if match and (url not in scores or match[1] + bonus > scores[url][1]):
+                scores[url] = (match[0], match[1] + bonus)
+
+        page = self.page_analyzer.analyze(html, homepage)
+        nav = set(page.view('nav_links', lambda: _nav_links(page)))
+        for href, text in page.links:
+            consider(href, text, NAV_BONUS if href in nav else 0)
+
+        if {topic for topic, _ in scores.values()} != set(TOPIC_KEYWORDS):
+            robots = RobotFileParser()
+            robots.parse((self._fetch(urljoin(homepage, '/robots.txt')) or '').splitlines())
+
+            for sitemap in robots.site_maps() or [urljoin(homepage, '/sitemap.xml')]:
+                for url in sitemap_urls(sitemap, self._fetch, self.max_sitemap_urls, self.max_sitemaps):
+                    consider(url, bonus=SITEMAP_BONUS)
+
+            scores = {url: match for url, match in scores.items() if robots.can_fetch('*', url)}
+
+        found = {topic for topic, _ in scores.values()}
+        for topic, path in FALLBACK_PATHS.items():
+            if topic not in found:
+                scores[urljoin(homepage, path)] = (topic, 0)
+
+        pages = [DiscoveredPage(url, topic, score) for url, (topic, score) in scores.items()]
+        pages.sort(key=lambda page: page.score, reverse=True)
+        return homepage, pages
+
+def _nav_links(page: PageAnalysis) -> List[str]:
+    """Absolute URLs of the homepage's navigation, header and footer links"""
+    tree = page.tree
+    if tree is None:
+        return []
+    return [urljoin(page.url, anchor.get('href', '').strip()) for anchor in tree.xpath(_NAV_LINKS)]
+
+_default_discovery = None
+_default_discovery_lock = threading.Lock()
+
+def get_page_discovery() -> PageDiscovery:
+    """Get the process-wide page discovery, shared by every service class"""
+    global _default_discovery
+    with _default_discovery_lock:
+        if _default_discovery is None:
+            _default_discovery = PageDiscovery()
+        return _default_discovery
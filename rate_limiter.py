@@ -0,0 +1,87 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+def host_key(url: str) -> str:
+    """Reduce a URL or host name to the host used for rate limiting"""
+    host = urlparse(url).netloc if '://' in url else url
+    host = host.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header (seconds or HTTP date) to seconds from now"""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostRateLimiter:
+    """Token bucket per host, so only requests to the same host wait on each other"""
+
+    def __init__(self, rate: float = 1.0, burst: int = 2, max_retry_after: float = 120,
+                 host_limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.max_retry_after = max_retry_after
+
+        # LinkedIn is much stricter than ordinary company sites
+        self.host_limits = {'linkedin.com': (0.5, 1)}
+        self.host_limits.update(host_limits or {})
+
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url: str, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take a token for the URL's host and return how long to wait before using it
+
+        When the wait would reach max_wait no token is taken and None is returned.
+        """
+        host = host_key(url)
+        rate, burst = self.host_limits.get(host, (self.rate, self.burst))
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, last = self._buckets.get(host, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - last) * rate) - 1
+
+            wait = -tokens / rate if tokens < 0 else 0.0
+            wait = max(wait, self._blocked_until.get(host, 0.0) - now)
+            if max_wait is not None and wait >= max_wait:
+                return None
+
+            self._buckets[host] = (tokens, now)
+            return wait
+
+    def acquire(self, url: str):
+        """Block until a request to the URL's host is allowed"""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def defer(self, url: str, seconds: float):
+        """Hold back every request to a host, e.g. after a Retry-After response"""
+        host = host_key(url)
+        until = time.monotonic() + min(seconds, self.max_retry_after)
+        with self._lock:
+            self._blocked_until[host] = max(until, self._blocked_until.get(host, 0.0))
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Get the process-wide per-host rate limiter"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = HostRateLimiter()
+        return _default_limiter
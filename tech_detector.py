@@ -0,0 +1,146 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+from utils.page_analysis import PageAnalysis
+
+# Where a signature was seen and how strongly that alone suggests the technology
+EVIDENCE_WEIGHTS = {
+    'header': 0.9,
+    'meta': 0.9,
+    'cookie': 0.8,
+    'script': 0.7,
+    'html': 0.4,
+}
+
+# Signatures per technology; html patterns are the original verify_technology patterns
+SIGNATURES = {
+    'shopify': {
+        'html': ['shopify', 'shop.js', 'cdn.shopify.com', 'myshopify.com'],
+        'script': ['cdn.shopify.com', 'shopifycloud'],
+        'header': ['x-shopid', 'x-shopify-stage', 'x-sorting-hat-shopid'],
+        'cookie': ['_shopify_y', '_shopify_s', 'cart_sig'],
+        'meta': ['shopify'],
+    },
+    'react': {
+        'html': ['react', 'react-dom', 'jsx', '__REACT_DEVTOOLS__', 'data-reactroot'],
+        'script': ['react.production.min.js', 'react-dom'],
+    },
+    'wordpress': {
+        'html': ['wp-content', 'wordpress', 'wp-json', '/wp/'],
+        'script': ['wp-includes', 'wp-content'],
+        'header': ['x-pingback'],
+        'cookie': ['wordpress_logged_in', 'wp-settings'],
+        'meta': ['wordpress'],
+    },
+    'vue': {
+        'html': ['vue.js', 'vue.min.js', '__vue__', 'v-if', 'v-for', 'data-v-'],
+        'script': ['vue.js', 'vue.min.js', 'vue.runtime'],
+    },
+    'angular': {
+        'html': ['angular', 'ng-app', 'ng-controller', 'angularjs', 'ng-version'],
+        'script': ['angular.js', 'angular.min.js'],
+    },
+    'django': {
+        'html': ['django', 'csrfmiddlewaretoken', 'staticfiles'],
+        'cookie': ['csrftoken', 'django_language'],
+    },
+    'nextjs': {
+        'html': ['next.js', '_next/', 'next-head', '__NEXT_DATA__'],
+        'script': ['/_next/static/'],
+        'header': ['x-nextjs-cache', 'x-nextjs-prerender', 'x-powered-by: next.js'],
+    },
+}
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a regex whose alternation is factored into a prefix trie
+
+    Shared prefixes are matched once, so the cost of trying a position grows
+    with the length of the longest signature instead of their number.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    return build(trie)
+
+class TechDetector:
+    """Detect every known technology on a page in one pass per evidence source
+
+    Each source (HTML, script URLs, meta generator, header lines, cookie
+    names) is scanned once with a single compiled trie regex covering all
+    signatures; matched literals map back to their technologies.
+    """
+
+    def __init__(self, signatures: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        self.signatures = signatures or SIGNATURES
+
+        # literal -> technologies, per evidence source
+        self._owners: Dict[str, Dict[str, Set[str]]] = {}
+        self._patterns: Dict[str, re.Pattern] = {}
+        for source in EVIDENCE_WEIGHTS:
+            owners: Dict[str, Set[str]] = {}
+            for tech, by_source in self.signatures.items():
+                for literal in by_source.get(source, []):
+                    owners.setdefault(literal.lower(), set()).add(tech)
+            if owners:
+                self._owners[source] = owners
+                self._patterns[source] = re.compile(_trie_regex(owners), re.IGNORECASE)
+
+    def detect(self, page: PageAnalysis) -> Dict[str, float]:
+        """Return {technology: confidence} for everything detected on the page"""
+        # Headers can be attached to a cached page later, which adds evidence
+        view_name = 'technologies+headers' if page.headers else 'technologies'
+        return page.view(view_name, lambda: self._detect(page))
+
+    def _detect(self, page: PageAnalysis) -> Dict[str, float]:
+        headers = {key.lower(): value for key, value in page.headers.items()}
+        cookie_header = headers.get('set-cookie', '')
+
+        sources = {
+            'html': page.html,
+            'script': '\n'.join(page.scripts),
+            'meta': page.meta.get('generator', ''),
+            # Header names alone and "name: value" lines, so both kinds of signature match
+            'header': '\n'.join(f"{key}: {value}" for key, value in headers.items()),
+            'cookie': '\n'.join(part.split('=', 1)[0].strip() for part in re.split(r'[;,]', cookie_header)),
+        }
+
+        evidence: Dict[str, Dict[str, Set[str]]] = {}
+        for source, text in sources.items():
+            pattern = self._patterns.get(source)
+            if pattern is None or not text:
+                continue
+            for match in set(pattern.findall(text)):
+                for tech in self._owners[source].get(match.lower(), ()):
+                    evidence.setdefault(tech, {}).setdefault(source, set()).add(match.lower())
+
+        # Independent pieces of evidence combine as 1 - product of their misses
+        confidences = {}
+        for tech, by_source in evidence.items():
+            miss = 1.0
+            for source, literals in by_source.items():
+                miss *= (1 - EVIDENCE_WEIGHTS[source]) ** len(literals)
+            confidences[tech] = round(1 - miss, 3)
+
+        return dict(sorted(confidences.items(), key=lambda item: item[1], reverse=True))
+
+_default_detector = None
+_default_detector_lock = threading.Lock()
+
+def get_tech_detector() -> TechDetector:
+    """Get the process-wide technology detector"""
+    global _default_detector
+    with _default_detector_lock:
+        if _default_detector is None:
+            _default_detector = TechDetector()
+        return _default_detector
@@ -1,82 +1,181 @@
+import queue
 import requests
-import re
+import threading
 import time
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
 import streamlit as st
-from urllib.parse import urljoin, urlparse
-import trafilatura
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from urllib.parse import urlparse
+from utils.page_cache import PageCache, get_page_cache
+from utils.http_fetcher import HttpFetcher, get_http_fetcher
+from utils.page_analysis import PageAnalysis, PageAnalyzer, get_page_analyzer
+from utils.tech_detector import TechDetector, get_tech_detector
+from utils.github_search import GitHubSearch, get_github_search
+from utils.lead_sources import (LeadSource, LeadSourceRegistry, company_name_from_url,
+                                get_lead_source_registry, is_valid_website, start_source)
 
 class TechStackFinder:
     """Find companies using specific technology stacks"""
     
-    def __init__(self):
+    def __init__(self, page_cache: Optional[PageCache] = None,
+                 fetcher: Optional[HttpFetcher] = None,
+                 page_analyzer: Optional[PageAnalyzer] = None,
+                 tech_detector: Optional[TechDetector] = None,
+                 sources: Optional[LeadSourceRegistry] = None,
+                 github: Optional[GitHubSearch] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        
+        # Pages already downloaded by any service class are read from here
+        self.page_cache = page_cache or get_page_cache()
+        
+        # Shared keep-alive connection pool for every page download
+        self.fetcher = fetcher or get_http_fetcher()
+        
+        # Each downloaded page is parsed once and reused by every extractor
+        self.page_analyzer = page_analyzer or get_page_analyzer()
+        
+        # Every technology signature is checked in one pass over a page
+        self.tech_detector = tech_detector or get_tech_detector()
+        
+        # Extra lead sources searched alongside the built-in ones
+        self.sources = sources or get_lead_source_registry()
+        
+        # Paginated GitHub search with cached, revalidated responses
+        self.github = github or get_github_search()
     
-    def find_by_technology(self, technology: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def find_by_technology(self, technology: str, limit: int = 10,
+                           source_timeout: float = 15.0) -> List[Dict[str, Any]]:
         """Find companies using a specific technology"""
         results = []
-        
-        # Try multiple sources
         try:
-            # Method 1: Search GitHub for websites using the technology
-            github_results = self._search_github_sites(technology, limit // 2)
-            results.extend(github_results)
-            
-            # Method 2: Search for technology-specific showcases
-            showcase_results = self._search_technology_showcases(technology, limit // 2)
-            results.extend(showcase_results)
-            
+            results.extend(self.stream_by_technology(technology, limit, source_timeout))
         except Exception as e:
             st.error(f"Error finding companies: {str(e)}")
         
-        return results[:limit]
+        return results
+    
+    def stream_by_technology(self, technology: str, limit: int = 10,
+                             source_timeout: float = 15.0) -> Iterator[Dict[str, Any]]:
+        """Yield unique companies using a technology as soon as any source finds them
+
+        Each source may run for source_timeout seconds; one that runs out of
+        time is cut off on its own while the other sources keep going.
+        """
+        # Method 1: Search GitHub for websites using the technology
+        # Method 2: Search for technology-specific showcases
+        # Method 3: Any source registered with the lead source registry
+        sources = {
+            'GitHub': self._search_github_sites,
+            'Showcases': self._search_technology_showcases,
+            **self.sources.sources()
+        }
+        
+        # Each source is drained on its own thread into one queue, so a slow
+        # source never holds back leads another has already found
+        leads = queue.Queue()
+        stops = {name: threading.Event() for name in sources}
+        started = {}
+        
+        def drain(name: str, source: LeadSource):
+            # Every source gets source_timeout of its own, counted from when it starts
+            started[name] = time.monotonic()
+            stop = stops[name]
+            try:
+                for lead in start_source(source, technology, limit, stop):
+                    if stop.is_set():
+                        break
+                    leads.put((name, lead, None))
+            except Exception as e:
+                leads.put((name, None, e))
+            finally:
+                leads.put((name, None, None))
+        
+        ctx = get_script_run_ctx(suppress_warning=True)
+        initializer = (lambda: add_script_run_ctx(ctx=ctx)) if ctx else None
+        executor = ThreadPoolExecutor(max_workers=len(sources), initializer=initializer)
+        submitted = time.monotonic()
+        for name, source in sources.items():
+            executor.submit(drain, name, source)
+        
+        running = set(sources)
+        seen = set()
+        try:
+            while running:
+                deadlines = {name: started.get(name, submitted) + source_timeout for name in running}
+                try:
+                    name, lead, error = leads.get(timeout=max(0, min(deadlines.values()) - time.monotonic()))
+                except queue.Empty:
+                    # Only the sources out of time are cut off; the others keep going
+                    now = time.monotonic()
+                    expired = sorted(name for name in running if started.get(name, submitted) + source_timeout <= now)
+                    for name in expired:
+                        stops[name].set()
+                        running.discard(name)
+                    if expired:
+                        st.warning(f"Gave up waiting for {', '.join(expired)} after {source_timeout:g}s")
+                    continue
+                
+                # Leads arriving from a source after it was cut off are dropped
+                if name not in running:
+                    continue
+                
+                if lead is None:
+                    running.discard(name)
+                    if error is not None:
+                        st.warning(f"{name} search failed: {str(error)}")
+                    continue
+                
+                if lead['domain'] not in seen:
+                    seen.add(lead['domain'])
+                    yield lead
+                    if len(seen) >= limit:
+                        break
+        finally:
+            # Slow sources are told to stop and abandoned rather than waited for
+            for stop in stops.values():
+                stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def _search_github_sites(self, technology: str, limit: int) -> List[Dict[str, Any]]:
+    def _search_github_sites(self, technology: str, limit: int,
+                             stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
         """Search GitHub for sites using the technology"""
-        results = []
+        domains = set()
         
         try:
-            # Search for repositories with the technology and look for live sites
-            search_url = f"https://api.github.com/search/repositories"
-            params = {
-                'q': f'{technology} language:javascript',
-                'sort': 'stars',
-                'order': 'desc',
-                'per_page': limit * 2  # Get more to filter for actual sites
-            }
-            
-            response = self.session.get(search_url, params=params)
-            if response.status_code == 200:
-                data = response.json()
+            # Page through repositories with the technology and look for live sites
+            for repo in self.github.search_repositories(f'{technology} language:javascript'):
+                if stop is not None and stop.is_set():
+                    break
                 
-                for repo in data.get('items', [])[:limit * 2]:
-                    # Look for homepage URL
-                    homepage = repo.get('homepage')
-                    if homepage and self._is_valid_website(homepage):
-                        domain = urlparse(homepage).netloc
-                        
-                        results.append({
-                            'company_name': self._extract_company_name(homepage),
-                            'domain': domain,
-                            'tech_stack': technology,
-                            'source': f'GitHub - {repo.get("name", "")}'
-                        })
-                        
-                        if len(results) >= limit:
-                            break
+                # Look for homepage URL
+                homepage = repo.get('homepage')
+                if homepage and self._is_valid_website(homepage):
+                    domain = urlparse(homepage).netloc
+                    if domain in domains:
+                        continue
+                    domains.add(domain)
+                    
+                    yield {
+                        'company_name': self._extract_company_name(homepage),
+                        'domain': domain,
+                        'tech_stack': technology,
+                        'source': f'GitHub - {repo.get("name", "")}'
+                    }
+                    
+                    if len(domains) >= limit:
+                        break
             
         except Exception as e:
             st.warning(f"GitHub search failed: {str(e)}")
-        
-        return results
     
-    def _search_technology_showcases(self, technology: str, limit: int) -> List[Dict[str, Any]]:
+    def _search_technology_showcases(self, technology: str, limit: int,
+                                     stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
         """Search technology-specific showcases and directories"""
-        results = []
+        found = 0
         
         # Technology-specific showcase URLs
         showcase_urls = {
@@ -97,32 +196,31 @@ class TechStackFinder:
         for tech_key, url in showcase_urls.items():
             if tech_key in tech_lower or tech_lower in tech_key:
                 try:
-                    showcase_results = self._scrape_showcase_page(url, technology, limit)
-                    results.extend(showcase_results)
+                    for result in self._scrape_showcase_page(url, technology, limit):
+                        found += 1
+                        yield result
                     break
                 except Exception as e:
                     st.warning(f"Showcase scraping failed for {tech_key}: {str(e)}")
         
         # If no specific showcase found, do a general web search
-        if not results:
-            results = self._general_web_search(technology, limit)
-        
-        return results[:limit]
+        if not found and not (stop is not None and stop.is_set()):
+            yield from self._general_web_search(technology, limit)
     
-    def _scrape_showcase_page(self, url: str, technology: str, limit: int) -> List[Dict[str, Any]]:
+    def _scrape_showcase_page(self, url: str, technology: str, limit: int) -> Iterator[Dict[str, Any]]:
         """Scrape a technology showcase page for websites"""
-        results = []
+        found = 0
         
         try:
-            response = self.session.get(url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+            page = self.fetcher.fetch(url)
+            if not page:
+                raise Exception(f"could not download {url}")
+            
+            if page['status'] == 200:
+                analysis = self.page_analyzer.analyze(page['text'], page['url'], page['headers'])
                 
                 # Look for links that appear to be external websites
-                links = soup.find_all('a', href=True)
-                
-                for link in links:
-                    href = link.get('href')
+                for href, _ in analysis.links:
                     if self._is_valid_website(href):
                         domain = urlparse(href).netloc
                         
@@ -130,25 +228,22 @@ class TechStackFinder:
                         if domain != urlparse(url).netloc:
                             company_name = self._extract_company_name(href)
                             
-                            results.append({
+                            yield {
                                 'company_name': company_name,
                                 'domain': domain,
                                 'tech_stack': technology,
                                 'source': f'Showcase - {urlparse(url).netloc}'
-                            })
+                            }
                             
-                            if len(results) >= limit:
+                            found += 1
+                            if found >= limit:
                                 break
             
         except Exception as e:
             raise Exception(f"Failed to scrape showcase: {str(e)}")
-        
-        return results
     
-    def _general_web_search(self, technology: str, limit: int) -> List[Dict[str, Any]]:
+    def _general_web_search(self, technology: str, limit: int) -> Iterator[Dict[str, Any]]:
         """Perform a general web search for companies using the technology"""
-        results = []
-        
         # Create some sample companies based on technology
         # This would ideally use a real search API like Google Custom Search
         sample_companies = {
@@ -178,97 +273,86 @@ class TechStackFinder:
         tech_lower = technology.lower()
         if tech_lower in sample_companies:
             for company in sample_companies[tech_lower][:limit]:
-                results.append({
+                yield {
                     'company_name': company['name'],
                     'domain': company['domain'],
                     'tech_stack': technology,
                     'source': 'Technology Directory'
-                })
-        
-        return results
+                }
     
     def _is_valid_website(self, url: str) -> bool:
         """Check if a URL is a valid website"""
-        if not url:
-            return False
-        
-        # Add protocol if missing
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        try:
-            parsed = urlparse(url)
-            return (
-                parsed.netloc and 
-                '.' in parsed.netloc and
-                not parsed.netloc.startswith('localhost') and
-                not parsed.netloc.startswith('127.0.0.1')
-            )
-        except:
-            return False
+        return is_valid_website(url)
     
     def _extract_company_name(self, url: str) -> str:
         """Extract company name from URL"""
-        try:
-            domain = urlparse(url).netloc
-            # Remove www. and common TLDs, capitalize
-            name = domain.replace('www.', '').split('.')[0]
-            return name.capitalize()
-        except:
-            return "Unknown Company"
+        return company_name_from_url(url)
     
-    def verify_technology(self, domain: str, technology: str) -> bool:
+    def verify_technology(self, domain: str, technology: str, min_confidence: float = 0.4,
+                          timeout: Optional[float] = None) -> bool:
         """Verify if a domain actually uses the specified technology"""
         try:
-            url = f"https://{domain}"
-            
-            # Get website content
-            downloaded = trafilatura.fetch_url(url)
-            if not downloaded:
+            page = self._home_page(domain, timeout)
+            if not page:
                 return False
             
-            # Extract text content
-            text_content = trafilatura.extract(downloaded)
-            
-            # Also get HTML for technical analysis
-            response = self.session.get(url, timeout=10)
-            html_content = response.text
-            
-            # Technology detection patterns
-            tech_patterns = {
-                'shopify': [
-                    'shopify', 'shop.js', 'cdn.shopify.com', 'myshopify.com'
-                ],
-                'react': [
-                    'react', 'react-dom', 'jsx', '__REACT_DEVTOOLS__'
-                ],
-                'wordpress': [
-                    'wp-content', 'wordpress', 'wp-json', '/wp/'
-                ],
-                'vue': [
-                    'vue.js', 'vue.min.js', '__vue__', 'v-if', 'v-for'
-                ],
-                'angular': [
-                    'angular', 'ng-app', 'ng-controller', 'angularjs'
-                ],
-                'django': [
-                    'django', 'csrfmiddlewaretoken', 'staticfiles'
-                ],
-                'nextjs': [
-                    'next.js', '_next/', 'next-head', '__NEXT_DATA__'
-                ]
-            }
-            
             tech_lower = technology.lower()
-            patterns = tech_patterns.get(tech_lower, [tech_lower])
-            
-            # Check for patterns in HTML content
-            for pattern in patterns:
-                if pattern.lower() in html_content.lower():
-                    return True
+            if tech_lower not in self.tech_detector.signatures:
+                # No fingerprint for this technology; fall back to a plain mention
+                return tech_lower in page.html_lower
             
-            return False
+            # One detection pass per page covers every technology
+            return self.tech_detector.detect(page).get(tech_lower, 0) >= min_confidence
             
         except Exception as e:
             # If we can't verify, assume it's valid
             return True
+    
+    def verify_many(self, domains: Iterable[str], technology: str, concurrency: int = 16,
+                    deadline: float = 20.0) -> Iterator[Tuple[str, Optional[bool]]]:
+        """Verify many domains concurrently, yielding (domain, verified) as each one finishes
+        
+        Domains still unverified when the deadline passes are yielded with None.
+        """
+        unique_domains = list(dict.fromkeys(domain for domain in domains if domain))
+        if not unique_domains:
+            return
+        
+        # No single download may outlive the overall deadline
+        timeout = min(deadline, self.fetcher.timeout)
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(unique_domains))))
+        futures = {
+            executor.submit(self.verify_technology, domain, technology, timeout=timeout): domain
+            for domain in unique_domains
+        }
+        pending = set(unique_domains)
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                domain = futures[future]
+                pending.discard(domain)
+                yield domain, future.result()
+        except TimeoutError:
+            pass
+        finally:
+            # Don't wait for stragglers; their results are no longer wanted
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        for domain in unique_domains:
+            if domain in pending:
+                yield domain, None
+    
+    def _home_page(self, domain: str, timeout: Optional[float] = None) -> Optional[PageAnalysis]:
+        """Get the analysed home page of a domain, with response headers when downloaded here"""
+        url = f"https://{domain}"
+        
+        # Get website HTML once, shared with the other modules
+        html_content = self.page_cache.get(url)
+        if html_content:
+            return self.page_analyzer.analyze(html_content, url)
+        
+        page = self.fetcher.fetch(url, timeout)
+        if not page or page['status'] != 200 or not page['text']:
+            return None
+        
+        self.page_cache.set(url, page['text'])
+        return self.page_analyzer.analyze(page['text'], url, page['headers'])
@@ -0,0 +1,61 @@
+import http.server
+import json
+import sys
+import threading
+import types
+from pathlib import Path
+from urllib.parse import urlsplit
+import pytest
+
+# The app imports these modules as utils.*; in this tree they sit at the top level
+ROOT = Path(__file__).resolve().parent.parent
+if 'utils' not in sys.modules:
+    utils = types.ModuleType('utils')
+    utils.__path__ = [str(ROOT)]
+    sys.modules['utils'] = utils
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Answers each GET from the server's routes: path -> handler(request) -> (status, headers, body)"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+
+        route = server.routes.get(path)
+        status, headers, body = route(self) if route else (404, {}, 'not found')
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers = {'Content-Type': 'application/json', **headers}
+        body = body.encode('utf-8') if isinstance(body, str) else body
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+@pytest.fixture
+def stub_server():
+    """A local HTTP server whose routes a test fills in"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.routes = {}
+    server.requests = []
+    server.lock = threading.Lock()
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,94 @@
+import io
+import json
+import pytest
+from utils.data_processor import DataProcessor, resolve_import_path
+from utils.lead_store import LeadStore
+
+def make_processor(tmp_path) -> DataProcessor:
+    processor = DataProcessor(store=LeadStore(str(tmp_path / 'leads.db')))
+    processor.store.upsert(
+        {'domain': f'site{i:02d}.io', 'company_name': f'Site {i}', 'email': f'info@site{i:02d}.io' if i % 2 else None,
+         'email_score': 90 if i % 4 == 1 else 50, 'industry': 'SaaS' if i < 6 else 'Retail'}
+        for i in range(10)
+    )
+    return processor
+
+def test_export_summary_counts_without_reading_rows(tmp_path):
+    summary = make_processor(tmp_path).export_summary('exportable_email', min_email_score=60)
+    assert summary['total'] == 3
+    assert summary['with_email'] == 3
+    assert summary['high_quality'] == 3
+    assert summary['top_industries'] == {'SaaS': 2, 'Retail': 1}
+
+def test_csv_and_json_are_streamed_in_chunks(tmp_path):
+    processor = make_processor(tmp_path)
+
+    target = io.StringIO()
+    assert processor.write_csv(target, 'exportable_email', ['domain', 'email'], chunksize=2) == 5
+    lines = target.getvalue().splitlines()
+    assert lines[0] == 'domain,email'
+    assert lines[1:] == [f'site{i:02d}.io,info@site{i:02d}.io' for i in (1, 3, 5, 7, 9)]
+
+    target = io.StringIO()
+    assert processor.write_json(target, columns=['domain'], chunksize=3) == 10
+    assert [record['domain'] for record in json.loads(target.getvalue())] == [f'site{i:02d}.io' for i in range(10)]
+
+def test_empty_exports_are_still_valid_files(tmp_path):
+    processor = DataProcessor(store=LeadStore(str(tmp_path / 'leads.db')))
+
+    target = io.StringIO()
+    assert processor.write_csv(target, columns=['domain', 'email']) == 0
+    assert target.getvalue() == 'domain,email\n'
+
+    target = io.StringIO()
+    processor.write_json(target)
+    assert json.loads(target.getvalue()) == []
+
+def test_excel_export_has_leads_and_summary_sheets(tmp_path):
+    load_workbook = pytest.importorskip('openpyxl').load_workbook
+    path = tmp_path / 'leads.xlsx'
+    assert make_processor(tmp_path).write_excel(str(path), columns=['domain', 'email_score'], chunksize=4) == 10
+
+    workbook = load_workbook(path)
+    assert workbook.sheetnames == ['Leads', 'Summary']
+    rows = list(workbook['Leads'].values)
+    assert rows[0] == ('domain', 'email_score') and len(rows) == 11
+    summary = dict(list(workbook['Summary'].values)[1:])
+    assert summary['Total Leads'] == 10 and summary['High Quality Emails'] == 3
+
+def test_bulk_update_writes_known_columns_of_each_domain(tmp_path):
+    processor = make_processor(tmp_path)
+    updated = processor.bulk_update({
+        'site01.io': {'email': 'ceo@site01.io', 'email_score': 95, 'candidates': [], 'timed_out': True},
+        'site02.io': {'industry': 'Fintech', 'location': 'Berlin'},
+        'unknown.io': {'industry': 'Retail'},
+    })
+
+    assert updated == 2
+    leads = processor.get_leads(columns=['domain', 'email', 'email_score', 'industry', 'location']).set_index('domain')
+    assert leads.loc['site01.io', 'email'] == 'ceo@site01.io' and leads.loc['site01.io', 'email_score'] == 95
+    assert leads.loc['site02.io', 'industry'] == 'Fintech' and leads.loc['site02.io', 'location'] == 'Berlin'
+    assert leads.loc['site03.io', 'industry'] == 'SaaS'
+    assert 'unknown.io' not in leads.index
+
+def test_buffered_leads_are_flushed_before_reads(tmp_path):
+    processor = DataProcessor(store=LeadStore(str(tmp_path / 'leads.db')), compact_threshold=100)
+    processor.add_tech_stack_data([{'domain': 'new.io', 'company_name': 'New', 'tech_stack': 'Vue'}])
+    assert processor.store.count() == 0
+
+    assert processor.count_leads('with_tech_stack') == 1
+    assert processor.get_leads(columns=['source'])['source'].tolist() == ['Tech Stack Finder']
+
+def test_server_imports_stay_inside_the_import_directory(tmp_path):
+    imports = tmp_path / 'imports'
+    imports.mkdir()
+    (imports / 'domains.csv').write_text('domain\nexample.com\n')
+    (tmp_path / 'secret.txt').write_text('password')
+    (imports / 'escape.txt').symlink_to(tmp_path / 'secret.txt')
+
+    assert resolve_import_path('domains.csv', imports) == (imports / 'domains.csv').resolve()
+    for name in ('../secret.txt', str(tmp_path / 'secret.txt'), 'escape.txt', '/etc/passwd'):
+        with pytest.raises(ValueError, match='must be inside'):
+            resolve_import_path(name, imports)
+    with pytest.raises(ValueError, match='No import file'):
+        resolve_import_path('missing.csv', imports)
@@ -0,0 +1,58 @@
+import socket
+import ssl
+from utils.domain_health import DomainHealth, classify_failure
+
+def wrapped(error: BaseException, message: str) -> Exception:
+    """An exception wrapping another, the way requests and httpx raise resolver errors"""
+    try:
+        raise error
+    except BaseException as cause:
+        try:
+            raise ConnectionError(message) from cause
+        except ConnectionError as outer:
+            return outer
+
+def test_nxdomain_is_blocked_for_a_day_and_persisted(tmp_path):
+    path = str(tmp_path / 'health.db')
+    health = DomainHealth(path)
+    error = wrapped(socket.gaierror(socket.EAI_NONAME, 'Name or service not known'), 'Max retries exceeded')
+
+    assert health.record_failure('https://gone.example/', error) == 'dns'
+    assert health.blocked('https://gone.example/contact') == 'dns'
+    assert DomainHealth(path).blocked('https://gone.example/') == 'dns'
+
+def test_temporary_resolver_failure_is_short_and_not_persisted(tmp_path):
+    path = str(tmp_path / 'health.db')
+    health = DomainHealth(path)
+    error = socket.gaierror(socket.EAI_AGAIN, 'Temporary failure in name resolution')
+
+    assert health.record_failure('https://flaky.example/', error) == 'dns_retry'
+    assert health.blocked('https://flaky.example/') == 'dns_retry'
+    assert DomainHealth(path).blocked('https://flaky.example/') is None
+
+    expired = DomainHealth(str(tmp_path / 'other.db'), ttl={'dns_retry': 0})
+    expired.record_failure('https://flaky.example/', error)
+    assert expired.blocked('https://flaky.example/') is None
+
+def test_resolver_messages_without_the_socket_error():
+    assert classify_failure(ConnectionError(
+        "Failed to resolve 'gone.example' ([Errno -2] Name or service not known)")) == 'dns'
+    assert classify_failure(ConnectionError(
+        "Failed to resolve 'flaky.example' ([Errno -3] Temporary failure in name resolution)")) == 'dns_retry'
+
+def test_other_failures():
+    assert classify_failure(ssl.SSLError('certificate verify failed')) == 'tls'
+    assert classify_failure(ConnectionRefusedError(111, 'Connection refused')) == 'refused'
+    assert classify_failure(type('ReadTimeout', (Exception,), {})('read timed out')) is None
+
+def test_missing_pages_are_blocked_after_repeated_misses_and_cleared_by_success(tmp_path):
+    health = DomainHealth(str(tmp_path / 'health.db'))
+    url = 'https://site.example/team'
+
+    health.record_response(url, 404)
+    assert health.blocked(url) is None
+    health.record_response(url, 404)
+    assert health.blocked(url) == 'not_found'
+
+    health.record_response(url, 200)
+    assert health.blocked(url) is None
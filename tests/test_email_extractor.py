@@ -0,0 +1,54 @@
+from utils.domain_health import DomainHealth
+from utils.email_extractor import EmailExtractor
+from utils.http_fetcher import RequestsFetcher
+from utils.mx_resolver import MXResolver
+from utils.page_cache import PageCache
+from utils.rate_limiter import HostRateLimiter
+from utils.timeouts import AdaptiveTimeouts
+from test_http_fetcher import slow_route
+
+class StubExtractor(EmailExtractor):
+    """Extractor whose per-domain work is one request to the stub server"""
+
+    def __init__(self, base_url, fetcher):
+        super().__init__(page_cache=PageCache(), fetcher=fetcher, mx_resolver=MXResolver())
+        self.base_url = base_url
+
+    def extract_emails_from_domain(self, domain):
+        page = self.fetcher.fetch(f'{self.base_url}/page?{domain}')
+        return {'email': f'info@{domain}', 'status': page['status']}
+
+def test_batch_streams_every_domain_once_under_the_per_host_limit(stub_server):
+    state = {'in_flight': 0, 'peak': 0}
+    stub_server.routes['/page'] = slow_route(state)
+    fetcher = RequestsFetcher(per_host_limit=4, rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+                              health=DomainHealth(':memory:'), timeouts=AdaptiveTimeouts())
+    extractor = StubExtractor(stub_server.url, fetcher)
+
+    domains = [f'site{i}.io' for i in range(6)] + ['site0.io', '']
+    results = dict(extractor.extract_emails_batch(domains, max_workers=6, per_host_concurrency=1))
+
+    assert sorted(results) == [f'site{i}.io' for i in range(6)]
+    assert all(result['status'] == 200 for result in results.values())
+    assert fetcher.per_host_limit == 1
+    assert state['peak'] == 1
+
+def test_batch_without_a_limit_keeps_the_fetcher_limit(stub_server):
+    stub_server.routes['/page'] = slow_route({'in_flight': 0, 'peak': 0})
+    fetcher = RequestsFetcher(per_host_limit=3, rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+                              health=DomainHealth(':memory:'), timeouts=AdaptiveTimeouts())
+
+    assert len(dict(StubExtractor(stub_server.url, fetcher).extract_emails_batch(['a.io', 'b.io']))) == 2
+    assert fetcher.per_host_limit == 3
+
+def test_extraction_errors_are_returned_not_shown(monkeypatch):
+    extractor = EmailExtractor(page_cache=PageCache(), mx_resolver=MXResolver())
+
+    def fail(domain):
+        raise RuntimeError('no route to host')
+    monkeypatch.setattr(extractor, '_scrape_website_emails', fail)
+
+    result = extractor.extract_emails_from_domain('down.example')
+    assert result['email_type'] == 'error'
+    assert result['error'] == 'no route to host'
+    assert result['candidates'] == []
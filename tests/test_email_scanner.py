@@ -0,0 +1,47 @@
+import pytest
+from utils.email_scanner import EmailScanner, decode_cfemail
+
+def cfemail(address, key=0x5a):
+    """Encode an address the way Cloudflare email protection does"""
+    return f'{key:02x}' + ''.join(f'{ord(char) ^ key:02x}' for char in address)
+
+def scan(page, as_bytes):
+    return EmailScanner().scan(page.encode() if as_bytes else page)
+
+@pytest.fixture(params=[False, True], ids=['str', 'bytes'])
+def as_bytes(request):
+    return request.param
+
+def test_plain_addresses_in_order_without_duplicates(as_bytes):
+    page = '<p>Write to sales@acme.io or <b>ceo@acme.io</b>.</p><footer>sales@acme.io</footer>'
+    assert scan(page, as_bytes) == ['sales@acme.io', 'ceo@acme.io']
+
+@pytest.mark.parametrize('hidden', [
+    'jobs&#64;acme.io',
+    'jobs&#064;acme&#46;io',
+    'jobs&#x40;acme.io',
+    'jobs [at] acme [dot] io',
+    'jobs(at)acme(dot)io',
+    'jobs {AT} acme {DOT} io',
+])
+def test_obfuscated_addresses_are_decoded(hidden, as_bytes):
+    assert scan(f'<p>Careers: {hidden}</p>', as_bytes) == ['jobs@acme.io']
+
+def test_url_encoded_mailto_links(as_bytes):
+    page = '<a href="mailto:press%40acme.io?subject=Hi">Press</a>'
+    assert scan(page, as_bytes) == ['press@acme.io']
+
+def test_cloudflare_protected_addresses(as_bytes):
+    page = (f'<a href="/cdn-cgi/l/email-protection#{cfemail("help@acme.io")}">[email&#160;protected]</a>'
+            f'<span class="__cf_email__" data-cfemail="{cfemail("ops@acme.io", 0x21)}"></span>')
+    assert scan(page, as_bytes) == ['help@acme.io', 'ops@acme.io']
+    assert decode_cfemail('zz') is None
+
+def test_placeholder_domains_and_their_subdomains_are_blocked(as_bytes):
+    page = 'you@example.com, me@mail.yourcompany.com, real@acme.io'
+    assert scan(page, as_bytes) == ['real@acme.io']
+    assert EmailScanner(blocked_domains=[]).scan(page) == ['you@example.com', 'me@mail.yourcompany.com', 'real@acme.io']
+
+def test_text_without_addresses(as_bytes):
+    assert scan('We are at the office (at) nine. Use 2 @ 3 pm.', as_bytes) == []
+    assert EmailScanner().scan('') == []
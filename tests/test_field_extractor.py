@@ -0,0 +1,15 @@
+from utils.field_extractor import FieldExtractor, _legacy_extract, benchmark
+
+PAGE = "Acme is a team of 45 people based in Austin, TX. Founded in 2012, we build tools for boutique shops."
+
+def test_new_engine_agrees_with_the_old_extractors():
+    fields = FieldExtractor().extract(PAGE)
+    legacy = _legacy_extract(PAGE)
+    for field in ('company_size', 'location', 'founding_year'):
+        assert fields[field] == legacy[field]
+
+def test_benchmark_times_both_extractors(tmp_path):
+    (tmp_path / 'about.html').write_text(f'<html><body><p>{PAGE}</p></body></html>')
+    timings = benchmark([tmp_path], repeat=2)
+    assert set(timings) == {'before', 'after'}
+    assert all(value > 0 for value in timings.values())
@@ -0,0 +1,84 @@
+import time
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from utils.github_search import GitHubSearch
+
+REPOS = [{'name': f'repo{i}', 'homepage': f'https://site{i}.io'} for i in range(5)]
+
+def search_route(etag='"v1"', rate_limited=lambda: False):
+    """Serve REPOS two per page, answering 304 to a matching If-None-Match"""
+    def route(request):
+        if rate_limited():
+            reset = str(int(time.time()) + 3600)
+            return 403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': reset}, {'message': 'rate limited'}
+        if request.headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+
+        params = parse_qs(urlsplit(request.path).query)
+        page, per_page = int(params['page'][0]), int(params['per_page'][0])
+        items = REPOS[(page - 1) * per_page:page * per_page]
+        return 200, {'ETag': etag}, {'total_count': len(REPOS), 'items': items}
+    return route
+
+def make_search(stub_server, tmp_path, **kwargs) -> GitHubSearch:
+    return GitHubSearch(api_url=stub_server.url, cache_path=str(tmp_path / 'github.db'), token='',
+                        per_page=2, **kwargs)
+
+def page_requests(stub_server):
+    return [path for path, _ in stub_server.requests if path.startswith('/search/repositories')]
+
+def test_pages_through_every_result(stub_server, tmp_path):
+    stub_server.routes['/search/repositories'] = search_route()
+    search = make_search(stub_server, tmp_path)
+
+    assert [repo['name'] for repo in search.search_repositories('react')] == [repo['name'] for repo in REPOS]
+    assert [parse_qs(urlsplit(path).query)['page'] for path in page_requests(stub_server)] == [['1'], ['2'], ['3']]
+
+def test_max_pages_bounds_the_requests(stub_server, tmp_path):
+    stub_server.routes['/search/repositories'] = search_route()
+    search = make_search(stub_server, tmp_path, max_pages=2)
+
+    assert len(list(search.search_repositories('react'))) == 4
+    assert len(page_requests(stub_server)) == 2
+
+def test_fresh_pages_are_served_from_disk(stub_server, tmp_path):
+    stub_server.routes['/search/repositories'] = search_route()
+    list(make_search(stub_server, tmp_path).search_repositories('react'))
+
+    # A new client on the same cache file makes no requests while the pages are fresh
+    again = list(make_search(stub_server, tmp_path).search_repositories('react'))
+    assert len(again) == len(REPOS)
+    assert len(page_requests(stub_server)) == 3
+
+def test_stale_pages_are_revalidated_with_their_etag(stub_server, tmp_path):
+    stub_server.routes['/search/repositories'] = search_route()
+    search = make_search(stub_server, tmp_path, fresh_for=0)
+    first = list(search.search_repositories('react'))
+    stub_server.requests.clear()
+
+    assert list(search.search_repositories('react')) == first
+    assert [headers.get('If-None-Match') for _, headers in stub_server.requests] == ['"v1"'] * 3
+
+def test_changed_pages_replace_the_cached_copy(stub_server, tmp_path):
+    stub_server.routes['/search/repositories'] = search_route()
+    search = make_search(stub_server, tmp_path, fresh_for=0)
+    list(search.search_repositories('react'))
+
+    REPOS_V2 = [{'name': 'renamed', 'homepage': 'https://renamed.io'}]
+    stub_server.routes['/search/repositories'] = lambda request: (
+        200, {'ETag': '"v2"'}, {'total_count': 1, 'items': REPOS_V2}
+    )
+    assert list(search.search_repositories('react')) == REPOS_V2
+
+def test_stale_pages_are_served_when_rate_limited(stub_server, tmp_path):
+    limited = {'on': False}
+    stub_server.routes['/search/repositories'] = search_route(rate_limited=lambda: limited['on'])
+    search = make_search(stub_server, tmp_path, fresh_for=0, max_wait=1)
+    first = list(search.search_repositories('react'))
+
+    limited['on'] = True
+    assert list(search.search_repositories('react')) == first
+
+    # Nothing cached for this query and the reset is an hour away
+    with pytest.raises(RuntimeError, match='rate limit'):
+        list(search.search_repositories('vue'))
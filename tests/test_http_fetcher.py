@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils.domain_health import DomainHealth
+from utils.http_fetcher import HttpxFetcher, RequestsFetcher, httpx
+from utils.rate_limiter import HostRateLimiter
+from utils.timeouts import AdaptiveTimeouts
+
+BACKENDS = [RequestsFetcher] + ([HttpxFetcher] if httpx is not None else [])
+
+def slow_route(state):
+    """A page that takes 50 ms and records how many requests were in flight at once"""
+    lock = threading.Lock()
+
+    def route(request):
+        with lock:
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+        time.sleep(0.05)
+        with lock:
+            state['in_flight'] -= 1
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, '<html>café</html>'
+    return route
+
+def make_fetcher(backend, **kwargs):
+    return backend(rate_limiter=HostRateLimiter(rate=1000, burst=1000), health=DomainHealth(':memory:'),
+                   timeouts=AdaptiveTimeouts(), **kwargs)
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_concurrent_requests_to_one_host_are_capped(stub_server, backend):
+    state = {'in_flight': 0, 'peak': 0}
+    stub_server.routes['/page'] = slow_route(state)
+    fetcher = make_fetcher(backend, per_host_limit=2)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        pages = list(executor.map(lambda i: fetcher.fetch(f'{stub_server.url}/page?{i}'), range(8)))
+
+    assert [page['status'] for page in pages] == [200] * 8
+    assert pages[0]['text'] == '<html>café</html>'
+    assert state['peak'] == 2
+
+@pytest.mark.skipif(httpx is None, reason='httpx is not installed')
+def test_async_fetches_share_the_per_host_cap(stub_server):
+    state = {'in_flight': 0, 'peak': 0}
+    stub_server.routes['/page'] = slow_route(state)
+    fetcher = make_fetcher(HttpxFetcher, per_host_limit=3)
+
+    urls = [f'{stub_server.url}/page?{i}' for i in range(9)]
+    pages = asyncio.run(fetcher.afetch_many(urls))
+
+    assert all(pages[url]['status'] == 200 for url in urls)
+    assert state['peak'] == 3
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_missing_pages_stop_being_requested(stub_server, backend):
+    fetcher = make_fetcher(backend)
+    url = f'{stub_server.url}/gone'
+
+    assert [fetcher.fetch(url)['status'] for _ in range(2)] == [404, 404]
+    assert fetcher.fetch(url) is None
+    assert len(stub_server.requests) == 2
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_fetch_text_decodes_and_skips_errors(stub_server, backend):
+    stub_server.routes['/latin'] = lambda request: (200, {'Content-Type': 'text/html; charset=latin-1'},
+                                                    '<p>café</p>'.encode('latin-1'))
+    stub_server.routes['/error'] = lambda request: (500, {}, 'oops')
+    fetcher = make_fetcher(backend)
+
+    assert fetcher.fetch_text(f'{stub_server.url}/latin') == '<p>café</p>'
+    assert fetcher.fetch_text(f'{stub_server.url}/error') is None
@@ -0,0 +1,152 @@
+import threading
+import time
+from utils.jobs import JobQueue, JobRunner, JobStore
+
+class FakeDataProcessor:
+    def __init__(self):
+        self.saved = {}
+
+    def add_email_data(self, domain, result):
+        self.saved[domain] = result
+
+    def add_enrichment_data(self, domain, result):
+        self.saved[domain] = result
+
+class FakeExtractor:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def extract_emails_from_domain(self, domain):
+        self.calls.append(domain)
+        result = self.results[domain]
+        if isinstance(result, Exception):
+            raise result
+        return dict(result)
+
+EMAIL_RESULTS = {
+    'ok.example': {'email': 'info@ok.example', 'email_type': 'generic'},
+    'broken.example': {'email': None, 'email_type': 'error', 'error': 'connection reset'},
+    'slow.example': {'email': 'hi@slow.example', 'email_type': 'generic', 'timed_out': True},
+    'raises.example': RuntimeError('boom'),
+}
+
+def run_job(tmp_path, results):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    data_processor = FakeDataProcessor()
+    runner = JobRunner(data_processor, store, email_extractor=FakeExtractor(results), max_workers=2)
+    job_id = runner.create_job('email', [(domain, None) for domain in results])
+    return runner, store, data_processor, job_id
+
+def test_error_and_timed_out_results_are_failed_not_fresh(tmp_path):
+    runner, store, data_processor, job_id = run_job(tmp_path, EMAIL_RESULTS)
+    outcomes = dict(runner.run(job_id))
+
+    assert outcomes['ok.example']['email'] == 'info@ok.example'
+    assert outcomes['broken.example'] is None
+    assert outcomes['slow.example'] is None
+
+    job = store.get_job(job_id)
+    assert (job['done'], job['failed'], job['status']) == (1, 3, 'completed_with_failures')
+    assert store.fresh_domains('email', EMAIL_RESULTS, 3600) == {'ok.example'}
+
+    # Partial results are kept; error results never overwrite stored data
+    assert set(data_processor.saved) == {'ok.example', 'slow.example'}
+
+def test_failure_reasons_are_checkpointed(tmp_path):
+    runner, store, data_processor, job_id = run_job(tmp_path, EMAIL_RESULTS)
+    list(runner.run(job_id))
+
+    assert store.failed_items(job_id) == [
+        ('broken.example', 'connection reset'), ('slow.example', 'timed out'), ('raises.example', 'boom')
+    ]
+
+def test_resume_retries_failed_domains_only(tmp_path):
+    runner, store, data_processor, job_id = run_job(tmp_path, EMAIL_RESULTS)
+    list(runner.run(job_id))
+
+    assert {domain for domain, _ in store.pending_items(job_id)} == {'broken.example', 'slow.example', 'raises.example'}
+
+    runner.email_extractor = FakeExtractor({domain: {'email': f'info@{domain}', 'email_type': 'generic'}
+                                            for domain in EMAIL_RESULTS})
+    list(runner.run(job_id))
+    assert sorted(runner.email_extractor.calls) == ['broken.example', 'raises.example', 'slow.example']
+    assert store.get_job(job_id)['done'] == 4
+
+def test_jobs_with_failures_stay_resumable_until_retried(tmp_path):
+    results = {'ok.example': EMAIL_RESULTS['ok.example'], 'raises.example': EMAIL_RESULTS['raises.example']}
+    runner, store, data_processor, job_id = run_job(tmp_path, results)
+    list(runner.run(job_id))
+    assert [job['id'] for job in store.list_jobs('email', unfinished_only=True)] == [job_id]
+
+    runner.email_extractor = FakeExtractor({'raises.example': {'email': 'hi@raises.example', 'email_type': 'generic'}})
+    assert dict(runner.run(job_id))['raises.example']['email'] == 'hi@raises.example'
+    assert runner.email_extractor.calls == ['raises.example']
+    assert store.get_job(job_id)['status'] == 'completed'
+    assert store.list_jobs('email', unfinished_only=True) == []
+
+def test_recently_finished_domains_are_skipped(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    results = {'ok.example': EMAIL_RESULTS['ok.example']}
+    runner = JobRunner(FakeDataProcessor(), store, email_extractor=FakeExtractor(results))
+    list(runner.run(runner.create_job('email', [('ok.example', None)])))
+
+    second = FakeExtractor(results)
+    runner.email_extractor = second
+    job_id = runner.create_job('email', [('ok.example', None)])
+    assert dict(runner.run(job_id)) == {'ok.example': None}
+    assert second.calls == []
+    assert store.get_job(job_id)['skipped'] == 1
+
+class GatedExtractor:
+    """Extractor whose domains finish only when the test releases them"""
+
+    def __init__(self, domains):
+        self.gates = {domain: threading.Event() for domain in domains}
+        self.started = []
+        self.lock = threading.Lock()
+
+    def extract_emails_from_domain(self, domain):
+        with self.lock:
+            self.started.append(domain)
+        self.gates[domain].wait(5)
+        return {'email': f'info@{domain}', 'email_type': 'generic'}
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_cancelled_job_stays_active_until_domains_in_flight_finish(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    extractor = GatedExtractor(['a.io', 'b.io', 'c.io', 'd.io'])
+    job_queue = JobQueue(JobRunner(FakeDataProcessor(), store, email_extractor=extractor), workers=1)
+    leads = [('a.io', None), ('b.io', None), ('c.io', None), ('d.io', None)]
+
+    job_id = job_queue.submit('email', leads, max_workers=2)
+    wait_for(lambda: len(extractor.started) == 2)
+    assert job_queue.submit('email', reversed(leads)) == job_id
+
+    # a.io finishing frees its thread for c.io; d.io is still queued when the cancel is seen
+    job_queue.cancel(job_id)
+    extractor.gates['a.io'].set()
+    wait_for(lambda: len(extractor.started) == 3)
+    time.sleep(0.1)
+    assert job_queue.is_active(job_id)
+    job_queue.resume(job_id)
+
+    extractor.gates['b.io'].set()
+    extractor.gates['c.io'].set()
+    wait_for(lambda: not job_queue.is_active(job_id))
+    assert store.pending_items(job_id) == [('d.io', None)]
+    assert store.get_job(job_id)['status'] == 'interrupted'
+
+    extractor.gates['d.io'].set()
+    job_queue.resume(job_id)
+    wait_for(lambda: not job_queue.is_active(job_id))
+    assert sorted(extractor.started) == ['a.io', 'b.io', 'c.io', 'd.io']
+    assert store.get_job(job_id)['status'] == 'completed'
+
+    # Once the first job is over the same domains may be submitted again
+    assert job_queue.submit('email', leads, freshness=0) != job_id
@@ -0,0 +1,26 @@
+from utils.field_extractor import FieldExtractor
+from utils.lead_enrichment import LeadEnrichment
+
+class CountingExtractor(FieldExtractor):
+    def __init__(self):
+        super().__init__()
+        self.scans = 0
+
+    def scan(self, text):
+        self.scans += 1
+        return super().scan(text)
+
+TEXT = "Founded in 2012, Acme is a team of 40 people based in Austin, Texas."
+
+def test_field_helpers_share_one_scan_per_text():
+    extractor = CountingExtractor()
+    enrichment = LeadEnrichment(page_cache=object(), fetcher=object(), page_analyzer=object(),
+                                field_extractor=extractor, page_discovery=object())
+
+    assert enrichment._extract_company_size(TEXT) == 'Small (1-50)'
+    assert enrichment._extract_location(TEXT) == 'Austin, Texas'
+    assert enrichment._extract_founding_year(TEXT) == 2012
+    assert extractor.scans == 1
+
+    assert enrichment._extract_founding_year("Established 1999.") == 1999
+    assert extractor.scans == 2
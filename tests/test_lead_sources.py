@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+from utils.lead_sources import CommonCrawlSource, CsvSeedSource, LeadSourceRegistry, start_source
+import utils.tech_stack_finder
+from utils.tech_stack_finder import TechStackFinder
+
+def write_crawl(path, urls):
+    with open(path, 'w') as index:
+        for i, url in enumerate(urls):
+            index.write(f'com,example)/ 2024010100000{i} {json.dumps({"url": url})}\n')
+
+def test_csv_seed_stops_after_limit_unique_domains(tmp_path):
+    path = tmp_path / 'seeds.csv'
+    path.write_text('domain,tech_stack\n' + ''.join(f'site{i % 4}.io,React\n' for i in range(20)) + 'vue.io,Vue\n')
+
+    leads = list(CsvSeedSource(path, chunksize=3)('react', 3))
+    assert [lead['domain'] for lead in leads] == ['site0.io', 'site1.io', 'site2.io']
+
+def test_common_crawl_stops_after_limit_and_on_stop(tmp_path):
+    path = tmp_path / 'index.cdx'
+    write_crawl(path, [f'https://shop{i % 5}.io/wp-content/x.js' for i in range(50)])
+    source = CommonCrawlSource(path)
+
+    assert [lead['domain'] for lead in source('wordpress', 2)] == ['shop0.io', 'shop1.io']
+
+    stop = threading.Event()
+    stop.set()
+    assert list(source('wordpress', 10, stop=stop)) == []
+
+def test_start_source_passes_stop_only_to_sources_that_take_it():
+    stop = threading.Event()
+    assert list(start_source(lambda technology, limit: [{'domain': 'a.io'}], 'react', 5, stop)) == [{'domain': 'a.io'}]
+    assert list(start_source(lambda technology, limit, stop=None: [stop], 'react', 5, stop)) == [stop]
+
+class NoGitHub:
+    def search_repositories(self, query):
+        return iter(())
+
+def test_stream_stops_sources_once_enough_leads_are_found(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    finished = threading.Event()
+
+    def endless(technology, limit, stop=None):
+        # Reads forever without matching, like a large crawl index
+        while not stop.is_set():
+            time.sleep(0.01)
+        finished.set()
+        return
+        yield
+
+    registry = LeadSourceRegistry()
+    registry.register('Endless', endless)
+    registry.register('Quick', lambda technology, limit: [
+        {'company_name': 'A', 'domain': 'a.io'}, {'company_name': 'B', 'domain': 'b.io'}
+    ])
+
+    finder = TechStackFinder(sources=registry, github=NoGitHub())
+    leads = list(finder.stream_by_technology('nothing-known', limit=2, source_timeout=5))
+
+    assert [lead['domain'] for lead in leads] == ['a.io', 'b.io']
+    assert finished.wait(1)
+
+def test_slow_source_is_cut_off_without_losing_other_leads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    warnings = []
+    monkeypatch.setattr(utils.tech_stack_finder.st, 'warning', warnings.append)
+    cut_off = threading.Event()
+
+    def stalled(technology, limit, stop=None):
+        stop.wait(5)
+        cut_off.set()
+        yield {'company_name': 'Late', 'domain': 'late.io'}
+
+    def steady(technology, limit, stop=None):
+        for i in range(3):
+            time.sleep(0.05)
+            yield {'company_name': f'S{i}', 'domain': f's{i}.io'}
+
+    registry = LeadSourceRegistry()
+    registry.register('Stalled', stalled)
+    registry.register('Steady', steady)
+
+    finder = TechStackFinder(sources=registry, github=NoGitHub())
+    start = time.monotonic()
+    leads = list(finder.stream_by_technology('nothing-known', limit=10, source_timeout=0.5))
+
+    assert [lead['domain'] for lead in leads] == ['s0.io', 's1.io', 's2.io']
+    assert warnings == ['Gave up waiting for Stalled after 0.5s']
+    assert cut_off.wait(1)
+    assert time.monotonic() - start < 2
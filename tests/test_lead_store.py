@@ -0,0 +1,26 @@
+from utils.lead_store import LeadStore
+
+def test_upsert_keeps_stored_fields_the_new_row_does_not_have(tmp_path):
+    store = LeadStore(str(tmp_path / 'leads.db'))
+    store.upsert([{'domain': 'acme.io', 'company_name': 'Acme', 'tech_stack': 'React', 'source': 'github'}])
+    store.update({'acme.io': {'email': 'ceo@acme.io', 'email_score': 90, 'industry': 'SaaS'}})
+
+    # Tech Stack Finder finds the domain again, without any email or enrichment
+    store.upsert([{'domain': 'acme.io', 'company_name': 'Acme Inc', 'tech_stack': 'React, Next.js',
+                   'email': None, 'email_score': float('nan'), 'industry': None, 'source': 'github'}])
+
+    lead = store.query('domain = ?', ['acme.io']).iloc[0]
+    assert lead['company_name'] == 'Acme Inc'
+    assert lead['tech_stack'] == 'React, Next.js'
+    assert lead['email'] == 'ceo@acme.io'
+    assert lead['email_score'] == 90
+    assert lead['industry'] == 'SaaS'
+    assert store.count() == 1
+
+def test_iter_chunks_pages_through_every_lead(tmp_path):
+    store = LeadStore(str(tmp_path / 'leads.db'))
+    store.upsert({'domain': f'site{i:03d}.io', 'email_score': i} for i in range(25))
+
+    chunks = list(store.iter_chunks('email_score >= ?', [5], ['domain', 'email_score'], chunksize=7))
+    assert [len(chunk) for chunk in chunks] == [7, 7, 6]
+    assert sorted(domain for chunk in chunks for domain in chunk['domain']) == [f'site{i:03d}.io' for i in range(5, 25)]
@@ -0,0 +1,92 @@
+import threading
+import time
+import dns.message
+import dns.resolver
+import dns.rrset
+import pytest
+import utils.mx_resolver
+from utils.mx_resolver import MXResolver
+
+class FakeAnswer:
+    def __init__(self, ttl):
+        self.rrset = dns.rrset.from_text('mx.io.', ttl, 'IN', 'MX', '10 mail.mx.io.')
+
+def no_mx_with_soa(domain, minimum):
+    """A NoAnswer whose authority section carries the zone's SOA, as real servers send"""
+    response = dns.message.make_response(dns.message.make_query(domain, 'MX'))
+    response.authority.append(
+        dns.rrset.from_text(f'{domain}.', 3600, 'IN', 'SOA', f'ns.{domain}. admin.{domain}. 1 7200 900 86400 {minimum}')
+    )
+    return dns.resolver.NoAnswer(response=response)
+
+@pytest.fixture
+def dns_server(monkeypatch):
+    """Answers MX queries from a dict of domain -> ttl or exception, counting lookups"""
+    answers = {}
+    lookups = []
+    lock = threading.Lock()
+    now = [1000.0]
+
+    def resolve(domain, rdtype, lifetime=None):
+        with lock:
+            lookups.append(domain)
+        time.sleep(0.02)
+        answer = answers[domain]
+        if isinstance(answer, Exception):
+            raise answer
+        return FakeAnswer(answer)
+
+    monkeypatch.setattr(utils.mx_resolver.dns.resolver, 'resolve', resolve)
+    monkeypatch.setattr(utils.mx_resolver.time, 'time', lambda: now[0])
+    return answers, lookups, now
+
+def test_answers_are_cached_for_their_ttl(dns_server):
+    answers, lookups, now = dns_server
+    answers['mx.io'] = 600
+    resolver = MXResolver()
+
+    assert resolver.has_mx('MX.io.') is True
+    assert resolver.has_mx('mx.io') is True
+    assert lookups == ['mx.io']
+
+    now[0] += 601
+    assert resolver.has_mx('mx.io') is True
+    assert lookups == ['mx.io', 'mx.io']
+
+def test_negative_answers_use_the_soa_minimum(dns_server):
+    answers, lookups, now = dns_server
+    answers['nomx.io'] = no_mx_with_soa('nomx.io', 900)
+    answers['gone.io'] = dns.resolver.NXDOMAIN()
+    resolver = MXResolver(negative_ttl=300)
+
+    assert resolver.has_mx('nomx.io') is False
+    assert resolver.has_mx('gone.io') is False
+    now[0] += 600
+    assert resolver.has_mx('nomx.io') is False
+    assert resolver.has_mx('gone.io') is False
+    assert lookups == ['nomx.io', 'gone.io', 'gone.io']
+
+def test_resolver_errors_are_only_remembered_briefly(dns_server):
+    answers, lookups, now = dns_server
+    answers['flaky.io'] = dns.resolver.LifetimeTimeout(timeout=5.0, errors=[])
+    resolver = MXResolver(negative_ttl=3600, error_ttl=60, min_ttl=30)
+
+    assert resolver.has_mx('flaky.io') is False
+    now[0] += 30
+    assert resolver.has_mx('flaky.io') is False
+    assert len(lookups) == 1
+
+    answers['flaky.io'] = 600
+    now[0] += 31
+    assert resolver.has_mx('flaky.io') is True
+
+def test_bulk_resolution_looks_up_each_domain_once(dns_server):
+    answers, lookups, now = dns_server
+    answers.update({'a.io': 600, 'b.io': dns.resolver.NXDOMAIN()})
+    resolver = MXResolver()
+
+    results = resolver.resolve_mx_many(['a.io', 'A.IO', 'b.io', 'a.io.', '', 'b.io'] * 5)
+
+    assert results == {'a.io': True, 'b.io': False}
+    assert sorted(lookups) == ['a.io', 'b.io']
+    assert resolver.resolve_mx_many([]) == {}
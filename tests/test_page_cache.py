@@ -0,0 +1,47 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.page_cache import PageCache, normalize_url
+
+def test_equivalent_urls_share_an_entry():
+    assert normalize_url('Example.com') == 'https://example.com/'
+    assert normalize_url('https://EXAMPLE.com:443/about/#team') == 'https://example.com/about'
+    assert normalize_url('http://example.com:8080/a?b=1') == 'http://example.com:8080/a?b=1'
+
+def test_concurrent_misses_share_one_download():
+    cache = PageCache()
+    calls = []
+    lock = threading.Lock()
+
+    def loader(url):
+        with lock:
+            calls.append(url)
+        time.sleep(0.05)
+        return '<html>hi</html>'
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        bodies = list(executor.map(lambda url: cache.fetch(url, loader),
+                                   ['https://a.io/'] * 4 + ['a.io'] * 4))
+
+    assert bodies == ['<html>hi</html>'] * 8
+    assert len(calls) == 1
+
+def test_failed_downloads_are_not_cached():
+    cache = PageCache()
+    results = iter([None, '<html>ok</html>'])
+    assert cache.fetch('https://a.io/', lambda url: next(results)) is None
+    assert cache.fetch('https://a.io/', lambda url: next(results)) == '<html>ok</html>'
+
+def test_entries_expire_and_persist_on_disk(tmp_path):
+    path = str(tmp_path / 'pages.db')
+    PageCache(disk_path=path).set('https://a.io/', '<html>saved</html>')
+
+    assert PageCache(disk_path=path).get('https://a.io') == '<html>saved</html>'
+    assert PageCache(ttl=0, disk_path=path).get('https://a.io') is None
+
+def test_memory_is_bounded_by_entries():
+    cache = PageCache(max_entries=2)
+    for i in range(3):
+        cache.set(f'https://a.io/{i}', 'x')
+    assert cache.get('https://a.io/0') is None
+    assert cache.get('https://a.io/2') == 'x'
@@ -0,0 +1,75 @@
+from email.utils import formatdate
+import time
+import pytest
+import utils.rate_limiter
+from utils.domain_health import DomainHealth
+from utils.http_fetcher import RequestsFetcher
+from utils.rate_limiter import HostRateLimiter, host_key, parse_retry_after
+from utils.timeouts import AdaptiveTimeouts
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock the test moves by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(utils.rate_limiter.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_burst_is_free_then_requests_are_spaced_by_the_rate(clock):
+    limiter = HostRateLimiter(rate=2.0, burst=2)
+
+    assert [limiter.reserve('https://a.io/x') for _ in range(2)] == [0.0, 0.0]
+    assert limiter.reserve('https://a.io/y') == pytest.approx(0.5)
+    assert limiter.reserve('https://a.io/z') == pytest.approx(1.0)
+
+    # Tokens refill with time
+    clock[0] += 2.0
+    assert limiter.reserve('https://a.io/') == 0.0
+
+def test_hosts_have_separate_buckets_and_www_is_the_same_host(clock):
+    limiter = HostRateLimiter(rate=1.0, burst=1)
+
+    assert limiter.reserve('https://www.a.io/') == 0.0
+    assert limiter.reserve('https://b.io/') == 0.0
+    assert limiter.reserve('http://A.io:8080/page') == pytest.approx(1.0)
+    assert host_key('https://WWW.Example.com:443/x') == 'example.com'
+
+def test_stricter_host_limits_apply_to_linkedin(clock):
+    limiter = HostRateLimiter(rate=10.0, burst=5)
+
+    assert limiter.reserve('https://www.linkedin.com/company/a') == 0.0
+    assert limiter.reserve('https://linkedin.com/company/b') == pytest.approx(2.0)
+
+def test_a_wait_past_max_wait_takes_no_token(clock):
+    limiter = HostRateLimiter(rate=1.0, burst=1)
+    limiter.reserve('https://a.io/')
+
+    assert limiter.reserve('https://a.io/', max_wait=0.5) is None
+    assert limiter.reserve('https://a.io/') == pytest.approx(1.0)
+
+def test_retry_after_holds_the_host_back_up_to_the_cap(clock):
+    limiter = HostRateLimiter(rate=100.0, burst=10, max_retry_after=60)
+
+    limiter.defer('https://a.io/', 30)
+    assert limiter.reserve('https://a.io/') == pytest.approx(30)
+    assert limiter.reserve('https://b.io/') == 0.0
+
+    limiter.defer('https://a.io/', 3600)
+    assert limiter.reserve('https://a.io/') == pytest.approx(60)
+
+    clock[0] += 61
+    assert limiter.reserve('https://a.io/') == 0.0
+
+def test_retry_after_header_formats():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(formatdate(time.time() + 90, usegmt=True)) == pytest.approx(90, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 90, usegmt=True)) == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+def test_fetcher_defers_a_host_that_answers_429(stub_server):
+    stub_server.routes['/busy'] = lambda request: (429, {'Retry-After': '7'}, 'slow down')
+    limiter = HostRateLimiter(rate=1000, burst=1000)
+    fetcher = RequestsFetcher(rate_limiter=limiter, health=DomainHealth(':memory:'), timeouts=AdaptiveTimeouts())
+
+    assert fetcher.fetch(f'{stub_server.url}/busy')['status'] == 429
+    assert limiter.reserve(f'{stub_server.url}/other') == pytest.approx(7, abs=0.5)
@@ -0,0 +1,51 @@
+import re
+import pytest
+from utils.page_analysis import PageAnalysis
+from utils.tech_detector import SIGNATURES, TechDetector, _trie_regex
+
+WORDS = ['vue.js', 'vue.min.js', 'vue.runtime', 'react', 'react-dom', 'ng-app', 'wp-content']
+
+def test_trie_regex_matches_exactly_the_signatures():
+    pattern = re.compile(_trie_regex(WORDS))
+    for word in WORDS:
+        assert pattern.fullmatch(word)
+    for other in ('vue.', 'vue.min', 'reac', 'react-', 'ng-', 'wp'):
+        assert not pattern.fullmatch(other)
+
+def test_trie_regex_prefers_the_longest_signature():
+    pattern = re.compile(_trie_regex(WORDS))
+    assert pattern.findall('<script src="react-dom.js"></script> react') == ['react-dom', 'react']
+
+def test_every_signature_maps_back_to_its_technology():
+    detector = TechDetector()
+    for tech, by_source in SIGNATURES.items():
+        for source, literals in by_source.items():
+            for literal in literals:
+                assert tech in detector._owners[source][literal.lower()]
+
+def test_evidence_from_several_sources_combines():
+    page = PageAnalysis(
+        '<html><head><meta name="generator" content="WordPress 6.5">'
+        '<script src="/wp-includes/js/jquery.js"></script></head>'
+        '<body><img src="/wp-content/logo.png"></body></html>',
+        'https://blog.io/',
+        {'X-Pingback': 'https://blog.io/xmlrpc.php', 'Set-Cookie': 'wp-settings-1=x; path=/'},
+    )
+    confidences = TechDetector().detect(page)
+
+    assert list(confidences) == ['wordpress']
+    # html (wp-content, wordpress) 0.4 each, script 0.7, meta 0.9, header 0.9, cookie 0.8
+    expected = 1 - (0.6 ** 2) * 0.3 * 0.1 * 0.1 * 0.2
+    assert confidences['wordpress'] == pytest.approx(round(expected, 3))
+
+def test_weak_html_mentions_rank_below_strong_evidence():
+    page = PageAnalysis(
+        '<html><body><div id="__next" data-reactroot>Built with react</div>'
+        '<script src="/_next/static/chunks/main.js"></script></body></html>',
+        headers={'x-nextjs-cache': 'HIT'},
+    )
+    confidences = TechDetector().detect(page)
+
+    assert list(confidences)[0] == 'nextjs'
+    assert confidences['react'] == pytest.approx(round(1 - 0.6 ** 2, 3))
+    assert TechDetector().detect(PageAnalysis('<html><body>Plain page</body></html>')) == {}
@@ -0,0 +1,96 @@
+import threading
+import time
+import pytest
+from utils.domain_health import DomainHealth
+from utils.email_extractor import EmailExtractor
+from utils.http_fetcher import RequestsFetcher
+from utils.mx_resolver import MXResolver
+from utils.page_cache import PageCache
+from utils.rate_limiter import HostRateLimiter
+from utils.timeouts import AdaptiveTimeouts, TimeBudget, current_budget
+
+def test_unseen_hosts_get_the_maximum_then_the_overall_estimate():
+    timeouts = AdaptiveTimeouts(min_connect=1, max_connect=5, min_read=2, max_read=10)
+    assert timeouts.timeouts('https://new.io/') == (5, 10)
+
+    for _ in range(20):
+        timeouts.observe('https://fast.io/', 0.2)
+    assert timeouts.timeouts('https://fast.io/') == (1, 2)
+    assert timeouts.timeouts('https://other.io/') == (1, 2)
+
+    for _ in range(20):
+        timeouts.observe('https://slow.io/', 3.0)
+    connect, read = timeouts.timeouts('https://www.slow.io/')
+    assert connect == read and 3.0 <= read < 5
+
+def test_timeouts_back_off_and_stay_capped():
+    timeouts = AdaptiveTimeouts(max_read=10)
+    timeouts.observe('https://a.io/', 1.0)
+
+    timeouts.observe_timeout('https://a.io/', 3.0)
+    assert timeouts.timeouts('https://a.io/')[1] == pytest.approx(min(6.0 + 4 * 0.5, 10))
+    for _ in range(5):
+        timeouts.observe_timeout('https://a.io/', 10.0)
+    assert timeouts.timeouts('https://a.io/') == (5, 10)
+
+def test_only_the_most_recent_hosts_are_remembered():
+    timeouts = AdaptiveTimeouts(max_hosts=2)
+    for host in ('a.io', 'b.io', 'c.io'):
+        timeouts.observe(f'https://{host}/', 0.1)
+    assert list(timeouts._estimates) == ['b.io', 'c.io']
+
+def test_nested_budgets_never_outlast_the_outer_one():
+    assert current_budget() is None
+    with TimeBudget(0.2) as outer:
+        with TimeBudget(60) as inner:
+            assert current_budget() is inner
+            assert inner.remaining() <= 0.2
+        assert current_budget() is outer
+
+        # Budgets belong to the thread that opened them
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(current_budget()))
+        thread.start()
+        thread.join()
+        assert seen == [None]
+
+        time.sleep(0.25)
+        assert outer.expired and outer.remaining() == 0.0
+    assert current_budget() is None
+
+def make_fetcher(health):
+    return RequestsFetcher(rate_limiter=HostRateLimiter(rate=1000, burst=1000), health=health,
+                           timeouts=AdaptiveTimeouts(), timeout=5)
+
+def test_requests_are_cut_at_the_budget_without_blaming_the_host(stub_server):
+    requested = []
+
+    def slow(request):
+        requested.append(request)
+        time.sleep(1)
+        return 200, {}, 'late'
+    stub_server.routes['/slow'] = slow
+    health = DomainHealth(':memory:')
+    fetcher = make_fetcher(health)
+
+    start = time.monotonic()
+    with TimeBudget(0.3):
+        assert fetcher.fetch(f'{stub_server.url}/slow') is None
+        # Once the budget is spent nothing more is sent
+        time.sleep(0.1)
+        assert fetcher.fetch(f'{stub_server.url}/slow') is None
+    assert time.monotonic() - start < 0.9
+    assert len(requested) == 1
+    assert health.blocked(f'{stub_server.url}/slow') is None
+
+def test_extractor_returns_partial_results_when_its_budget_runs_out(monkeypatch):
+    extractor = EmailExtractor(page_cache=PageCache(), mx_resolver=MXResolver(), time_budget=0.05)
+
+    def slow_extract(domain):
+        time.sleep(0.1)
+        return {'email': f'info@{domain}', 'candidates': []}
+    monkeypatch.setattr(extractor, '_extract_from_domain', slow_extract)
+
+    result = extractor.extract_emails_from_domain('slow.io')
+    assert result['email'] == 'info@slow.io'
+    assert result['timed_out'] is True
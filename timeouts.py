@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional, Tuple
+from utils.rate_limiter import host_key
+
+class AdaptiveTimeouts:
+    """Connect and read timeouts that follow each host's observed response times
+
+    As with TCP's retransmission timer, a host's timeout is its smoothed
+    response time plus four times its deviation, and at least doubles after
+    every timeout. Hosts not seen yet get the estimate over all hosts, and
+    the full maximum until anything has been observed.
+    """
+
+    def __init__(self, min_connect: float = 1.0, max_connect: float = 5.0,
+                 min_read: float = 2.0, max_read: float = 10.0, max_hosts: int = 10000):
+        self.min_connect = min_connect
+        self.max_connect = max_connect
+        self.min_read = min_read
+        self.max_read = max_read
+        self.max_hosts = max_hosts
+
+        # host -> (smoothed response time, mean deviation), plus the same over every host
+        self._estimates: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._overall: Optional[Tuple[float, float]] = None
+        self._lock = threading.Lock()
+
+    def timeouts(self, url: str) -> Tuple[float, float]:
+        """The (connect, read) timeouts to use for a URL"""
+        with self._lock:
+            estimate = self._estimates.get(host_key(url)) or self._overall
+
+        if estimate is None:
+            return self.max_connect, self.max_read
+
+        expected = estimate[0] + 4 * estimate[1]
+        return (
+            min(max(expected, self.min_connect), self.max_connect),
+            min(max(expected, self.min_read), self.max_read)
+        )
+
+    def observe(self, url: str, seconds: float):
+        """Fold in the response time of a request that completed"""
+        key = host_key(url)
+        with self._lock:
+            self._remember(key, _smooth(self._estimates.get(key), seconds))
+            self._overall = _smooth(self._overall, seconds)
+
+    def observe_timeout(self, url: str, seconds: float):
+        """Back a host off after a request to it timed out after the given seconds"""
+        key = host_key(url)
+        with self._lock:
+            smoothed, deviation = self._estimates.get(key) or self._overall or (seconds, 0.0)
+            self._remember(key, (min(max(smoothed, seconds) * 2, self.max_read), deviation))
+
+    def _remember(self, key: str, estimate: Tuple[float, float]):
+        self._estimates[key] = estimate
+        self._estimates.move_to_end(key)
+        while len(self._estimates) > self.max_hosts:
+            self._estimates.popitem(last=False)
+
+def _smooth(estimate: Optional[Tuple[float, float]], seconds: float) -> Tuple[float, float]:
+    """Update a (smoothed time, mean deviation) pair with one sample, using TCP's gains"""
+    if estimate is None:
+        return seconds, seconds / 2
+    smoothed, deviation = estimate
+    deviation += 0.25 * (abs(seconds - smoothed) - deviation)
+    smoothed += 0.125 * (seconds - smoothed)
+    return smoothed, deviation
+
+_current_budget: ContextVar[Optional['TimeBudget']] = ContextVar('time_budget', default=None)
+
+class TimeBudget:
+    """A hard deadline shared by every request one stage makes for one domain
+
+    Used as a context manager; HttpFetcher caps each request's timeouts at
+    what is left and skips requests once it has run out, so the stage ends
+    with whatever it found so far. A budget opened inside another never
+    outlasts it.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+        self._token = None
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed"""
+        return time.monotonic() >= self.deadline
+
+    def __enter__(self) -> 'TimeBudget':
+        outer = _current_budget.get()
+        if outer is not None:
+            self.deadline = min(self.deadline, outer.deadline)
+        self._token = _current_budget.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current_budget.reset(self._token)
+
+def current_budget() -> Optional[TimeBudget]:
+    """The time budget of the stage running in this thread, if any"""
+    return _current_budget.get()
+
+_default_timeouts = None
+_default_timeouts_lock = threading.Lock()
+
+def get_adaptive_timeouts() -> AdaptiveTimeouts:
+    """Get the process-wide response time estimates"""
+    global _default_timeouts
+    with _default_timeouts_lock:
+        if _default_timeouts is None:
+            _default_timeouts = AdaptiveTimeouts()
+        return _default_timeouts